@@ -0,0 +1,121 @@
+"""
+Tareas de mantenimiento por línea de comandos.
+
+    python -m app.comandos migrar
+    python -m app.comandos reconstruir-reportes
+    python -m app.comandos purgar-idempotencia
+    python -m app.comandos particiones
+    python -m app.comandos archivar --meses-activos 12
+"""
+import argparse
+import sys
+from app.data.sources.database import SessionLocal, engine
+from app.data.sources import migraciones, particiones
+from app.data.repositories.idempotencia_repository import IdempotenciaRepository
+from app.data.repositories.reporte_repository import ReporteRepository
+from app.data.sources.archivo_ordenes import ARCHIVO_DIR
+from app.services.archivo_service import ARCHIVO_MESES_ACTIVOS, ArchivoService
+
+
+def migrar(args) -> int:
+    migraciones.esperar_bd(engine, args.esperar)
+    if args.estado:
+        for version, aplicada in migraciones.estado(engine):
+            print(f"{'aplicada ' if aplicada else 'pendiente'}  {version}")
+        return 0
+    aplicadas = migraciones.migrar(engine)
+    print(f"Migraciones aplicadas: {len(aplicadas)}" if aplicadas else "La base ya está al día")
+    return crear_particiones(args)
+
+
+def crear_particiones(args) -> int:
+    if getattr(args, "estado", False):
+        with engine.connect() as conexion:
+            for mes in particiones.listar(conexion):
+                print(mes.ordenes)
+        return 0
+    creadas = particiones.asegurar(engine)
+    print(f"Particiones creadas: {', '.join(creadas)}" if creadas else "Las particiones de los próximos meses ya existen")
+    return 0
+
+
+def reconstruir_reportes(args) -> int:
+    db = SessionLocal()
+    try:
+        ReporteRepository(db).reconstruir()
+    finally:
+        db.close()
+    print("Reportes reconstruidos")
+    return 0
+
+
+def purgar_idempotencia(args) -> int:
+    db = SessionLocal()
+    try:
+        borradas = IdempotenciaRepository(db).purgar_expiradas()
+    finally:
+        db.close()
+    print(f"Claves de idempotencia vencidas eliminadas: {borradas}")
+    return 0
+
+
+def archivar(args) -> int:
+    archivados = ArchivoService.archivar(args.meses_activos, borrar=args.borrar, simular=args.simular, directorio=args.dir)
+    if not archivados:
+        print("No hay meses por archivar")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.comandos", description="Tareas de mantenimiento de la API")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    migrar_parser = subcomandos.add_parser(
+        "migrar",
+        help="Aplica las migraciones pendientes de migraciones/ (se ejecuta antes de arrancar la API)"
+    )
+    migrar_parser.add_argument("--estado", action="store_true", help="solo lista las aplicadas y las pendientes")
+    migrar_parser.add_argument(
+        "--esperar", type=float, default=60.0, metavar="SEG",
+        help="segundos que se reintenta la conexión si la base todavía no levanta (por defecto 60)"
+    )
+    migrar_parser.set_defaults(funcion=migrar)
+
+    reconstruir = subcomandos.add_parser(
+        "reconstruir-reportes",
+        help="Recalcula las tablas de resumen de ventas desde ordenes/detalles_orden"
+    )
+    reconstruir.set_defaults(funcion=reconstruir_reportes)
+
+    purgar = subcomandos.add_parser(
+        "purgar-idempotencia",
+        help="Elimina las claves de idempotencia vencidas (pensado para un cron)"
+    )
+    purgar.set_defaults(funcion=purgar_idempotencia)
+
+    particiones_parser = subcomandos.add_parser(
+        "particiones",
+        help="Crea las particiones mensuales de ordenes que falten hasta PARTICIONES_MESES_ADELANTE (pensado para un cron mensual)"
+    )
+    particiones_parser.add_argument("--estado", action="store_true", help="solo lista los meses adjuntos")
+    particiones_parser.set_defaults(funcion=crear_particiones)
+
+    archivar_parser = subcomandos.add_parser(
+        "archivar",
+        help="Exporta los meses viejos de ordenes a ARCHIVO_DIR y desprende sus particiones"
+    )
+    archivar_parser.add_argument(
+        "--meses-activos", type=int, default=ARCHIVO_MESES_ACTIVOS, metavar="N",
+        help=f"meses que se quedan en la base, contando el actual (por defecto {ARCHIVO_MESES_ACTIVOS})"
+    )
+    archivar_parser.add_argument("--borrar", action="store_true", help="elimina las tablas desprendidas en lugar de dejarlas sueltas")
+    archivar_parser.add_argument("--simular", action="store_true", help="solo lista los meses que se archivarían")
+    archivar_parser.add_argument("--dir", default=ARCHIVO_DIR, help=f"directorio del archivo (por defecto {ARCHIVO_DIR})")
+    archivar_parser.set_defaults(funcion=archivar)
+
+    args = parser.parse_args(argv)
+    return args.funcion(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+from datetime import datetime
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.domain.models.models import ClaveIdempotencia
+
+EN_PROCESO = "EN_PROCESO"
+COMPLETADA = "COMPLETADA"
+
+class IdempotenciaRepository:
+    """
+    Tabla claves_idempotencia, compartida por todos los workers.
+
+    Reservar una clave es un solo `INSERT ... ON CONFLICT`: solo una petición
+    la obtiene, y una reserva vencida (de un worker que murió a media venta)
+    se puede retomar.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def sentencia_reservar(clave: str, huella: str, expira: datetime):
+        """Devuelve la clave solo si quedó reservada para quien ejecuta la sentencia"""
+        reserva = pg_insert(ClaveIdempotencia).values(
+            clave=clave, huella=huella, estado=EN_PROCESO, respuesta=None, expira=expira
+        )
+        return reserva.on_conflict_do_update(
+            index_elements=["clave"],
+            set_={
+                "huella": reserva.excluded.huella,
+                "estado": reserva.excluded.estado,
+                "respuesta": None,
+                "expira": reserva.excluded.expira,
+            },
+            where=ClaveIdempotencia.expira < datetime.now()
+        ).returning(ClaveIdempotencia.clave)
+
+    @staticmethod
+    def sentencia_obtener(clave: str):
+        return select(
+            ClaveIdempotencia.huella, ClaveIdempotencia.estado, ClaveIdempotencia.respuesta
+        ).where(ClaveIdempotencia.clave == clave)
+
+    @staticmethod
+    def sentencia_completar(clave: str, respuesta: str, expira: datetime):
+        return (
+            update(ClaveIdempotencia)
+            .where(ClaveIdempotencia.clave == clave)
+            .values(estado=COMPLETADA, respuesta=respuesta, expira=expira)
+        )
+
+    @staticmethod
+    def sentencia_liberar(clave: str):
+        return delete(ClaveIdempotencia).where(
+            ClaveIdempotencia.clave == clave, ClaveIdempotencia.estado == EN_PROCESO
+        )
+
+    def reservar(self, clave: str, huella: str, expira: datetime) -> bool:
+        """Intenta reservar la clave (con commit propio para que los demás workers la vean)"""
+        try:
+            reservada = self.db.execute(self.sentencia_reservar(clave, huella, expira)).first() is not None
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return reservada
+
+    def obtener(self, clave: str) -> Optional[tuple]:
+        """(huella, estado, respuesta) de la clave, o None si no existe"""
+        fila = self.db.execute(self.sentencia_obtener(clave)).first()
+        # Sin commit la siguiente consulta seguiría en la misma transacción
+        self.db.rollback()
+        return fila
+
+    def completar(self, clave: str, respuesta: str, expira: datetime) -> None:
+        """Guarda la respuesta; sin commit, va en la transacción de la venta"""
+        self.db.execute(self.sentencia_completar(clave, respuesta, expira))
+
+    def liberar(self, clave: str) -> None:
+        """Borra una reserva cuya venta falló, para que un reintento la pueda tomar"""
+        try:
+            self.db.rollback()
+            self.db.execute(self.sentencia_liberar(clave))
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def purgar_expiradas(self) -> int:
+        """Elimina las claves vencidas; devuelve cuántas borró"""
+        try:
+            borradas = self.db.execute(
+                delete(ClaveIdempotencia).where(ClaveIdempotencia.expira < datetime.now())
+            ).rowcount
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return borradas
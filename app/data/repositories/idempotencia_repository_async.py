@@ -0,0 +1,37 @@
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from app.data.repositories.idempotencia_repository import IdempotenciaRepository
+
+class IdempotenciaRepositoryAsync:
+    """Versión asíncrona (asyncpg) de IdempotenciaRepository"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def reservar(self, clave: str, huella: str, expira: datetime) -> bool:
+        try:
+            resultado = await self.db.execute(IdempotenciaRepository.sentencia_reservar(clave, huella, expira))
+            reservada = resultado.first() is not None
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+        return reservada
+
+    async def obtener(self, clave: str) -> Optional[tuple]:
+        fila = (await self.db.execute(IdempotenciaRepository.sentencia_obtener(clave))).first()
+        await self.db.rollback()
+        return fila
+
+    async def completar(self, clave: str, respuesta: str, expira: datetime) -> None:
+        await self.db.execute(IdempotenciaRepository.sentencia_completar(clave, respuesta, expira))
+
+    async def liberar(self, clave: str) -> None:
+        try:
+            await self.db.rollback()
+            await self.db.execute(IdempotenciaRepository.sentencia_liberar(clave))
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
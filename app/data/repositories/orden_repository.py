@@ -1,66 +1,471 @@
+import os
+import re
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import Float, Integer, and_, column, delete, exists, func, insert, select, true, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from app.domain.models.models import Cliente, Orden, DetalleOrden, Producto
+from app.data.sources.archivo_ordenes import archivo_ordenes
+from app.data.sources.cache_lru import CacheLRU
+from app.data.sources.cache_productos import cache_productos
+from app.data.sources.eventos_ordenes import CANAL_ORDENES, COCINA_NOTIFY, bus_ordenes, sentencias_notificar
+from app.data.repositories.reporte_repository import ReporteRepository
+
+# Caché teléfono normalizado → (id, nombre) del cliente; los clientes
+# frecuentes son la mayoría de las ventas y así no tocan la tabla clientes
+CLIENTE_CACHE_MAX = int(os.getenv("CLIENTE_CACHE_MAX", "10000"))
+CLIENTE_CACHE_TTL = float(os.getenv("CLIENTE_CACHE_TTL", "600"))
+cache_clientes = CacheLRU(CLIENTE_CACHE_MAX, CLIENTE_CACHE_TTL)
+
+
+def normalizar_telefono(telefono: str) -> str:
+    """
+    Clave única del cliente: solo los dígitos del teléfono ("(555) 123-4567"
+    y "555 123 4567" son el mismo cliente). Debe coincidir con el respaldo de
+    migraciones/0004_telefono_normalizado.sql: COALESCE(NULLIF(regexp_replace(telefono, '[^0-9]', '', 'g'), ''), lower(trim(telefono)))
+    """
+    return re.sub(r"[^0-9]", "", telefono) or telefono.strip().lower()
+
 
 class OrdenRepository:
     def __init__(self, db: Session):
         self.db = db
 
     def obtener_o_crear_cliente(self, datos_cliente) -> Cliente:
-        # 1. Buscamos si el cliente ya existe por teléfono
-        cliente = self.db.query(Cliente).filter(Cliente.telefono == datos_cliente.telefono).first()
-        
-        # 2. Si no existe, lo creamos
-        if not cliente:
-            cliente = Cliente(
-                nombre=datos_cliente.nombre,
-                telefono=datos_cliente.telefono,
-                direccion=datos_cliente.direccion
+        """
+        Devuelve el cliente del teléfono, insertándolo si es nuevo.
+        No hace commit: la inserción queda en la transacción de la venta.
+        """
+        return self.obtener_o_crear_clientes([datos_cliente])[normalizar_telefono(datos_cliente.telefono)]
+
+    def obtener_o_crear_clientes(self, datos_clientes: Iterable) -> Dict[str, Cliente]:
+        """
+        {teléfono normalizado: cliente} para varios clientes a la vez.
+
+        Los que no están en caché se resuelven con un solo INSERT ... ON
+        CONFLICT ... RETURNING sobre el índice único del teléfono normalizado:
+        dos ventas simultáneas de un número nuevo no pueden crear dos clientes.
+        Los clientes devueltos no pertenecen a la sesión (el commit no los expira).
+        """
+        clientes, faltantes = self.clientes_en_cache(datos_clientes)
+        if faltantes:
+            for fila in self.db.execute(self.sentencia_upsert_clientes(faltantes)):
+                clientes[fila.telefono_normalizado] = Cliente(id=fila.id, nombre=fila.nombre)
+        return clientes
+
+    @staticmethod
+    def clientes_en_cache(datos_clientes: Iterable) -> Tuple[Dict[str, Cliente], List[dict]]:
+        """Clientes que ya están en caché y filas (una por teléfono) de los que faltan"""
+        clientes, faltantes = {}, {}
+        for datos in datos_clientes:
+            telefono = normalizar_telefono(datos.telefono)
+            if telefono in clientes or telefono in faltantes:
+                continue
+            en_cache = cache_clientes.obtener(telefono)
+            if en_cache is not None:
+                clientes[telefono] = Cliente(id=en_cache[0], nombre=en_cache[1])
+            else:
+                # Si el teléfono se repite, vale el primero (como en ventas sucesivas)
+                faltantes[telefono] = {
+                    "nombre": datos.nombre,
+                    "telefono": datos.telefono,
+                    "telefono_normalizado": telefono,
+                    "direccion": datos.direccion,
+                }
+        return clientes, list(faltantes.values())
+
+    @staticmethod
+    def sentencia_upsert_clientes(filas: List[dict]):
+        # El DO UPDATE no cambia nada, pero a diferencia de DO NOTHING hace que
+        # RETURNING devuelva también los clientes que ya existían (y espera al
+        # commit de una inserción concurrente del mismo teléfono en vez de fallar)
+        upsert = pg_insert(Cliente).values(filas)
+        return upsert.on_conflict_do_update(
+            index_elements=[Cliente.telefono_normalizado],
+            set_={"telefono_normalizado": upsert.excluded.telefono_normalizado}
+        ).returning(Cliente.id, Cliente.nombre, Cliente.telefono_normalizado)
+
+    @staticmethod
+    def recordar_clientes(clientes: Dict[str, Cliente]) -> None:
+        """Guarda en caché clientes ya confirmados (nunca antes del commit: su ID podría no existir)"""
+        for telefono, cliente in clientes.items():
+            cache_clientes.guardar(telefono, (cliente.id, cliente.nombre))
+
+    def obtener_precio_producto(self, producto_id: int) -> float:
+        return self.obtener_precios_productos([producto_id]).get(producto_id, 0.0)
+
+    def obtener_precios_productos(self, producto_ids: Iterable[int]) -> Dict[int, float]:
+        """Precios de varios productos a la vez; los productos inexistentes no aparecen"""
+        return cache_productos.obtener_precios(self.db, producto_ids)
+
+    def guardar_venta(
+        self,
+        datos_cliente,
+        orden: Orden,
+        detalles: List[DetalleOrden],
+        al_confirmar: Optional[Callable[[Cliente, Orden], None]] = None
+    ) -> Tuple[Cliente, Orden]:
+        """
+        Guarda una venta completa en una sola transacción: cliente (si es nuevo),
+        cabecera, detalles y resúmenes de reportes. Si algo falla no queda nada escrito.
+
+        Cabecera y detalles se insertan en una sola sentencia: un CTE inserta la
+        orden con `RETURNING id` y otro inserta todos los detalles en un INSERT
+        multi-fila usando ese ID. Al volver, `orden.id` (folio) y `orden.fecha`
+        quedan asignados.
+
+        `al_confirmar(cliente, orden)` corre dentro de la transacción justo
+        antes del commit (p. ej. para guardar la respuesta de una clave de
+        idempotencia junto con la venta).
+
+        La orden nueva se avisa a la cocina (ver eventos_ordenes): con NOTIFY
+        en la misma sentencia del INSERT y, después del commit, al bus local.
+        """
+        try:
+            telefono = normalizar_telefono(datos_cliente.telefono)
+            cliente = self.obtener_o_crear_clientes([datos_cliente])[telefono]
+            
+            orden.cliente_id = cliente.id
+            orden.id = self.db.execute(self.sentencia_insertar_orden(orden, detalles)).scalar_one()
+            ReporteRepository(self.db).acumular(
+                orden.fecha, orden.total_venta, [(d.producto_id, d.cantidad, d.subtotal) for d in detalles]
             )
-            self.db.add(cliente)
+            if al_confirmar is not None:
+                al_confirmar(cliente, orden)
             self.db.commit()
-            self.db.refresh(cliente)
+        except Exception:
+            self.db.rollback()
+            raise
         
-        return cliente
-
-    def obtener_precio_producto(self, producto_id: int) -> float:
-        producto = self.db.query(Producto).filter(Producto.id == producto_id).first()
-        if producto:
-            return producto.precio
-        return 0.0
-
-    def guardar_orden(self, orden: Orden, detalles: list[DetalleOrden]) -> Orden:
-        # 1. Guardamos la cabecera de la orden
-        self.db.add(orden)
-        self.db.commit()
-        self.db.refresh(orden) # Esto nos da el ID generado (folio)
-
-        # 2. Asignamos ese ID a cada detalle y guardamos
+        self.recordar_clientes({telefono: cliente})
+        bus_ordenes.publicar("nueva", [orden.id])
         for d in detalles:
             d.orden_id = orden.id
-            self.db.add(d)
+        return cliente, orden
+    
+    @staticmethod
+    def sentencia_insertar_orden(orden: Orden, detalles: List[DetalleOrden]):
+        """
+        Arma la sentencia única que inserta cabecera y detalles y devuelve el folio.
+        Asigna `orden.fecha` si todavía no tiene. Con COCINA_NOTIFY la misma
+        sentencia emite el NOTIFY de la orden nueva.
+        """
+        orden.fecha = orden.fecha or datetime.now()
+        cabecera = (
+            insert(Orden)
+            .values(
+                cliente_id=orden.cliente_id,
+                fecha=orden.fecha,
+                total_venta=orden.total_venta,
+                pago_cliente=orden.pago_cliente,
+                cambio=orden.cambio,
+                estatus=orden.estatus or "PAGADA"
+            )
+            .returning(Orden.id, Orden.fecha)
+            .cte("nueva_orden")
+        )
+        sentencia = select(cabecera.c.id)
+        if COCINA_NOTIFY:
+            sentencia = sentencia.add_columns(func.pg_notify(CANAL_ORDENES, func.concat("nueva:", cabecera.c.id)))
         
-        self.db.commit()
-        return orden
+        if detalles:
+            items = values(
+                column("producto_id", Integer),
+                column("cantidad", Integer),
+                column("subtotal", Float),
+                name="items"
+            ).data([(d.producto_id, d.cantidad, d.subtotal) for d in detalles])
+            sentencia = sentencia.add_cte(
+                insert(DetalleOrden)
+                .from_select(
+                    ["orden_id", "fecha_orden", "producto_id", "cantidad", "subtotal"],
+                    select(cabecera.c.id, cabecera.c.fecha, items.c.producto_id, items.c.cantidad, items.c.subtotal)
+                    .select_from(cabecera)
+                    .join(items, true())
+                )
+                .cte("nuevos_detalles")
+            )
+        return sentencia
+
+    def guardar_ventas_lote(
+        self,
+        ventas: List[Tuple[object, Orden, List[DetalleOrden]]],
+        al_confirmar: Optional[List[Optional[Callable[[Cliente, Orden], None]]]] = None
+    ) -> List[Tuple[Cliente, Orden]]:
+        """
+        Guarda varias ventas (datos_cliente, orden, detalles) en una sola
+        transacción con sentencias por conjunto: un upsert de los clientes que
+        no están en caché, un INSERT de cabeceras, uno de detalles y un upsert
+        por resumen. Todo o nada: si falla, no queda ninguna escrita.
+
+        `al_confirmar`, si se da, tiene una función (o None) por venta, como en
+        `guardar_venta`; todas corren antes del único commit.
+        """
+        try:
+            clientes = self.obtener_o_crear_clientes(datos for datos, _, _ in ventas)
+            ids = self.db.execute(self.sentencia_insertar_ordenes(), self.filas_ordenes(ventas, clientes)).scalars().all()
+            filas_detalles = self.filas_detalles(ventas, ids)
+            if filas_detalles:
+                self.db.execute(insert(DetalleOrden), filas_detalles)
+            ReporteRepository(self.db).acumular_lote(self.resumen_lote(ventas))
+            for funcion, (cliente, orden) in zip(al_confirmar or [], self.guardadas_lote(ventas, clientes)):
+                if funcion is not None:
+                    funcion(cliente, orden)
+            for sentencia in sentencias_notificar("nueva", ids):
+                self.db.execute(sentencia)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        self.recordar_clientes(clientes)
+        bus_ordenes.publicar("nueva", ids)
+        return self.guardadas_lote(ventas, clientes)
+
+    # Piezas de guardar_ventas_lote compartidas con la versión async
+
+    @staticmethod
+    def guardadas_lote(ventas, clientes: Dict[str, Cliente]) -> List[Tuple[Cliente, Orden]]:
+        return [(clientes[normalizar_telefono(datos.telefono)], orden) for datos, orden, _ in ventas]
+
+    @staticmethod
+    def sentencia_insertar_ordenes():
+        return insert(Orden).returning(Orden.id, sort_by_parameter_order=True)
+
+    @staticmethod
+    def filas_ordenes(ventas, clientes: Dict[str, Cliente]) -> List[dict]:
+        """Asigna cliente y fecha a cada orden y devuelve sus filas en el mismo orden"""
+        ahora = datetime.now()
+        filas = []
+        for datos, orden, _ in ventas:
+            orden.cliente_id = clientes[normalizar_telefono(datos.telefono)].id
+            orden.fecha = orden.fecha or ahora
+            orden.estatus = orden.estatus or "PAGADA"
+            filas.append({
+                "cliente_id": orden.cliente_id,
+                "fecha": orden.fecha,
+                "total_venta": orden.total_venta,
+                "pago_cliente": orden.pago_cliente,
+                "cambio": orden.cambio,
+                "estatus": orden.estatus,
+            })
+        return filas
+
+    @staticmethod
+    def filas_detalles(ventas, ids: List[int]) -> List[dict]:
+        """Asigna los folios devueltos por el INSERT y arma las filas de todos los detalles"""
+        filas = []
+        for (_, orden, detalles), orden_id in zip(ventas, ids):
+            orden.id = orden_id
+            for d in detalles:
+                d.orden_id = orden_id
+                filas.append({
+                    "orden_id": orden_id,
+                    "fecha_orden": orden.fecha,
+                    "producto_id": d.producto_id,
+                    "cantidad": d.cantidad,
+                    "subtotal": d.subtotal,
+                })
+        return filas
+
+    @staticmethod
+    def resumen_lote(ventas) -> list:
+        return [
+            (orden.fecha, orden.total_venta, [(d.producto_id, d.cantidad, d.subtotal) for d in detalles])
+            for _, orden, detalles in ventas
+        ]
+    
+    @staticmethod
+    def consulta_filas_ordenes(
+        limite: Optional[int] = None,
+        despues_de: Optional[int] = None,
+        orden_id: Optional[int] = None,
+        ids: Optional[List[int]] = None,
+        posteriores_a: Optional[int] = None,
+        condiciones: Iterable = ()
+    ):
+        """
+        Órdenes con sus detalles como tuplas planas (una por detalle, o una con
+        detalle nulo si la orden no tiene), de la más reciente a la más antigua,
+        con las columnas de `iterar_filas_historial`.
+
+        La página (keyset sobre `ordenes.id`) se elige en un CTE y los detalles
+        se unen a ella, así que es una sola consulta y sin objetos ORM.
+        Con `posteriores_a` la página son las órdenes siguientes a ese folio,
+        de la más antigua a la más reciente (para reanudar el feed de cocina).
+        `condiciones` filtra la página (ver `condiciones_busqueda`).
+        """
+        pagina = (
+            select(
+                Orden.id, Orden.fecha, Cliente.nombre.label("cliente_nombre"),
+                Orden.total_venta, Orden.pago_cliente, Orden.cambio, Orden.estatus
+            )
+            .select_from(Orden)
+            .outerjoin(Cliente, Orden.cliente_id == Cliente.id)
+        )
+        if orden_id is not None:
+            pagina = pagina.where(Orden.id == orden_id)
+        if ids is not None:
+            pagina = pagina.where(Orden.id.in_(ids))
+        if despues_de is not None:
+            pagina = pagina.where(Orden.id < despues_de)
+        if posteriores_a is not None:
+            pagina = pagina.where(Orden.id > posteriores_a)
+        pagina = pagina.where(*condiciones)
+        orden_pagina = Orden.id.asc() if posteriores_a is not None else Orden.id.desc()
+        pagina = pagina.order_by(orden_pagina).limit(limite).cte("pagina")
+        return (
+            select(
+                *pagina.c,
+                DetalleOrden.producto_id,
+                Producto.nombre,
+                DetalleOrden.cantidad,
+                Producto.precio,
+                DetalleOrden.subtotal
+            )
+            .select_from(pagina)
+            .outerjoin(DetalleOrden, and_(DetalleOrden.orden_id == pagina.c.id, DetalleOrden.fecha_orden == pagina.c.fecha))
+            .outerjoin(Producto, DetalleOrden.producto_id == Producto.id)
+            .order_by(pagina.c.id.asc() if posteriores_a is not None else pagina.c.id.desc(), DetalleOrden.id)
+        )
     
-    def obtener_todas_ordenes(self) -> List[Orden]:
-        """Obtiene todas las órdenes con sus relaciones"""
-        return self.db.query(Orden).all()
+    @staticmethod
+    def condiciones_busqueda(
+        desde: Optional[date] = None,
+        hasta: Optional[date] = None,
+        estatus: Optional[str] = None,
+        cliente_id: Optional[int] = None,
+        telefono: Optional[str] = None,
+        producto_id: Optional[int] = None
+    ) -> list:
+        """
+        Condiciones sobre `ordenes` de GET /ordenes/buscar; cada una tiene su
+        índice (ver migraciones/0005_indices_busqueda.sql):
+
+        - `desde`/`hasta`: días completos, `hasta` incluido (ix_ordenes_fecha);
+        - `estatus` y `cliente_id` (ix_ordenes_estatus, ix_ordenes_cliente_id);
+        - `telefono`: el cliente se resuelve por su teléfono normalizado en una
+          subconsulta, así el filtro queda también sobre `ordenes.cliente_id`;
+        - `producto_id`: EXISTS sobre los detalles (ix_detalles_orden_producto_orden).
+        """
+        condiciones = []
+        if desde is not None:
+            condiciones.append(Orden.fecha >= datetime.combine(desde, time.min))
+        if hasta is not None:
+            condiciones.append(Orden.fecha < datetime.combine(hasta + timedelta(days=1), time.min))
+        if estatus is not None:
+            condiciones.append(Orden.estatus == estatus)
+        if cliente_id is not None:
+            condiciones.append(Orden.cliente_id == cliente_id)
+        if telefono is not None:
+            condiciones.append(Orden.cliente_id == (
+                select(Cliente.id)
+                .where(Cliente.telefono_normalizado == normalizar_telefono(telefono))
+                .scalar_subquery()
+            ))
+        if producto_id is not None:
+            condiciones.append(exists().where(
+                DetalleOrden.producto_id == producto_id,
+                DetalleOrden.orden_id == Orden.id,
+                DetalleOrden.fecha_orden == Orden.fecha
+            ))
+        return condiciones
     
-    def obtener_orden_por_id(self, orden_id: int) -> Optional[Orden]:
-        """Obtiene una orden específica por ID"""
-        return self.db.query(Orden).filter(Orden.id == orden_id).first()
+    def obtener_filas_historial(self, limite: int, despues_de: Optional[int] = None, condiciones: Iterable = ()) -> list:
+        """Filas de una página del historial, filtrada por `condiciones` si las hay (ver `consulta_filas_ordenes`)"""
+        return self.db.execute(self.consulta_filas_ordenes(limite, despues_de, condiciones=condiciones)).all()
+    
+    def obtener_filas_orden(self, orden_id: int) -> list:
+        """Filas de una orden; lista vacía si no existe"""
+        return self.db.execute(self.consulta_filas_ordenes(orden_id=orden_id)).all()
+    
+    def obtener_filas_ordenes(self, ids: List[int]) -> list:
+        """Filas de varias órdenes, de la más reciente a la más antigua; las que no existen no aparecen"""
+        return self.db.execute(self.consulta_filas_ordenes(ids=ids)).all()
+    
+    @staticmethod
+    def obtener_orden_archivada(orden_id: int) -> Optional[dict]:
+        """
+        Orden de un mes ya archivado y desprendido (ver archivo_ordenes), con
+        la forma de OrdenResponse; None si tampoco está en el archivo.
+        """
+        return archivo_ordenes.buscar(orden_id)
+    
+    def obtener_ultimo_folio(self) -> int:
+        """Folio más alto registrado; 0 si no hay órdenes"""
+        return self.db.execute(select(func.coalesce(func.max(Orden.id), 0))).scalar_one()
+    
+    def obtener_filas_posteriores(self, orden_id: int, limite: int) -> list:
+        """Filas de las `limite` órdenes siguientes al folio `orden_id`, de la más antigua a la más reciente"""
+        return self.db.execute(self.consulta_filas_ordenes(limite, posteriores_a=orden_id)).all()
+    
+    def iterar_filas_historial(
+        self, tamano_lote: int = 1000, desde: Optional[date] = None, hasta: Optional[date] = None
+    ) -> Iterator[list]:
+        """
+        Recorre todas las órdenes con sus detalles como filas planas
+        (una por detalle), ordenadas por folio. Con `desde`/`hasta` solo las
+        de ese rango de fechas (`hasta` excluido; p. ej. un mes para archivarlo).
+
+        Usa un cursor del lado del servidor y entrega lotes de `tamano_lote`
+        filas, así la memoria no depende del tamaño de la tabla.
+        """
+        rango = []
+        if desde is not None:
+            rango.append(Orden.fecha >= desde)
+        if hasta is not None:
+            rango.append(Orden.fecha < hasta)
+        consulta = (
+            select(
+                Orden.id,
+                Orden.fecha,
+                Cliente.nombre,
+                Orden.total_venta,
+                Orden.pago_cliente,
+                Orden.cambio,
+                Orden.estatus,
+                DetalleOrden.producto_id,
+                Producto.nombre,
+                DetalleOrden.cantidad,
+                Producto.precio,
+                DetalleOrden.subtotal
+            )
+            .select_from(Orden)
+            .outerjoin(Cliente, Orden.cliente_id == Cliente.id)
+            .outerjoin(DetalleOrden, and_(DetalleOrden.orden_id == Orden.id, DetalleOrden.fecha_orden == Orden.fecha))
+            .outerjoin(Producto, DetalleOrden.producto_id == Producto.id)
+            .where(*rango)
+            .order_by(Orden.id, DetalleOrden.id)
+            .execution_options(yield_per=tamano_lote)
+        )
+        for lote in self.db.execute(consulta).partitions():
+            yield lote
     
     def eliminar_orden(self, orden_id: int) -> bool:
-        """Elimina una orden y sus detalles"""
-        orden = self.obtener_orden_por_id(orden_id)
-        if not orden:
-            return False
-        
-        # Primero eliminar los detalles
-        self.db.query(DetalleOrden).filter(DetalleOrden.orden_id == orden_id).delete()
-        
-        # Luego eliminar la orden
-        self.db.delete(orden)
-        self.db.commit()
-        return True
\ No newline at end of file
+        """Elimina una orden y sus detalles, descontándola de los resúmenes en la misma transacción"""
+        try:
+            # Primero eliminar los detalles
+            detalles = self.db.execute(
+                delete(DetalleOrden)
+                .where(DetalleOrden.orden_id == orden_id)
+                .returning(DetalleOrden.producto_id, DetalleOrden.cantidad, DetalleOrden.subtotal)
+            ).all()
+            
+            # Luego eliminar la orden
+            orden = self.db.execute(
+                delete(Orden).where(Orden.id == orden_id).returning(Orden.fecha, Orden.total_venta)
+            ).first()
+            if orden is None:
+                self.db.rollback()
+                return False
+            
+            if orden.fecha is not None:
+                ReporteRepository(self.db).acumular(orden.fecha, orden.total_venta, detalles, signo=-1)
+            for sentencia in sentencias_notificar("cancelada", [orden_id]):
+                self.db.execute(sentencia)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        bus_ordenes.publicar("cancelada", [orden_id])
+        return True
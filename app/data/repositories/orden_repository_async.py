@@ -0,0 +1,133 @@
+import asyncio
+from sqlalchemy import delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from app.domain.models.models import Cliente, Orden, DetalleOrden
+from app.data.sources.cache_productos import cache_productos
+from app.data.sources.eventos_ordenes import bus_ordenes, sentencias_notificar
+from app.data.repositories.orden_repository import OrdenRepository, normalizar_telefono
+from app.data.repositories.reporte_repository import ReporteRepository
+
+class OrdenRepositoryAsync:
+    """Versión asíncrona (asyncpg) de OrdenRepository"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def obtener_o_crear_cliente(self, datos_cliente) -> Cliente:
+        """Devuelve el cliente del teléfono, insertándolo si es nuevo, sin hacer commit"""
+        return (await self.obtener_o_crear_clientes([datos_cliente]))[normalizar_telefono(datos_cliente.telefono)]
+
+    async def obtener_o_crear_clientes(self, datos_clientes: Iterable) -> Dict[str, Cliente]:
+        """Caché y luego un solo upsert (ver OrdenRepository.obtener_o_crear_clientes)"""
+        clientes, faltantes = OrdenRepository.clientes_en_cache(datos_clientes)
+        if faltantes:
+            for fila in await self.db.execute(OrdenRepository.sentencia_upsert_clientes(faltantes)):
+                clientes[fila.telefono_normalizado] = Cliente(id=fila.id, nombre=fila.nombre)
+        return clientes
+
+    async def obtener_precios_productos(self, producto_ids: Iterable[int]) -> Dict[int, float]:
+        """Precios de varios productos a la vez; los productos inexistentes no aparecen"""
+        return await cache_productos.obtener_precios_async(self.db, producto_ids)
+
+    async def guardar_venta(
+        self,
+        datos_cliente,
+        orden: Orden,
+        detalles: List[DetalleOrden],
+        al_confirmar: Optional[Callable[[Cliente, Orden], Awaitable[None]]] = None
+    ) -> Tuple[Cliente, Orden]:
+        """Guarda cliente, cabecera, detalles y resúmenes en una sola transacción (ver OrdenRepository.guardar_venta)"""
+        try:
+            telefono = normalizar_telefono(datos_cliente.telefono)
+            cliente = (await self.obtener_o_crear_clientes([datos_cliente]))[telefono]
+            
+            orden.cliente_id = cliente.id
+            resultado = await self.db.execute(OrdenRepository.sentencia_insertar_orden(orden, detalles))
+            orden.id = resultado.scalar_one()
+            await self._acumular(orden.fecha, orden.total_venta, [(d.producto_id, d.cantidad, d.subtotal) for d in detalles])
+            if al_confirmar is not None:
+                await al_confirmar(cliente, orden)
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+        
+        OrdenRepository.recordar_clientes({telefono: cliente})
+        bus_ordenes.publicar("nueva", [orden.id])
+        for d in detalles:
+            d.orden_id = orden.id
+        return cliente, orden
+
+    async def guardar_ventas_lote(
+        self,
+        ventas: List[Tuple[object, Orden, List[DetalleOrden]]],
+        al_confirmar: Optional[List[Optional[Callable[[Cliente, Orden], Awaitable[None]]]]] = None
+    ) -> List[Tuple[Cliente, Orden]]:
+        """Guarda varias ventas en una sola transacción (ver OrdenRepository.guardar_ventas_lote)"""
+        try:
+            clientes = await self.obtener_o_crear_clientes(datos for datos, _, _ in ventas)
+            resultado = await self.db.execute(
+                OrdenRepository.sentencia_insertar_ordenes(), OrdenRepository.filas_ordenes(ventas, clientes)
+            )
+            ids = resultado.scalars().all()
+            filas_detalles = OrdenRepository.filas_detalles(ventas, ids)
+            if filas_detalles:
+                await self.db.execute(insert(DetalleOrden), filas_detalles)
+            for sentencia in ReporteRepository.sentencias_acumular_lote(OrdenRepository.resumen_lote(ventas)):
+                await self.db.execute(sentencia)
+            for funcion, (cliente, orden) in zip(al_confirmar or [], OrdenRepository.guardadas_lote(ventas, clientes)):
+                if funcion is not None:
+                    await funcion(cliente, orden)
+            for sentencia in sentencias_notificar("nueva", ids):
+                await self.db.execute(sentencia)
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+        OrdenRepository.recordar_clientes(clientes)
+        bus_ordenes.publicar("nueva", ids)
+        return OrdenRepository.guardadas_lote(ventas, clientes)
+
+    async def obtener_filas_historial(self, limite: int, despues_de: Optional[int] = None, condiciones: Iterable = ()) -> list:
+        """Filas de una página del historial, filtrada por `condiciones` si las hay (ver OrdenRepository.consulta_filas_ordenes)"""
+        return (await self.db.execute(OrdenRepository.consulta_filas_ordenes(limite, despues_de, condiciones=condiciones))).all()
+
+    async def obtener_filas_orden(self, orden_id: int) -> list:
+        """Filas de una orden; lista vacía si no existe"""
+        return (await self.db.execute(OrdenRepository.consulta_filas_ordenes(orden_id=orden_id))).all()
+
+    @staticmethod
+    async def obtener_orden_archivada(orden_id: int) -> Optional[dict]:
+        """Orden de un mes archivado (ver OrdenRepository.obtener_orden_archivada), leída fuera del event loop"""
+        return await asyncio.to_thread(OrdenRepository.obtener_orden_archivada, orden_id)
+
+    async def eliminar_orden(self, orden_id: int) -> bool:
+        """Elimina una orden y sus detalles, descontándola de los resúmenes en la misma transacción"""
+        try:
+            detalles = (await self.db.execute(
+                delete(DetalleOrden)
+                .where(DetalleOrden.orden_id == orden_id)
+                .returning(DetalleOrden.producto_id, DetalleOrden.cantidad, DetalleOrden.subtotal)
+            )).all()
+            orden = (await self.db.execute(
+                delete(Orden).where(Orden.id == orden_id).returning(Orden.fecha, Orden.total_venta)
+            )).first()
+            if orden is None:
+                await self.db.rollback()
+                return False
+            
+            if orden.fecha is not None:
+                await self._acumular(orden.fecha, orden.total_venta, detalles, signo=-1)
+            for sentencia in sentencias_notificar("cancelada", [orden_id]):
+                await self.db.execute(sentencia)
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+        bus_ordenes.publicar("cancelada", [orden_id])
+        return True
+
+    async def _acumular(self, fecha, total, detalles, signo: int = 1) -> None:
+        for sentencia in ReporteRepository.sentencias_acumular(fecha, total, detalles, signo):
+            await self.db.execute(sentencia)
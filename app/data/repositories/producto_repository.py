@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
 from app.domain.models.models import Producto
-from typing import List, Optional
+from app.data.sources.cache_productos import cache_productos
+from typing import List, Optional, Tuple
 
 class ProductoRepository:
     
@@ -9,6 +10,11 @@ class ProductoRepository:
         """Obtiene todos los productos"""
         return db.query(Producto).all()
     
+    @staticmethod
+    def obtener_catalogo(db: Session) -> Tuple[str, bytes]:
+        """Catálogo completo ya serializado a JSON con su ETag (desde la caché si está vigente)"""
+        return cache_productos.obtener_catalogo(db)
+    
     @staticmethod
     def obtener_por_id(db: Session, producto_id: int) -> Optional[Producto]:
         """Obtiene un producto por ID"""
@@ -25,6 +31,7 @@ class ProductoRepository:
         producto = Producto(nombre=nombre, precio=precio)
         db.add(producto)
         db.commit()
+        cache_productos.invalidar()
         db.refresh(producto)
         return producto
     
@@ -41,6 +48,7 @@ class ProductoRepository:
             producto.precio = precio
         
         db.commit()
+        cache_productos.invalidar()
         db.refresh(producto)
         return producto
     
@@ -53,4 +61,5 @@ class ProductoRepository:
         
         db.delete(producto)
         db.commit()
+        cache_productos.invalidar()
         return True
@@ -0,0 +1,67 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.domain.models.models import Producto
+from app.data.sources.cache_productos import cache_productos
+from typing import List, Optional, Tuple
+
+class ProductoRepositoryAsync:
+    """Versión asíncrona (asyncpg) de ProductoRepository"""
+    
+    @staticmethod
+    async def obtener_todos(db: AsyncSession) -> List[Producto]:
+        """Obtiene todos los productos"""
+        resultado = await db.execute(select(Producto))
+        return list(resultado.scalars().all())
+    
+    @staticmethod
+    async def obtener_catalogo(db: AsyncSession) -> Tuple[str, bytes]:
+        """Catálogo completo ya serializado a JSON con su ETag (desde la caché si está vigente)"""
+        return await cache_productos.obtener_catalogo_async(db)
+    
+    @staticmethod
+    async def obtener_por_id(db: AsyncSession, producto_id: int) -> Optional[Producto]:
+        """Obtiene un producto por ID"""
+        return await db.get(Producto, producto_id)
+    
+    @staticmethod
+    async def obtener_por_nombre(db: AsyncSession, nombre: str) -> Optional[Producto]:
+        """Obtiene un producto por nombre"""
+        resultado = await db.execute(select(Producto).where(Producto.nombre == nombre).limit(1))
+        return resultado.scalars().first()
+    
+    @staticmethod
+    async def crear_producto(db: AsyncSession, nombre: str, precio: float) -> Producto:
+        """Crea un nuevo producto"""
+        producto = Producto(nombre=nombre, precio=precio)
+        db.add(producto)
+        await db.commit()
+        cache_productos.invalidar()
+        return producto
+    
+    @staticmethod
+    async def actualizar_producto(db: AsyncSession, producto_id: int, nombre: Optional[str] = None, precio: Optional[float] = None) -> Optional[Producto]:
+        """Actualiza un producto existente"""
+        producto = await ProductoRepositoryAsync.obtener_por_id(db, producto_id)
+        if not producto:
+            return None
+        
+        if nombre is not None:
+            producto.nombre = nombre
+        if precio is not None:
+            producto.precio = precio
+        
+        await db.commit()
+        cache_productos.invalidar()
+        return producto
+    
+    @staticmethod
+    async def eliminar_producto(db: AsyncSession, producto_id: int) -> bool:
+        """Elimina un producto"""
+        producto = await ProductoRepositoryAsync.obtener_por_id(db, producto_id)
+        if not producto:
+            return False
+        
+        await db.delete(producto)
+        await db.commit()
+        cache_productos.invalidar()
+        return True
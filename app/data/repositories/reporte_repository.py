@@ -0,0 +1,183 @@
+from collections import defaultdict
+from datetime import date, datetime
+from sqlalchemy import Date, cast, delete, func, insert, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from typing import Iterable, List, Tuple
+from app.data.sources.particiones import sumar_meses
+from app.domain.models.models import Orden, DetalleOrden, ParticionArchivada, Producto, VentaDiaria, VentaProductoDiaria, VentaHora
+
+class ReporteRepository:
+    """
+    Acceso a las tablas de resumen de ventas (por día, por producto y día, por hora).
+
+    Las ventas las actualizan con upserts incrementales dentro de su propia
+    transacción, así un reporte cuesta O(días del rango) y no O(órdenes).
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def sentencias_acumular(
+        fecha: datetime,
+        total: float,
+        detalles: Iterable[Tuple[int, int, float]],
+        signo: int = 1
+    ) -> list:
+        """
+        Upserts que suman (signo=1) o restan (signo=-1) una orden a los
+        resúmenes. `detalles` son tuplas (producto_id, cantidad, subtotal).
+        Devuelve las sentencias para que las ejecute una sesión sync o async.
+        """
+        return ReporteRepository.sentencias_acumular_lote([(fecha, total, detalles)], signo)
+
+    @staticmethod
+    def sentencias_acumular_lote(
+        ordenes: Iterable[Tuple[datetime, float, Iterable[Tuple[int, int, float]]]],
+        signo: int = 1
+    ) -> list:
+        """
+        Igual que `sentencias_acumular` para varias órdenes (fecha, total, detalles):
+        se agregan en memoria y cada resumen recibe un solo upsert multi-fila.
+        """
+        # ON CONFLICT no admite dos filas con la misma clave en un mismo
+        # INSERT, así que todo se agrupa por clave antes del upsert
+        por_dia = defaultdict(lambda: [0, 0.0])
+        por_hora = defaultdict(lambda: [0, 0.0])
+        por_producto = defaultdict(lambda: [0, 0.0])
+        for fecha, total, detalles in ordenes:
+            dia = fecha.date()
+            for grupo in (por_dia[dia], por_hora[fecha.replace(minute=0, second=0, microsecond=0)]):
+                grupo[0] += 1
+                grupo[1] += total
+            for producto_id, cantidad, subtotal in detalles:
+                # Como en reconstruir: un detalle sin producto no tiene fila de resumen
+                if producto_id is None:
+                    continue
+                grupo = por_producto[(dia, producto_id)]
+                grupo[0] += cantidad
+                grupo[1] += subtotal
+
+        # Las filas van ordenadas por clave: así toda transacción bloquea las
+        # filas de resumen en el mismo orden y dos lotes no se interbloquean
+        sentencias = []
+        for tabla, columna, grupos in ((VentaDiaria, "fecha", por_dia), (VentaHora, "hora", por_hora)):
+            if not grupos:
+                continue
+            upsert = pg_insert(tabla).values([
+                {columna: clave, "num_ordenes": signo * num_ordenes, "total_venta": signo * total}
+                for clave, (num_ordenes, total) in sorted(grupos.items())
+            ])
+            sentencias.append(upsert.on_conflict_do_update(
+                index_elements=[columna],
+                set_={
+                    "num_ordenes": tabla.num_ordenes + upsert.excluded.num_ordenes,
+                    "total_venta": tabla.total_venta + upsert.excluded.total_venta,
+                }
+            ))
+
+        if por_producto:
+            upsert = pg_insert(VentaProductoDiaria).values([
+                {"fecha": dia, "producto_id": pid, "unidades": signo * unidades, "ingreso": signo * ingreso}
+                for (dia, pid), (unidades, ingreso) in sorted(por_producto.items())
+            ])
+            sentencias.append(upsert.on_conflict_do_update(
+                index_elements=["fecha", "producto_id"],
+                set_={
+                    "unidades": VentaProductoDiaria.unidades + upsert.excluded.unidades,
+                    "ingreso": VentaProductoDiaria.ingreso + upsert.excluded.ingreso,
+                }
+            ))
+        return sentencias
+
+    def acumular(self, fecha: datetime, total: float, detalles: Iterable[Tuple[int, int, float]], signo: int = 1) -> None:
+        """Aplica una orden a los resúmenes, sin hacer commit (va en la transacción de la venta)"""
+        self.acumular_lote([(fecha, total, detalles)], signo)
+
+    def acumular_lote(self, ordenes: Iterable[Tuple[datetime, float, Iterable[Tuple[int, int, float]]]], signo: int = 1) -> None:
+        """Aplica varias órdenes a los resúmenes, sin hacer commit"""
+        for sentencia in self.sentencias_acumular_lote(ordenes, signo):
+            self.db.execute(sentencia)
+
+    def ventas_por_dia(self, desde: date, hasta: date) -> List[VentaDiaria]:
+        return (
+            self.db.query(VentaDiaria)
+            .filter(VentaDiaria.fecha >= desde, VentaDiaria.fecha <= hasta)
+            .order_by(VentaDiaria.fecha)
+            .all()
+        )
+
+    def ventas_por_producto(self, desde: date, hasta: date) -> list:
+        """(producto_id, nombre, unidades, ingreso) sumando los días del rango"""
+        return (
+            self.db.query(
+                VentaProductoDiaria.producto_id,
+                Producto.nombre,
+                func.sum(VentaProductoDiaria.unidades),
+                func.sum(VentaProductoDiaria.ingreso)
+            )
+            .outerjoin(Producto, Producto.id == VentaProductoDiaria.producto_id)
+            .filter(VentaProductoDiaria.fecha >= desde, VentaProductoDiaria.fecha <= hasta)
+            .group_by(VentaProductoDiaria.producto_id, Producto.nombre)
+            .order_by(func.sum(VentaProductoDiaria.ingreso).desc())
+            .all()
+        )
+
+    def ventas_por_hora(self, desde: datetime, hasta: datetime) -> List[VentaHora]:
+        return (
+            self.db.query(VentaHora)
+            .filter(VentaHora.hora >= desde, VentaHora.hora < hasta)
+            .order_by(VentaHora.hora)
+            .all()
+        )
+
+    def reconstruir(self) -> None:
+        """
+        Recalcula los resúmenes desde ordenes/detalles_orden (para backfills).
+        Los meses ya archivados (tabla particiones_archivadas) no están en
+        ordenes: sus resúmenes se conservan y se recalcula desde el mes
+        siguiente al último archivado.
+
+        Bloquea los resúmenes mientras tanto: las ventas que lleguen esperan y
+        suman su parte sobre el resultado recalculado, sin contarse dos veces.
+        """
+        try:
+            self.db.execute(text(
+                "LOCK TABLE ventas_diarias, ventas_producto_diarias, ventas_por_hora IN EXCLUSIVE MODE"
+            ))
+            ultimo_archivado = self.db.execute(select(func.max(ParticionArchivada.mes))).scalar()
+            desde = date.min
+            if ultimo_archivado is not None:
+                desde = sumar_meses(ultimo_archivado, 1)
+            inicio = datetime.combine(desde, datetime.min.time())
+            self.db.execute(delete(VentaDiaria).where(VentaDiaria.fecha >= desde))
+            self.db.execute(delete(VentaProductoDiaria).where(VentaProductoDiaria.fecha >= desde))
+            self.db.execute(delete(VentaHora).where(VentaHora.hora >= inicio))
+
+            dia = cast(Orden.fecha, Date)
+            self.db.execute(insert(VentaDiaria).from_select(
+                ["fecha", "num_ordenes", "total_venta"],
+                select(dia, func.count(), func.sum(Orden.total_venta))
+                .where(Orden.fecha >= inicio)
+                .group_by(dia)
+            ))
+            hora = func.date_trunc("hour", Orden.fecha)
+            self.db.execute(insert(VentaHora).from_select(
+                ["hora", "num_ordenes", "total_venta"],
+                select(hora, func.count(), func.sum(Orden.total_venta))
+                .where(Orden.fecha >= inicio)
+                .group_by(hora)
+            ))
+            # Los detalles llevan la fecha de su orden: no hace falta unirlos a ordenes
+            dia_detalle = cast(DetalleOrden.fecha_orden, Date)
+            self.db.execute(insert(VentaProductoDiaria).from_select(
+                ["fecha", "producto_id", "unidades", "ingreso"],
+                select(dia_detalle, DetalleOrden.producto_id, func.sum(DetalleOrden.cantidad), func.sum(DetalleOrden.subtotal))
+                .where(DetalleOrden.fecha_orden >= inicio, DetalleOrden.producto_id.isnot(None))
+                .group_by(dia_detalle, DetalleOrden.producto_id)
+            ))
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
@@ -0,0 +1,30 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.domain.models.models import Usuario
+from typing import Optional
+
+class UsuarioRepositoryAsync:
+    """Versión asíncrona (asyncpg) de UsuarioRepository"""
+    
+    @staticmethod
+    async def crear_usuario(db: AsyncSession, email: str, nombre: str, password_hash: str) -> Usuario:
+        """Crea un nuevo usuario en la base de datos"""
+        usuario = Usuario(
+            email=email,
+            nombre=nombre,
+            password_hash=password_hash
+        )
+        db.add(usuario)
+        await db.commit()
+        return usuario
+    
+    @staticmethod
+    async def obtener_por_email(db: AsyncSession, email: str) -> Optional[Usuario]:
+        """Busca un usuario por su email"""
+        resultado = await db.execute(select(Usuario).where(Usuario.email == email).limit(1))
+        return resultado.scalars().first()
+    
+    @staticmethod
+    async def obtener_por_id(db: AsyncSession, usuario_id: int) -> Optional[Usuario]:
+        """Busca un usuario por su ID"""
+        return await db.get(Usuario, usuario_id)
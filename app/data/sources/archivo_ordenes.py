@@ -0,0 +1,142 @@
+import bisect
+import gzip
+import hashlib
+import os
+import threading
+from datetime import date, datetime
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import orjson
+
+# Directorio local de los meses archivados (python -m app.comandos archivar)
+ARCHIVO_DIR = os.getenv("ARCHIVO_DIR", "archivo")
+# Órdenes por bloque: cada bloque es un miembro gzip independiente y buscar un
+# folio solo descomprime el suyo
+ARCHIVO_BLOQUE = int(os.getenv("ARCHIVO_BLOQUE", "1000"))
+
+
+def nombre_archivo(mes: date) -> str:
+    return f"ordenes_{mes.year:04d}_{mes.month:02d}.ndjson.gz"
+
+
+def escribir_mes(mes: date, ordenes: Iterable[dict], directorio: str = ARCHIVO_DIR) -> dict:
+    """
+    Escribe las órdenes de un mes (ordenadas por folio, con la forma de
+    OrdenResponse) en `ordenes_AAAA_MM.ndjson.gz`, una por línea, y su
+    manifiesto `ordenes_AAAA_MM.json`. El archivo se lee completo con `zcat`;
+    el manifiesto guarda el rango de folios y la posición de cada bloque.
+
+    Ambos se escriben en un temporal y se renombran: un mes a medio escribir
+    nunca queda visible. Devuelve el manifiesto.
+    """
+    carpeta = Path(directorio)
+    carpeta.mkdir(parents=True, exist_ok=True)
+    archivo = carpeta / nombre_archivo(mes)
+    temporal = archivo.with_name(archivo.name + ".tmp")
+    resumen = hashlib.sha256()
+    bloques: List[list] = []
+    total_ordenes = total_detalles = 0
+    pendientes: List[bytes] = []
+    posicion = 0
+
+    with open(temporal, "wb") as salida:
+        def vaciar(primero: int, ultimo: int) -> None:
+            nonlocal posicion
+            datos = gzip.compress(b"".join(pendientes))
+            salida.write(datos)
+            resumen.update(datos)
+            bloques.append([primero, ultimo, posicion, len(datos)])
+            posicion += len(datos)
+            pendientes.clear()
+
+        primero = ultimo = None
+        for orden in ordenes:
+            if ultimo is not None and orden["id"] <= ultimo:
+                raise ValueError("Las órdenes deben venir ordenadas por folio")
+            primero = orden["id"] if primero is None else primero
+            ultimo = orden["id"]
+            pendientes.append(orjson.dumps(orden) + b"\n")
+            total_ordenes += 1
+            total_detalles += len(orden["detalles"])
+            if len(pendientes) >= ARCHIVO_BLOQUE:
+                vaciar(primero, ultimo)
+                primero = None
+        if pendientes:
+            vaciar(primero, ultimo)
+        elif not bloques:
+            # Mes sin órdenes: un gzip vacío pero válido para zcat
+            datos = gzip.compress(b"")
+            salida.write(datos)
+            resumen.update(datos)
+        salida.flush()
+        os.fsync(salida.fileno())
+
+    manifiesto = {
+        "mes": mes.isoformat(),
+        "archivo": archivo.name,
+        "ordenes": total_ordenes,
+        "detalles": total_detalles,
+        "folio_min": bloques[0][0] if bloques else None,
+        "folio_max": bloques[-1][1] if bloques else None,
+        "sha256": resumen.hexdigest(),
+        "creado": datetime.now().isoformat(timespec="seconds"),
+        "bloques": bloques,   # [primer folio, último folio, posición, bytes]
+    }
+    os.replace(temporal, archivo)
+    ruta_manifiesto = carpeta / archivo.name.replace(".ndjson.gz", ".json")
+    temporal = ruta_manifiesto.with_name(ruta_manifiesto.name + ".tmp")
+    temporal.write_bytes(orjson.dumps(manifiesto, option=orjson.OPT_INDENT_2))
+    os.replace(temporal, ruta_manifiesto)
+    return manifiesto
+
+
+class ArchivoOrdenes:
+    """
+    Búsqueda de folios en los meses archivados. Los manifiestos se leen una
+    vez y se vuelven a leer solo cuando cambia el directorio (un mes nuevo).
+    """
+
+    def __init__(self, directorio: str = ARCHIVO_DIR):
+        self.directorio = Path(directorio)
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._manifiestos: List[dict] = []
+
+    def _cargar(self) -> List[dict]:
+        try:
+            version = self.directorio.stat().st_mtime_ns
+        except FileNotFoundError:
+            return []
+        with self._lock:
+            if version != self._version:
+                manifiestos = []
+                for ruta in sorted(self.directorio.glob("ordenes_*.json")):
+                    manifiesto = orjson.loads(ruta.read_bytes())
+                    if manifiesto["bloques"]:
+                        manifiesto["_inicios"] = [b[0] for b in manifiesto["bloques"]]
+                        manifiestos.append(manifiesto)
+                self._manifiestos, self._version = manifiestos, version
+            return self._manifiestos
+
+    def buscar(self, orden_id: int) -> Optional[dict]:
+        """La orden archivada con ese folio (forma de OrdenResponse) o None"""
+        for manifiesto in self._cargar():
+            if not manifiesto["folio_min"] <= orden_id <= manifiesto["folio_max"]:
+                continue
+            indice = bisect.bisect_right(manifiesto["_inicios"], orden_id) - 1
+            primero, ultimo, posicion, longitud = manifiesto["bloques"][indice]
+            if orden_id > ultimo:
+                continue
+            with open(self.directorio / manifiesto["archivo"], "rb") as archivo:
+                archivo.seek(posicion)
+                bloque = gzip.decompress(archivo.read(longitud))
+            for linea in bloque.splitlines():
+                orden = orjson.loads(linea)
+                if orden["id"] == orden_id:
+                    return orden
+        return None
+
+
+# Instancia compartida por el proceso
+archivo_ordenes = ArchivoOrdenes()
@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.data.sources.replica import DB_REPLICA_LAG_MAX
+from app.domain.models.models import Producto
+
+# Segundos que vive el contenido de la caché. Las escrituras de este worker la
+# invalidan al momento; el TTL acota cuánto tarda en enterarse otro worker.
+PRODUCTO_CACHE_TTL = float(os.getenv("PRODUCTO_CACHE_TTL", "30"))
+
+class CacheProductos:
+    """
+    Caché en memoria del catálogo de productos (id → nombre, precio) y de su
+    versión ya serializada a JSON con su ETag, para /menu y GET /productos/.
+
+    Cada invalidación sube la versión; una lectura que fue a la BD solo guarda
+    lo que trajo si la versión no cambió mientras tanto, así una consulta lenta
+    no puede volver a meter un precio viejo después de un `invalidar()`.
+
+    El catálogo también puede leerse de la réplica (sesión con
+    `info["replica"]`): esa foto no llena la caché de precios que usan las
+    ventas, y no se guarda si hubo una invalidación hace menos de
+    `DB_REPLICA_LAG_MAX` segundos, porque la réplica podría no tenerla aún.
+    """
+
+    def __init__(self, ttl: float = PRODUCTO_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._productos: Dict[int, Tuple[str, float]] = {}
+        self._version = 0
+        self._invalidado = float("-inf")
+        self._expira = 0.0
+        self._catalogo: Optional[Tuple[str, bytes]] = None
+        self._catalogo_expira = 0.0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def invalidar(self) -> None:
+        """Descarta el contenido; se llama después de cualquier escritura en productos"""
+        with self._lock:
+            self._version += 1
+            self._invalidado = time.monotonic()
+            self._productos = {}
+            self._expira = 0.0
+            self._catalogo = None
+
+    def obtener_precios(self, db: Session, producto_ids: Iterable[int]) -> Dict[int, float]:
+        """
+        Devuelve {producto_id: precio} para los IDs que existen.
+        Los que no están en caché se resuelven en una sola consulta `IN (...)`.
+        """
+        precios, faltantes, lectura = self._leer(producto_ids)
+        if faltantes:
+            filas = db.execute(self._consulta_faltantes(faltantes)).all()
+            self._guardar(filas, lectura, precios)
+        return precios
+
+    async def obtener_precios_async(self, db: AsyncSession, producto_ids: Iterable[int]) -> Dict[int, float]:
+        """Igual que `obtener_precios`, con una sesión asíncrona"""
+        precios, faltantes, lectura = self._leer(producto_ids)
+        if faltantes:
+            filas = (await db.execute(self._consulta_faltantes(faltantes))).all()
+            self._guardar(filas, lectura, precios)
+        return precios
+
+    def _leer(self, producto_ids: Iterable[int]):
+        ids = set(producto_ids)
+        with self._lock:
+            if time.monotonic() >= self._expira:
+                self._productos = {}
+                self._expira = time.monotonic() + self.ttl
+            productos = self._productos
+            version = self._version
+
+        precios = {pid: productos[pid][1] for pid in ids if pid in productos}
+        return precios, ids - precios.keys(), (productos, version)
+
+    @staticmethod
+    def _consulta_faltantes(faltantes):
+        return select(Producto.id, Producto.nombre, Producto.precio).where(Producto.id.in_(faltantes))
+
+    def _guardar(self, filas, lectura, precios: Dict[int, float]) -> None:
+        productos, version = lectura
+        with self._lock:
+            if self._version == version and self._productos is productos:
+                for pid, nombre, precio in filas:
+                    productos[pid] = (nombre, precio)
+        precios.update({pid: precio for pid, _, precio in filas})
+
+    def catalogo_vigente(self) -> Optional[Tuple[str, bytes]]:
+        """(etag, json) del catálogo si hay una foto vigente; nunca toca la BD"""
+        with self._lock:
+            if self._catalogo is not None and time.monotonic() < self._catalogo_expira:
+                return self._catalogo
+        return None
+
+    def obtener_catalogo(self, db: Session) -> Tuple[str, bytes]:
+        """(etag, json) del catálogo completo; consulta la BD solo si no hay foto vigente"""
+        vigente = self.catalogo_vigente()
+        if vigente is not None:
+            return vigente
+        version = self._version
+        return self._guardar_catalogo(db.execute(self._consulta_catalogo()).all(), version, db.info.get("replica", False))
+
+    async def obtener_catalogo_async(self, db: AsyncSession) -> Tuple[str, bytes]:
+        """Igual que `obtener_catalogo`, con una sesión asíncrona"""
+        vigente = self.catalogo_vigente()
+        if vigente is not None:
+            return vigente
+        version = self._version
+        return self._guardar_catalogo((await db.execute(self._consulta_catalogo())).all(), version, db.info.get("replica", False))
+
+    @staticmethod
+    def _consulta_catalogo():
+        return select(Producto.id, Producto.nombre, Producto.precio).order_by(Producto.id)
+
+    def _guardar_catalogo(self, filas, version: int, de_replica: bool = False) -> Tuple[str, bytes]:
+        cuerpo = json.dumps(
+            [{"id": pid, "nombre": nombre, "precio": precio} for pid, nombre, precio in filas],
+            ensure_ascii=False,
+            separators=(",", ":")
+        ).encode("utf-8")
+        # ETag fuerte derivado del contenido: todos los workers generan el mismo
+        etag = '"%s"' % hashlib.sha256(cuerpo).hexdigest()[:32]
+        with self._lock:
+            ahora = time.monotonic()
+            if self._version == version and not (de_replica and ahora - self._invalidado < DB_REPLICA_LAG_MAX):
+                self._catalogo = (etag, cuerpo)
+                self._catalogo_expira = ahora + self.ttl
+                if not de_replica:
+                    # Ya tenemos el catálogo entero: de paso llenamos la caché de precios
+                    self._productos = {pid: (nombre, precio) for pid, nombre, precio in filas}
+                    self._expira = ahora + self.ttl
+        return etag, cuerpo
+
+
+# Instancia compartida por el proceso
+cache_productos = CacheProductos()
@@ -0,0 +1,191 @@
+import logging
+import os
+import queue
+import select as sondeo
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterable, List, Optional, Tuple
+
+import psycopg2
+from sqlalchemy import func, select
+
+from app.data.sources.database import SQLALCHEMY_DATABASE_URL
+
+# Con COCINA_NOTIFY las ventas y cancelaciones se avisan con NOTIFY dentro de
+# su transacción (llegan a todos los workers al hacer commit). Sin él solo se
+# entera el worker que hizo la escritura, por el bus en proceso: suficiente
+# con un solo worker.
+COCINA_NOTIFY = os.getenv("COCINA_NOTIFY", "true").lower() in ("1", "true", "yes")
+CANAL_ORDENES = "ordenes_cocina"
+
+# Un NOTIFY admite hasta 8000 bytes: los lotes se avisan en trozos
+IDS_POR_NOTIFICACION = 500
+# Eventos recientes recordados para descartar el que llega dos veces (bus local y NOTIFY)
+EVENTOS_RECORDADOS = 10000
+# Cuántos eventos encolados se entregan juntos al consumidor
+EVENTOS_POR_ENTREGA = 1000
+
+Evento = Tuple[str, int]   # ("nueva" | "cancelada", folio)
+
+logger = logging.getLogger(__name__)
+
+_CONEXION = object()
+
+
+def texto_evento(tipo: str, ids: Iterable[int]) -> str:
+    return f"{tipo}:{','.join(map(str, ids))}"
+
+
+def leer_evento(texto: str) -> List[Evento]:
+    """Eventos de un payload `tipo:id,id,...`; lista vacía si no tiene esa forma"""
+    tipo, _, ids = texto.partition(":")
+    try:
+        return [(tipo, int(i)) for i in ids.split(",") if i]
+    except ValueError:
+        return []
+
+
+def sentencias_notificar(tipo: str, ids: Iterable[int]) -> list:
+    """
+    SELECT pg_notify(...) para ejecutar dentro de la transacción que escribe:
+    Postgres solo entrega el aviso si hace commit. Vacía sin COCINA_NOTIFY.
+    """
+    if not COCINA_NOTIFY:
+        return []
+    ids = list(ids)
+    return [
+        select(func.pg_notify(CANAL_ORDENES, texto_evento(tipo, ids[i:i + IDS_POR_NOTIFICACION])))
+        for i in range(0, len(ids), IDS_POR_NOTIFICACION)
+    ]
+
+
+class BusOrdenes:
+    """
+    Eventos de órdenes confirmadas (nuevas y canceladas) de este worker y,
+    con COCINA_NOTIFY, de todos los demás, entregados en orden a un solo
+    consumidor (ver cocina_service) desde un hilo propio.
+
+    Los hilos arrancan con el primer `escuchar()`; antes, `publicar()` no hace
+    nada. Hay una sola conexión LISTEN por worker, fuera del pool, que se
+    reconecta sola; cada vez que queda escuchando se avisa con `al_conectar`,
+    para que el consumidor recupere lo que se perdió durante el corte.
+    """
+
+    def __init__(self):
+        self._entrada: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        self._hilos: List[threading.Thread] = []
+        self._consumidor: Optional[Callable[[List[Evento]], None]] = None
+        self._al_conectar: Optional[Callable[[], None]] = None
+        self._recientes: "OrderedDict[Evento, None]" = OrderedDict()
+        self.escuchando_postgres = False
+
+    def publicar(self, tipo: str, ids: Iterable[int]) -> None:
+        """Eventos ya confirmados por este worker; se llama después del commit"""
+        if self._consumidor is None:
+            return
+        eventos = [(tipo, i) for i in ids]
+        if eventos:
+            self._entrada.put(eventos)
+
+    def escuchar(self, consumidor: Callable[[List[Evento]], None], al_conectar: Optional[Callable[[], None]] = None) -> None:
+        """Registra el consumidor y arranca los hilos; las llamadas siguientes no hacen nada"""
+        with self._lock:
+            if self._consumidor is not None:
+                return
+            self._consumidor, self._al_conectar = consumidor, al_conectar
+            self._detener.clear()
+            self._hilos = [threading.Thread(target=self._despachar, name="bus-ordenes", daemon=True)]
+            if COCINA_NOTIFY:
+                self._hilos.append(threading.Thread(target=self._escuchar_postgres, name="listen-ordenes", daemon=True))
+            for hilo in self._hilos:
+                hilo.start()
+
+    def detener(self) -> None:
+        with self._lock:
+            if self._consumidor is None:
+                return
+            self._detener.set()
+            self._entrada.put(None)
+            for hilo in self._hilos:
+                hilo.join(timeout=5)
+            self._hilos = []
+            self._consumidor = self._al_conectar = None
+
+    def _es_nuevo(self, evento: Evento) -> bool:
+        if evento in self._recientes:
+            return False
+        self._recientes[evento] = None
+        if len(self._recientes) > EVENTOS_RECORDADOS:
+            self._recientes.popitem(last=False)
+        return True
+
+    def _entregar(self, eventos: List[Evento]) -> None:
+        nuevos = [e for e in eventos if self._es_nuevo(e)]
+        if nuevos:
+            try:
+                self._consumidor(nuevos)
+            except Exception:
+                logger.exception("Error entregando eventos de órdenes")
+
+    def _despachar(self) -> None:
+        while True:
+            elementos = [self._entrada.get()]
+            while len(elementos) < EVENTOS_POR_ENTREGA:
+                try:
+                    elementos.append(self._entrada.get_nowait())
+                except queue.Empty:
+                    break
+            eventos: List[Evento] = []
+            for elemento in elementos:
+                if elemento is None:
+                    self._entregar(eventos)
+                    return
+                if elemento is _CONEXION:
+                    self._entregar(eventos)
+                    eventos = []
+                    if self._al_conectar is not None:
+                        try:
+                            self._al_conectar()
+                        except Exception:
+                            logger.exception("Error recuperando eventos tras conectar")
+                else:
+                    eventos.extend(elemento)
+            self._entregar(eventos)
+
+    def _escuchar_postgres(self) -> None:
+        espera, hubo_corte = 1.0, False
+        while not self._detener.is_set():
+            conexion = None
+            try:
+                conexion = psycopg2.connect(SQLALCHEMY_DATABASE_URL)
+                conexion.autocommit = True
+                conexion.cursor().execute(f"LISTEN {CANAL_ORDENES}")
+                self.escuchando_postgres = True
+                if hubo_corte:
+                    logger.info("LISTEN %s reconectado", CANAL_ORDENES)
+                self._entrada.put(_CONEXION)
+                espera = 1.0
+                while not self._detener.is_set():
+                    if sondeo.select([conexion], [], [], 1.0)[0]:
+                        conexion.poll()
+                        for aviso in conexion.notifies:
+                            self._entrada.put(leer_evento(aviso.payload))
+                        conexion.notifies.clear()
+            except Exception as e:
+                hubo_corte = True
+                logger.warning("LISTEN %s sin conexión (%r); reintento en %.0fs", CANAL_ORDENES, e, espera)
+            finally:
+                self.escuchando_postgres = False
+                if conexion is not None:
+                    try:
+                        conexion.close()
+                    except Exception:
+                        pass
+            self._detener.wait(espera)
+            espera = min(espera * 2, 30.0)
+
+
+# Instancia compartida por el proceso
+bus_ordenes = BusOrdenes()
@@ -0,0 +1,129 @@
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Instrumentación opcional de SQL por petición (SQL_INSTRUMENTAR=true)
+SQL_INSTRUMENTAR = os.getenv("SQL_INSTRUMENTAR", "false").lower() in ("1", "true", "yes")
+# Sentencias que tarden más que esto (ms) se registran en el log
+SQL_LENTA_MS = float(os.getenv("SQL_LENTA_MS", "200"))
+# Veces que una misma forma de sentencia puede repetirse en una petición antes
+# de marcarla como probable N+1 (p. ej. un SELECT de producto por cada detalle)
+SQL_N_MAS_1_UMBRAL = int(os.getenv("SQL_N_MAS_1_UMBRAL", "5"))
+
+logger = logging.getLogger(__name__)
+
+_NUMEROS = re.compile(r"\d+")
+_ESPACIOS = re.compile(r"\s+")
+
+
+def forma_sentencia(sql: str) -> str:
+    """
+    Sentencia sin números ni espacios repetidos: las que solo cambian de id
+    literal o de número de parámetros (IN, VALUES multi-fila) comparten forma.
+    """
+    return _ESPACIOS.sub(" ", _NUMEROS.sub("?", sql)).strip()
+
+
+class RegistroPeticion:
+    """Sentencias ejecutadas durante una petición"""
+
+    __slots__ = ("sentencias", "tiempo", "formas")
+
+    def __init__(self):
+        self.sentencias = 0
+        self.tiempo = 0.0
+        self.formas = Counter()
+
+    def anotar(self, sql: str, segundos: float) -> None:
+        self.sentencias += 1
+        self.tiempo += segundos
+        self.formas[forma_sentencia(sql)] += 1
+
+    def repetidas(self) -> Dict[str, int]:
+        """Formas que alcanzan el umbral de N+1, con sus repeticiones"""
+        return {forma: n for forma, n in self.formas.items() if n >= SQL_N_MAS_1_UMBRAL}
+
+
+# Registro de la petición en curso. Starlette copia el contexto al thread pool,
+# así que los handlers síncronos anotan en el mismo objeto que el middleware.
+registro_actual: ContextVar[Optional[RegistroPeticion]] = ContextVar("registro_sql", default=None)
+
+
+class EstadisticasRutas:
+    """Acumulado por ruta (método + plantilla) de sentencias y tiempo de BD"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rutas: Dict[str, dict] = {}
+
+    def registrar(self, ruta: str, registro: RegistroPeticion) -> None:
+        repetidas = registro.repetidas()
+        with self._lock:
+            datos = self._rutas.get(ruta)
+            if datos is None:
+                datos = self._rutas[ruta] = {
+                    "peticiones": 0, "sentencias": 0, "sentencias_max": 0,
+                    "tiempo_sql": 0.0, "tiempo_sql_max": 0.0,
+                    "peticiones_n_mas_1": 0, "formas_n_mas_1": Counter(),
+                }
+            datos["peticiones"] += 1
+            datos["sentencias"] += registro.sentencias
+            datos["sentencias_max"] = max(datos["sentencias_max"], registro.sentencias)
+            datos["tiempo_sql"] += registro.tiempo
+            datos["tiempo_sql_max"] = max(datos["tiempo_sql_max"], registro.tiempo)
+            if repetidas:
+                datos["peticiones_n_mas_1"] += 1
+                datos["formas_n_mas_1"].update(repetidas.keys())
+
+    def resumen(self) -> Dict[str, dict]:
+        with self._lock:
+            return {
+                ruta: {
+                    "peticiones": d["peticiones"],
+                    "sentencias_promedio": round(d["sentencias"] / d["peticiones"], 2),
+                    "sentencias_max": d["sentencias_max"],
+                    "tiempo_sql_promedio_ms": round(d["tiempo_sql"] / d["peticiones"] * 1000, 3),
+                    "tiempo_sql_max_ms": round(d["tiempo_sql_max"] * 1000, 3),
+                    "peticiones_n_mas_1": d["peticiones_n_mas_1"],
+                    # Las 3 formas que más veces dispararon el detector en esta ruta
+                    "formas_n_mas_1": [forma for forma, _ in d["formas_n_mas_1"].most_common(3)],
+                }
+                for ruta, d in sorted(self._rutas.items())
+            }
+
+    def reiniciar(self) -> None:
+        with self._lock:
+            self._rutas.clear()
+
+
+# Instancia compartida por el proceso
+estadisticas_sql = EstadisticasRutas()
+
+
+# El inicio se guarda en el contexto de ejecución de cada sentencia: si falla,
+# no queda nada pendiente en la conexión
+def _antes(conn, cursor, statement, parameters, context, executemany):
+    context._inicio_sql = time.perf_counter()
+
+
+def _despues(conn, cursor, statement, parameters, context, executemany):
+    segundos = time.perf_counter() - context._inicio_sql
+    registro = registro_actual.get()
+    if registro is not None:
+        registro.anotar(statement, segundos)
+    if segundos * 1000 >= SQL_LENTA_MS:
+        logger.warning("Sentencia lenta (%.1f ms): %s", segundos * 1000, _ESPACIOS.sub(" ", statement)[:500])
+
+
+def instrumentar(engine: Engine) -> None:
+    """Cuenta y cronometra las sentencias de `engine` (para un AsyncEngine, pasar su .sync_engine)"""
+    if not event.contains(engine, "before_cursor_execute", _antes):
+        event.listen(engine, "before_cursor_execute", _antes)
+        event.listen(engine, "after_cursor_execute", _despues)
@@ -0,0 +1,207 @@
+import hashlib
+import mmap
+import os
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import List, Sequence, Tuple
+
+# Directorio compartido por los workers de uvicorn/gunicorn. Cada worker escribe
+# sus contadores en su propio archivo y /metrics suma los de todos. Sin él, cada
+# worker solo reporta lo suyo (suficiente con un solo worker). Hay que vaciarlo
+# al arrancar el servidor.
+METRICAS_DIR = os.getenv("METRICAS_DIR", "")
+
+# Límites (segundos) de los buckets del histograma de latencia
+LIMITES_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Códigos con serie propia; el resto se cuenta como "otro"
+CODIGOS = (200, 201, 204, 304, 400, 401, 403, 404, 409, 422, 429, 500, 503)
+
+_INDICE_CODIGO = {codigo: i for i, codigo in enumerate(CODIGOS)}
+_POR_RUTA = len(CODIGOS) + 1 + len(LIMITES_LATENCIA) + 1 + 1   # códigos + otro, buckets + Inf, suma
+
+# Estadísticas de cada pool: (nombre, tipo, descripción); las counter son acumuladas
+CAMPOS_POOL = (
+    ("en_uso", "gauge", "Conexiones del pool en uso"),
+    ("libres", "gauge", "Conexiones del pool abiertas y libres"),
+    ("overflow", "gauge", "Conexiones abiertas por encima de DB_POOL_SIZE"),
+    ("esperando", "gauge", "Peticiones esperando una conexión"),
+    ("checkouts", "counter", "Conexiones entregadas por el pool"),
+    ("timeouts", "counter", "Esperas por conexión que agotaron DB_POOL_TIMEOUT"),
+    ("espera_segundos", "counter", "Tiempo total esperando conexión"),
+)
+MOTORES = ("sync", "async", "lectura", "lectura_async")
+
+
+class RegistroMetricas:
+    """
+    Contadores de las peticiones HTTP en un arreglo de doubles con posiciones
+    fijas, calculadas una vez a partir de las rutas de la app: registrar una
+    petición solo suma en índices ya conocidos, sin crear diccionarios de
+    etiquetas ni objetos por petición.
+
+    El arreglo vive en un mmap (archivo del worker en METRICAS_DIR o memoria
+    anónima), y el nombre del archivo incluye una huella de la disposición
+    para no sumar archivos de un despliegue con otras rutas.
+    """
+
+    def __init__(self, rutas: Sequence[Tuple[str, str]], directorio: str = METRICAS_DIR):
+        # rutas: (método, plantilla); la última posición es para peticiones sin ruta
+        self.rutas = list(rutas) + [("", "(sin ruta)")]
+        self.directorio = Path(directorio) if directorio else None
+        self.huella = hashlib.sha1(repr(self.rutas).encode("utf-8")).hexdigest()[:12]
+        self._i_en_curso = len(self.rutas) * _POR_RUTA
+        self._i_pool = self._i_en_curso + 1
+        self.tamano = self._i_pool + len(MOTORES) * len(CAMPOS_POOL)
+        self._abrir()
+        # Tras un fork (gunicorn --preload) cada hijo necesita su propio archivo
+        os.register_at_fork(after_in_child=self._abrir)
+
+    def _abrir(self) -> None:
+        self.pid = os.getpid()
+        if self.directorio is None:
+            self._mmap = mmap.mmap(-1, self.tamano * 8)
+        else:
+            self.directorio.mkdir(parents=True, exist_ok=True)
+            fd = os.open(self._archivo(self.pid), os.O_CREAT | os.O_RDWR, 0o644)
+            try:
+                os.ftruncate(fd, self.tamano * 8)
+                self._mmap = mmap.mmap(fd, self.tamano * 8)
+            finally:
+                os.close(fd)
+        self.valores = memoryview(self._mmap).cast("d")
+
+    def _archivo(self, pid: int) -> Path:
+        return self.directorio / f"{self.huella}_{pid}.bin"
+
+    def base_ruta(self, indice_ruta: int) -> int:
+        return indice_ruta * _POR_RUTA
+
+    @property
+    def base_sin_ruta(self) -> int:
+        return self.base_ruta(len(self.rutas) - 1)
+
+    # --- escritura (solo desde el event loop del worker) ---
+
+    def iniciar(self) -> None:
+        self.valores[self._i_en_curso] += 1
+
+    def terminar(self, base: int, codigo: int, segundos: float) -> None:
+        v = self.valores
+        v[self._i_en_curso] -= 1
+        v[base + _INDICE_CODIGO.get(codigo, len(CODIGOS))] += 1
+        v[base + len(CODIGOS) + 1 + bisect_left(LIMITES_LATENCIA, segundos)] += 1
+        v[base + _POR_RUTA - 1] += segundos
+
+    def actualizar_pool(self, motor: int, pool) -> None:
+        """Copia el estado del pool del worker (mismo orden que CAMPOS_POOL)"""
+        v = self.valores
+        base = self._i_pool + motor * len(CAMPOS_POOL)
+        v[base] = pool.checkedout()
+        v[base + 1] = pool.checkedin()
+        # SQLAlchemy cuenta el overflow en negativo mientras el pool no se ha llenado
+        v[base + 2] = max(pool.overflow(), 0)
+        estadisticas = getattr(pool, "estadisticas", None)
+        if estadisticas is not None:
+            v[base + 3] = estadisticas.esperando
+            v[base + 4] = estadisticas.checkouts
+            v[base + 5] = estadisticas.timeouts
+            v[base + 6] = estadisticas.espera_total
+
+    def limpiar_gauges(self) -> None:
+        """Al apagar el worker: sus gauges dejan de sumar, sus contadores se conservan"""
+        self.valores[self._i_en_curso] = 0
+        for motor in range(len(MOTORES)):
+            base = self._i_pool + motor * len(CAMPOS_POOL)
+            for i, (_, tipo, _) in enumerate(CAMPOS_POOL):
+                if tipo == "gauge":
+                    self.valores[base + i] = 0
+
+    # --- lectura ---
+
+    def _leer_workers(self) -> Tuple[List[array], List[array]]:
+        """Arreglos (todos, vivos) de los workers con esta misma disposición"""
+        if self.directorio is None:
+            propio = array("d", self.valores)
+            return [propio], [propio]
+        todos, vivos = [], []
+        for archivo in self.directorio.glob(f"{self.huella}_*.bin"):
+            datos = array("d")
+            try:
+                datos.frombytes(archivo.read_bytes())
+            except OSError:
+                continue
+            if len(datos) != self.tamano:
+                continue
+            todos.append(datos)
+            if _vivo(int(archivo.stem.rsplit("_", 1)[1])):
+                vivos.append(datos)
+        return todos, vivos
+
+    def exponer(self) -> str:
+        """Todas las métricas, sumadas entre workers, en formato de texto de Prometheus"""
+        todos, vivos = self._leer_workers()
+        total = [sum(valores) for valores in zip(*todos)] if todos else [0.0] * self.tamano
+        # Los gauges de un worker muerto sin apagado limpio se ignoran
+        vivo = [sum(valores) for valores in zip(*vivos)] if vivos else [0.0] * self.tamano
+        lineas = []
+
+        lineas += [
+            "# HELP pizzeria_http_peticiones_total Peticiones atendidas por ruta y código de estado",
+            "# TYPE pizzeria_http_peticiones_total counter",
+        ]
+        for r, (metodo, ruta) in enumerate(self.rutas):
+            base = self.base_ruta(r)
+            for i, codigo in enumerate(CODIGOS + ("otro",)):
+                if total[base + i]:
+                    lineas.append(f'pizzeria_http_peticiones_total{{metodo="{metodo}",ruta="{ruta}",codigo="{codigo}"}} {_num(total[base + i])}')
+
+        lineas += [
+            "# HELP pizzeria_http_duracion_segundos Latencia de las peticiones por ruta",
+            "# TYPE pizzeria_http_duracion_segundos histogram",
+        ]
+        for r, (metodo, ruta) in enumerate(self.rutas):
+            base = self.base_ruta(r) + len(CODIGOS) + 1
+            buckets = total[base:base + len(LIMITES_LATENCIA) + 1]
+            cuenta = sum(buckets)
+            if not cuenta:
+                continue
+            etiquetas = f'metodo="{metodo}",ruta="{ruta}"'
+            acumulado = 0.0
+            for limite, n in zip(LIMITES_LATENCIA + ("+Inf",), buckets):
+                acumulado += n
+                lineas.append(f'pizzeria_http_duracion_segundos_bucket{{{etiquetas},le="{limite}"}} {_num(acumulado)}')
+            lineas.append(f"pizzeria_http_duracion_segundos_sum{{{etiquetas}}} {total[base + len(buckets)]}")
+            lineas.append(f"pizzeria_http_duracion_segundos_count{{{etiquetas}}} {_num(cuenta)}")
+
+        lineas += [
+            "# HELP pizzeria_http_en_curso Peticiones en curso",
+            "# TYPE pizzeria_http_en_curso gauge",
+            f"pizzeria_http_en_curso {_num(vivo[self._i_en_curso])}",
+            "# HELP pizzeria_workers Workers vivos que reportan métricas",
+            "# TYPE pizzeria_workers gauge",
+            f"pizzeria_workers {len(vivos)}",
+        ]
+
+        for i, (campo, tipo, descripcion) in enumerate(CAMPOS_POOL):
+            nombre = f"pizzeria_db_pool_{campo}" + ("_total" if tipo == "counter" else "")
+            fuente = total if tipo == "counter" else vivo
+            lineas += [f"# HELP {nombre} {descripcion}", f"# TYPE {nombre} {tipo}"]
+            for m, motor in enumerate(MOTORES):
+                lineas.append(f'{nombre}{{motor="{motor}"}} {_num(fuente[self._i_pool + m * len(CAMPOS_POOL) + i])}')
+
+        return "\n".join(lineas) + "\n"
+
+
+def _num(valor: float) -> str:
+    return str(int(valor)) if valor == int(valor) else repr(valor)
+
+
+def _vivo(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
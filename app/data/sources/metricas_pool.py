@@ -0,0 +1,88 @@
+import threading
+import time
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class EstadisticasPool:
+    """Contadores acumulados de un pool: esperas por conexión y timeouts"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.esperando = 0
+        self.espera_total = 0.0
+        self.espera_max = 0.0
+
+    def entrar(self) -> None:
+        with self._lock:
+            self.esperando += 1
+
+    def salir(self, segundos: float, timeout: bool = False) -> None:
+        with self._lock:
+            self.esperando -= 1
+            if timeout:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+                self.espera_total += segundos
+                if segundos > self.espera_max:
+                    self.espera_max = segundos
+
+
+class _PoolMedido:
+    """
+    Mide cuánto tarda cada petición en obtener una conexión del pool
+    (incluye la espera en la cola, abrir conexiones nuevas y el pre-ping).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.estadisticas = EstadisticasPool()
+
+    def connect(self):
+        inicio = time.perf_counter()
+        self.estadisticas.entrar()
+        try:
+            conexion = super().connect()
+        except PoolTimeoutError:
+            self.estadisticas.salir(time.perf_counter() - inicio, timeout=True)
+            raise
+        except Exception:
+            self.estadisticas.salir(time.perf_counter() - inicio)
+            raise
+        self.estadisticas.salir(time.perf_counter() - inicio)
+        return conexion
+
+
+class QueuePoolMedido(_PoolMedido, QueuePool):
+    pass
+
+
+class AsyncQueuePoolMedido(_PoolMedido, AsyncAdaptedQueuePool):
+    pass
+
+
+def estado_pool(pool) -> dict:
+    """Foto del pool: conexiones en uso/libres/overflow y estadísticas de espera"""
+    estado = {
+        "tamano": pool.size(),
+        "abiertas": pool.checkedin() + pool.checkedout(),
+        "en_uso": pool.checkedout(),
+        "libres": pool.checkedin(),
+        # SQLAlchemy cuenta el overflow en negativo mientras el pool no se ha llenado
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+        "timeout_s": pool.timeout(),
+    }
+    estadisticas = getattr(pool, "estadisticas", None)
+    if estadisticas is not None:
+        estado.update({
+            "esperando": estadisticas.esperando,
+            "checkouts": estadisticas.checkouts,
+            "timeouts": estadisticas.timeouts,
+            "espera_promedio_ms": round(estadisticas.espera_total / estadisticas.checkouts * 1000, 3) if estadisticas.checkouts else 0.0,
+            "espera_max_ms": round(estadisticas.espera_max * 1000, 3),
+        })
+    return estado
@@ -0,0 +1,100 @@
+import hashlib
+import time
+from pathlib import Path
+from typing import Callable, List, NamedTuple
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+
+# Archivos NNNN_descripcion.sql, aplicados en orden de nombre
+DIRECTORIO_MIGRACIONES = Path(__file__).resolve().parents[3] / "migraciones"
+
+# Llave de pg_advisory_lock: si arrancan varios contenedores a la vez, solo
+# uno aplica migraciones y los demás esperan a que termine
+_LLAVE_BLOQUEO = 7_264_081_433
+
+_TABLA_VERSIONES = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version VARCHAR(255) PRIMARY KEY,
+    checksum VARCHAR(64) NOT NULL,
+    aplicada_en TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+
+class Migracion(NamedTuple):
+    version: str
+    sql: str
+    checksum: str
+
+
+def leer_migraciones(directorio: Path = DIRECTORIO_MIGRACIONES) -> List[Migracion]:
+    migraciones = []
+    for ruta in sorted(directorio.glob("*.sql")):
+        sql = ruta.read_text(encoding="utf-8")
+        migraciones.append(Migracion(ruta.stem, sql, hashlib.sha256(sql.encode("utf-8")).hexdigest()))
+    return migraciones
+
+
+def esperar_bd(engine: Engine, segundos: float) -> None:
+    """Reintenta la conexión hasta `segundos` (la BD puede tardar en levantar junto con la app)"""
+    limite = time.monotonic() + segundos
+    espera = 0.5
+    while True:
+        try:
+            with engine.connect():
+                return
+        except OperationalError:
+            if time.monotonic() + espera > limite:
+                raise
+            time.sleep(espera)
+            espera = min(espera * 2, 5.0)
+
+
+def _aplicadas(conexion) -> dict:
+    conexion.execute(text(_TABLA_VERSIONES))
+    return dict(conexion.execute(text("SELECT version, checksum FROM schema_migrations")).all())
+
+
+def estado(engine: Engine, directorio: Path = DIRECTORIO_MIGRACIONES) -> List[tuple]:
+    """(version, aplicada) de cada archivo de migración"""
+    with engine.begin() as conexion:
+        aplicadas = _aplicadas(conexion)
+    return [(m.version, m.version in aplicadas) for m in leer_migraciones(directorio)]
+
+
+def migrar(
+    engine: Engine,
+    directorio: Path = DIRECTORIO_MIGRACIONES,
+    avisar: Callable[[str], None] = print
+) -> List[str]:
+    """
+    Aplica las migraciones pendientes, cada una en su propia transacción junto
+    con su registro en schema_migrations. Devuelve las versiones aplicadas.
+    """
+    aplicadas_ahora = []
+    with engine.connect() as conexion:
+        conexion.execute(text("SELECT pg_advisory_lock(:llave)"), {"llave": _LLAVE_BLOQUEO})
+        conexion.commit()
+        try:
+            with conexion.begin():
+                aplicadas = _aplicadas(conexion)
+
+            for migracion in leer_migraciones(directorio):
+                if migracion.version in aplicadas:
+                    if aplicadas[migracion.version] != migracion.checksum:
+                        avisar(f"AVISO: {migracion.version} cambió después de aplicarse; crea una migración nueva en su lugar")
+                    continue
+                with conexion.begin():
+                    # Sin parámetros para que el driver no interprete los % del SQL
+                    conexion.execution_options(no_parameters=True).exec_driver_sql(migracion.sql)
+                    conexion.execute(
+                        text("INSERT INTO schema_migrations (version, checksum) VALUES (:version, :checksum)"),
+                        {"version": migracion.version, "checksum": migracion.checksum}
+                    )
+                avisar(f"Aplicada {migracion.version}")
+                aplicadas_ahora.append(migracion.version)
+        finally:
+            conexion.execute(text("SELECT pg_advisory_unlock(:llave)"), {"llave": _LLAVE_BLOQUEO})
+            conexion.commit()
+    return aplicadas_ahora
@@ -0,0 +1,94 @@
+import os
+import re
+from datetime import date
+from typing import List, NamedTuple, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+# ordenes y detalles_orden están particionadas por mes (migraciones/0006) y
+# una venta de un mes sin partición fallaría. `migrar` y la propia app (al
+# arrancar y cada PARTICIONES_REVISION_HORAS) crean el mes actual y los
+# siguientes PARTICIONES_MESES_ADELANTE.
+PARTICIONES_MESES_ADELANTE = int(os.getenv("PARTICIONES_MESES_ADELANTE", "3"))
+# 0 = solo al arrancar
+PARTICIONES_REVISION_HORAS = float(os.getenv("PARTICIONES_REVISION_HORAS", "6"))
+
+# Serializa `asegurar` entre workers que arrancan a la vez
+_LOCK_ASEGURAR = 60060
+
+_NOMBRE = re.compile(r"^ordenes_p(\d{4})_(\d{2})$")
+
+
+class Particion(NamedTuple):
+    mes: date            # primer día del mes
+    ordenes: str         # ordenes_pAAAA_MM
+    detalles: str        # detalles_orden_pAAAA_MM
+
+    @property
+    def fin(self) -> date:
+        return sumar_meses(self.mes, 1)
+
+
+def sumar_meses(mes: date, meses: int) -> date:
+    """Primer día del mes que está `meses` después (o antes, si es negativo) del de `mes`"""
+    indice = mes.year * 12 + mes.month - 1 + meses
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def particion(mes: date) -> Particion:
+    sufijo = f"p{mes.year:04d}_{mes.month:02d}"
+    return Particion(date(mes.year, mes.month, 1), f"ordenes_{sufijo}", f"detalles_orden_{sufijo}")
+
+
+def listar(conexion: Connection) -> List[Particion]:
+    """Meses adjuntos a ordenes, del más antiguo al más reciente"""
+    nombres = conexion.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'ordenes'::regclass"
+    )).scalars()
+    meses = []
+    for nombre in nombres:
+        coincidencia = _NOMBRE.match(nombre)
+        if coincidencia:
+            meses.append(date(int(coincidencia.group(1)), int(coincidencia.group(2)), 1))
+    return [particion(mes) for mes in sorted(meses)]
+
+
+def asegurar(engine: Engine, desde: Optional[date] = None, meses_adelante: int = PARTICIONES_MESES_ADELANTE) -> List[str]:
+    """
+    Crea las particiones que falten desde el mes de `desde` (por defecto el
+    actual) hasta `meses_adelante` meses después del actual. Los meses ya
+    archivados no se vuelven a crear. Devuelve las particiones creadas.
+    """
+    hoy = date.today()
+    mes = particion(desde or hoy).mes
+    hasta = sumar_meses(particion(hoy).mes, meses_adelante)
+    creadas = []
+    with engine.begin() as conexion:
+        conexion.execute(text("SELECT pg_advisory_xact_lock(:llave)"), {"llave": _LOCK_ASEGURAR})
+        existentes = {p.mes for p in listar(conexion)}
+        archivadas = set(conexion.execute(text("SELECT mes FROM particiones_archivadas")).scalars())
+        while mes <= hasta:
+            if mes not in existentes and mes not in archivadas:
+                conexion.execute(text("SELECT crear_particion_ordenes(:mes)"), {"mes": mes})
+                creadas.append(particion(mes).ordenes)
+            mes = sumar_meses(mes, 1)
+    return creadas
+
+
+def desprender(conexion: Connection, mes: Particion, borrar: bool = False) -> None:
+    """
+    Desprende el mes de ordenes y detalles_orden (dentro de la transacción de
+    `conexion`). Primero los detalles, que tienen la FK hacia ordenes; la
+    copia de esa FK que conservan al quedar sueltos se elimina. Con `borrar`
+    las tablas sueltas se eliminan.
+    """
+    conexion.execute(text(f'ALTER TABLE detalles_orden DETACH PARTITION "{mes.detalles}"'))
+    for nombre in conexion.execute(text(
+        "SELECT conname FROM pg_constraint WHERE conrelid = CAST(:tabla AS regclass) "
+        "AND contype = 'f' AND confrelid = 'ordenes'::regclass"
+    ), {"tabla": mes.detalles}).scalars():
+        conexion.execute(text(f'ALTER TABLE "{mes.detalles}" DROP CONSTRAINT "{nombre}"'))
+    conexion.execute(text(f'ALTER TABLE ordenes DETACH PARTITION "{mes.ordenes}"'))
+    if borrar:
+        conexion.execute(text(f'DROP TABLE "{mes.detalles}", "{mes.ordenes}"'))
@@ -0,0 +1,116 @@
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.data.sources.database import (
+    SessionLocal, AsyncSessionLocal, SessionLectura, AsyncSessionLectura, engine_lectura, async_engine_lectura
+)
+
+# Retraso máximo (segundos) de la réplica para seguir leyendo de ella; por
+# encima, las lecturas vuelven a la primaria hasta que se ponga al día
+DB_REPLICA_LAG_MAX = float(os.getenv("DB_REPLICA_LAG_MAX", "5"))
+# Cada cuánto (segundos) se vuelve a medir el retraso; entre mediciones se usa la última
+DB_REPLICA_REVISION = float(os.getenv("DB_REPLICA_REVISION", "2"))
+
+logger = logging.getLogger(__name__)
+
+# 0 si la réplica ya aplicó todo lo que recibió (o si no es una réplica, p. ej.
+# una segunda instancia para pruebas); si no, la antigüedad de la última
+# transacción aplicada. NULL si todavía no ha aplicado ninguna.
+CONSULTA_RETRASO = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+""")
+
+
+class EstadoReplica:
+    """
+    Si la réplica está disponible y al día, medido como mucho cada
+    `DB_REPLICA_REVISION` segundos. Entre mediciones la decisión es leer un
+    atributo; mientras una petición mide, las demás usan el resultado anterior
+    en lugar de esperarla.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._revisado = float("-inf")
+        self._midiendo_async = False
+        self.disponible = False
+        self.retraso: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def _vencido(self) -> bool:
+        return time.monotonic() - self._revisado >= DB_REPLICA_REVISION
+
+    def _registrar(self, retraso: Optional[float], error: Optional[str] = None) -> None:
+        disponible = error is None and retraso is not None and retraso <= DB_REPLICA_LAG_MAX
+        if disponible != self.disponible:
+            if disponible:
+                logger.info("Réplica de lectura disponible (retraso %.1fs)", retraso)
+            else:
+                logger.warning("Lecturas de vuelta a la primaria: retraso=%s error=%s", retraso, error)
+        self.retraso, self.error, self.disponible = retraso, error, disponible
+        self._revisado = time.monotonic()
+
+    def usable(self) -> bool:
+        if self._vencido() and self._lock.acquire(blocking=False):
+            try:
+                with engine_lectura.connect() as conexion:
+                    retraso = conexion.execute(CONSULTA_RETRASO).scalar()
+                self._registrar(None if retraso is None else float(retraso))
+            except Exception as e:
+                self._registrar(None, repr(e))
+            finally:
+                self._lock.release()
+        return self.disponible
+
+    async def usable_async(self) -> bool:
+        # Un solo event loop por worker: basta una bandera
+        if self._vencido() and not self._midiendo_async:
+            self._midiendo_async = True
+            try:
+                async with async_engine_lectura.connect() as conexion:
+                    retraso = (await conexion.execute(CONSULTA_RETRASO)).scalar()
+                self._registrar(None if retraso is None else float(retraso))
+            except Exception as e:
+                self._registrar(None, repr(e))
+            finally:
+                self._midiendo_async = False
+        return self.disponible
+
+    def resumen(self) -> dict:
+        return {
+            "configurada": engine_lectura is not None,
+            "disponible": self.disponible,
+            "retraso_s": self.retraso,
+            "retraso_max_s": DB_REPLICA_LAG_MAX,
+            "error": self.error,
+        }
+
+
+estado_replica = EstadoReplica()
+
+
+def abrir_sesion_lectura(primaria: bool = False) -> Session:
+    """
+    Sesión para consultas de solo lectura: en la réplica si está configurada,
+    disponible y al día, y si no (o con `primaria=True`) en la primaria.
+    """
+    if not primaria and engine_lectura is not None and estado_replica.usable():
+        return SessionLectura()
+    return SessionLocal()
+
+
+async def abrir_sesion_lectura_async(primaria: bool = False):
+    """Versión async de abrir_sesion_lectura (DB_MODO=async)"""
+    if not primaria and async_engine_lectura is not None and await estado_replica.usable_async():
+        return AsyncSessionLectura()
+    return AsyncSessionLocal()
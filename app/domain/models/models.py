@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, ForeignKeyConstraint, DateTime, Date, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.data.sources.database import Base # Importamos la base que acabamos de arreglar
@@ -18,6 +18,8 @@ class Cliente(Base):
     id = Column(Integer, primary_key=True, index=True)
     nombre = Column(String, nullable=False)
     telefono = Column(String)
+    # Solo dígitos del teléfono: identifica al cliente (ver normalizar_telefono)
+    telefono_normalizado = Column(String(20), unique=True, index=True)
     direccion = Column(String, nullable=False)
     
     ordenes = relationship("Orden", back_populates="cliente")
@@ -31,10 +33,17 @@ class Producto(Base):
 
 class Orden(Base):
     __tablename__ = 'ordenes'
+    # Particionada por mes de `fecha` (migraciones/0006), por eso va en la PK.
+    # Filtros de GET /ordenes/buscar; con el folio la página sale ordenada del índice
+    __table_args__ = (
+        Index('ix_ordenes_cliente_id', 'cliente_id', 'id'),
+        Index('ix_ordenes_estatus', 'estatus', 'id'),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    # La PK es (id, fecha) por la partición: el folio sigue saliendo de la secuencia
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     cliente_id = Column(Integer, ForeignKey('clientes.id'))
-    fecha = Column(DateTime, default=datetime.now)
+    fecha = Column(DateTime, primary_key=True, default=datetime.now, index=True)
     total_venta = Column(Float, nullable=False)
     pago_cliente = Column(Float, nullable=False)
     cambio = Column(Float, nullable=False)
@@ -45,12 +54,68 @@ class Orden(Base):
 
 class DetalleOrden(Base):
     __tablename__ = 'detalles_orden'
+    # Particionada igual que ordenes, por la fecha de su orden.
+    # Filtro por producto de GET /ordenes/buscar (EXISTS por orden)
+    __table_args__ = (
+        ForeignKeyConstraint(['orden_id', 'fecha_orden'], ['ordenes.id', 'ordenes.fecha'], ondelete='CASCADE'),
+        Index('ix_detalles_orden_producto_orden', 'producto_id', 'orden_id'),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
-    orden_id = Column(Integer, ForeignKey('ordenes.id'))
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
+    orden_id = Column(Integer, index=True)
     producto_id = Column(Integer, ForeignKey('productos.id'))
     cantidad = Column(Integer, default=1)
     subtotal = Column(Float)
+    fecha_orden = Column(DateTime, primary_key=True)  # fecha de la orden (columna de partición)
 
     orden = relationship("Orden", back_populates="detalles")
-    producto = relationship("Producto")
\ No newline at end of file
+    producto = relationship("Producto")
+
+# --- TABLAS DE RESUMEN (se actualizan en la misma transacción que cada venta) ---
+
+class VentaDiaria(Base):
+    __tablename__ = 'ventas_diarias'
+
+    fecha = Column(Date, primary_key=True)
+    num_ordenes = Column(Integer, nullable=False, default=0)
+    total_venta = Column(Float, nullable=False, default=0)
+
+class VentaProductoDiaria(Base):
+    __tablename__ = 'ventas_producto_diarias'
+
+    fecha = Column(Date, primary_key=True)
+    producto_id = Column(Integer, primary_key=True)
+    unidades = Column(Integer, nullable=False, default=0)
+    ingreso = Column(Float, nullable=False, default=0)
+
+class VentaHora(Base):
+    __tablename__ = 'ventas_por_hora'
+
+    hora = Column(DateTime, primary_key=True)  # inicio de la hora (fecha truncada)
+    num_ordenes = Column(Integer, nullable=False, default=0)
+    total_venta = Column(Float, nullable=False, default=0)
+
+# --- ARCHIVO DE ÓRDENES ---
+
+class ParticionArchivada(Base):
+    __tablename__ = 'particiones_archivadas'
+
+    mes = Column(Date, primary_key=True)  # primer día del mes archivado
+    archivo = Column(String(255), nullable=False)  # ordenes_AAAA_MM.ndjson.gz en ARCHIVO_DIR
+    ordenes = Column(Integer, nullable=False)
+    detalles = Column(Integer, nullable=False)
+    folio_min = Column(Integer)
+    folio_max = Column(Integer)
+    sha256 = Column(String(64), nullable=False)
+    archivada_en = Column(DateTime, nullable=False, default=datetime.now)
+
+# --- IDEMPOTENCIA DE VENTAS ---
+
+class ClaveIdempotencia(Base):
+    __tablename__ = 'claves_idempotencia'
+
+    clave = Column(String(255), primary_key=True)  # header Idempotency-Key
+    huella = Column(String(64), nullable=False)  # sha256 del cuerpo de la petición
+    estado = Column(String(20), nullable=False, default="EN_PROCESO")  # EN_PROCESO | COMPLETADA
+    respuesta = Column(Text)  # VentaResponse en JSON, una vez completada
+    expira = Column(DateTime, nullable=False, index=True)
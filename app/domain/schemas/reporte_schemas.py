@@ -0,0 +1,28 @@
+from datetime import date, datetime
+from pydantic import BaseModel
+from typing import Optional
+
+class VentaDiariaResponse(BaseModel):
+    """Schema para el resumen de ventas de un día"""
+    fecha: date
+    num_ordenes: int
+    total_venta: float
+
+    class Config:
+        from_attributes = True
+
+class VentaProductoResponse(BaseModel):
+    """Schema para las ventas acumuladas de un producto en un rango de fechas"""
+    producto_id: int
+    producto_nombre: Optional[str]
+    unidades: int
+    ingreso: float
+
+class VentaHoraResponse(BaseModel):
+    """Schema para el resumen de ventas de una hora"""
+    hora: datetime
+    num_ordenes: int
+    total_venta: float
+
+    class Config:
+        from_attributes = True
@@ -1,5 +1,9 @@
-from pydantic import BaseModel
-from typing import List
+import os
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+# Máximo de ventas por petición en POST /ordenes/vender/lote
+VENTA_LOTE_MAX = int(os.getenv("VENTA_LOTE_MAX", "5000"))
 
 # --- PARA MOSTRAR EL MENÚ ---
 class ProductoResponse(BaseModel):
@@ -35,4 +39,20 @@ class VentaResponse(BaseModel):
     total: float
     pago: float
     cambio: float
-    mensaje: str
\ No newline at end of file
+    mensaje: str
+
+# --- PARA LOTES DE VENTAS (CAJAS QUE SINCRONIZAN SIN CONEXIÓN) ---
+
+class VentaLoteCreate(BaseModel):
+    ventas: List[VentaCreate] = Field(..., min_length=1, max_length=VENTA_LOTE_MAX)
+
+class ResultadoVentaLote(BaseModel):
+    indice: int  # posición de la venta en el lote
+    exito: bool
+    ticket: Optional[VentaResponse] = None
+    error: Optional[str] = None
+
+class VentaLoteResponse(BaseModel):
+    exitosas: int
+    fallidas: int
+    resultados: List[ResultadoVentaLote]
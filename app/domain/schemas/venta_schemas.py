@@ -38,4 +38,9 @@ class OrdenResponse(BaseModel):
     detalles: List[DetalleOrdenResponse]
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class HistorialResponse(BaseModel):
+    """Schema para una página del historial de órdenes"""
+    ordenes: List[OrdenResponse]
+    siguiente_cursor: Optional[int] = None
@@ -0,0 +1,29 @@
+import os
+from typing import Optional
+from fastapi import Response, status
+
+# Segundos que el cliente puede reutilizar el catálogo sin revalidar (0 = revalidar siempre con ETag)
+CATALOGO_MAX_AGE = int(os.getenv("CATALOGO_MAX_AGE", "0"))
+
+
+def etag_coincide(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparación de If-None-Match (débil, como pide HTTP para GET)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidato.strip().removeprefix("W/") == etag
+        for candidato in if_none_match.split(",")
+    )
+
+
+def respuesta_json_cacheable(etag: str, cuerpo: bytes, if_none_match: Optional[str]) -> Response:
+    """JSON ya serializado con ETag/Cache-Control, o 304 si el cliente ya lo tiene"""
+    cabeceras = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={CATALOGO_MAX_AGE}, must-revalidate",
+    }
+    if etag_coincide(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cabeceras)
+    return Response(content=cuerpo, media_type="application/json", headers=cabeceras)
@@ -1,7 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
-from app.data.sources.database import get_db
 from app.domain.schemas.auth_schemas import (
     UsuarioRegister, 
     UsuarioLogin, 
@@ -9,6 +8,7 @@ from app.domain.schemas.auth_schemas import (
     UsuarioResponse
 )
 from app.services.auth_service import AuthService
+from app.presentation.dependencias import DB, obtener_usuario_actual
 
 router = APIRouter(
     prefix="/auth",
@@ -18,7 +18,7 @@ router = APIRouter(
 @router.post("/register", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
 def registrar_usuario(
     datos: UsuarioRegister,
-    db: Session = Depends(get_db)
+    db: Session = DB
 ):
     """
     Registra un nuevo usuario en el sistema.
@@ -61,7 +61,7 @@ def registrar_usuario(
 @router.post("/login", response_model=TokenResponse)
 def login(
     datos: UsuarioLogin,
-    db: Session = Depends(get_db)
+    db: Session = DB
 ):
     """
     Inicia sesión con email y contraseña.
@@ -96,3 +96,10 @@ def login(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al iniciar sesión: {str(e)}"
         )
+
+@router.get("/me", response_model=UsuarioResponse)
+async def usuario_actual(usuario: UsuarioResponse = Depends(obtener_usuario_actual)):
+    """
+    Devuelve el usuario dueño del token enviado en `Authorization: Bearer <token>`.
+    """
+    return usuario
@@ -0,0 +1,81 @@
+from fastapi import APIRouter, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.presentation.dependencias import ASYNC_DB
+from app.domain.schemas.auth_schemas import (
+    UsuarioRegister, 
+    UsuarioLogin, 
+    TokenResponse, 
+    UsuarioResponse
+)
+from app.services.auth_service import AuthService
+from app.services.auth_service_async import AuthServiceAsync
+
+# Versión async de auth_controller (DB_MODO=async)
+router = APIRouter(
+    prefix="/auth",
+    tags=["Autenticación"]
+)
+
+@router.post("/register", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
+async def registrar_usuario(
+    datos: UsuarioRegister,
+    db: AsyncSession = ASYNC_DB
+):
+    """
+    Registra un nuevo usuario en el sistema.
+    
+    - **email**: Email único del usuario
+    - **nombre**: Nombre completo del usuario
+    - **password**: Contraseña (se almacenará hasheada)
+    """
+    try:
+        usuario = await AuthServiceAsync.registrar_usuario(db, datos)
+        
+        access_token = AuthService.crear_access_token(
+            data={"sub": usuario.email, "id": usuario.id}
+        )
+        
+        return TokenResponse(
+            access_token=access_token,
+            token_type="bearer",
+            usuario=UsuarioResponse.model_validate(usuario)
+        )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al registrar usuario: {str(e)}"
+        )
+
+@router.post("/login", response_model=TokenResponse)
+async def login(
+    datos: UsuarioLogin,
+    db: AsyncSession = ASYNC_DB
+):
+    """
+    Inicia sesión con email y contraseña.
+    
+    - **email**: Email del usuario
+    - **password**: Contraseña del usuario
+    
+    Retorna un token JWT para autenticación.
+    """
+    try:
+        usuario, access_token = await AuthServiceAsync.autenticar_usuario(db, datos)
+        
+        return TokenResponse(
+            access_token=access_token,
+            token_type="bearer",
+            usuario=UsuarioResponse.model_validate(usuario)
+        )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al iniciar sesión: {str(e)}"
+        )
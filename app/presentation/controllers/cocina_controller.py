@@ -0,0 +1,67 @@
+import asyncio
+import os
+from fastapi import APIRouter, Header, Query
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import AsyncIterator, Optional
+
+from app.services.cocina_service import feed_cocina
+
+# Cada cuántos segundos sin eventos se manda un comentario, para que proxies y
+# balanceadores no cierren la conexión y para detectar pantallas desconectadas
+COCINA_PING_S = float(os.getenv("COCINA_PING_S", "15"))
+
+router = APIRouter(
+    prefix="/cocina",
+    tags=["Cocina"]
+)
+
+
+async def _eventos(desde: Optional[int]) -> AsyncIterator[str]:
+    # Primero la suscripción y después las pendientes: lo que se confirme entre
+    # una y otra llega por las dos vías y se descarta la repetida
+    suscripcion = feed_cocina.suscribir()
+    try:
+        yield "retry: 3000\n\n"
+        enviadas = set()
+        if desde is not None:
+            for _, orden_id, texto in await run_in_threadpool(feed_cocina.pendientes, desde):
+                enviadas.add(orden_id)
+                yield texto
+        while True:
+            try:
+                evento = await asyncio.wait_for(suscripcion.cola.get(), COCINA_PING_S)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            if evento is None:
+                return
+            tipo, orden_id, texto = evento
+            if tipo == "nueva" and orden_id in enviadas:
+                continue
+            yield texto
+    finally:
+        feed_cocina.cancelar(suscripcion)
+
+
+@router.get("/ordenes", summary="Órdenes nuevas y canceladas en tiempo real (SSE)")
+async def feed_ordenes(
+    desde: Optional[int] = Query(None, description="Reenviar primero las órdenes posteriores a este folio"),
+    last_event_id: Optional[int] = Header(None, description="Lo envía el navegador al reconectar; tiene prioridad sobre `desde`")
+):
+    """
+    Stream `text/event-stream` para las pantallas de cocina, en lugar de
+    consultar `/ordenes/historial` cada pocos segundos.
+
+    - `event: nueva`: la orden completa (misma forma que `GET /ordenes/{id}`), con `id:` = folio.
+    - `event: cancelada`: `{"id": folio}` de una orden eliminada.
+
+    Al reconectar, `EventSource` envía `Last-Event-ID` y se reenvían las
+    órdenes nuevas posteriores a ese folio (hasta `COCINA_REANUDAR_MAX`). Las
+    cancelaciones ocurridas durante la desconexión no se reenvían.
+    """
+    return StreamingResponse(
+        _eventos(last_event_id if last_event_id is not None else desde),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,87 @@
+from fastapi import APIRouter
+
+from app.data.sources.database import engine, async_engine, engine_lectura, async_engine_lectura, DB_MODO
+from app.data.sources.instrumentacion_sql import SQL_INSTRUMENTAR, SQL_LENTA_MS, SQL_N_MAS_1_UMBRAL, estadisticas_sql
+from app.data.sources.metricas_pool import estado_pool
+from app.data.sources.replica import estado_replica
+from app.presentation.middleware_admision import ADMISION_ACTIVA, control_admision, limitador_clientes
+from app.services.escritor_ventas import escritor_ventas, escritor_ventas_async
+from app.services.hash_pool import ejecutor_hash
+
+router = APIRouter(
+    prefix="/monitoreo",
+    tags=["Monitoreo"]
+)
+
+@router.get("/pool", summary="Estado del pool de conexiones")
+def obtener_estado_pool():
+    """
+    Estadísticas en vivo del pool de conexiones de este worker: conexiones en
+    uso, libres y en overflow, peticiones esperando conexión, tiempo de espera
+    promedio/máximo y número de timeouts. Con réplica de lectura incluye
+    también sus pools y su último retraso medido.
+    """
+    estado = {"sync": estado_pool(engine.pool)}
+    if async_engine is not None:
+        estado["async"] = estado_pool(async_engine.sync_engine.pool)
+    if engine_lectura is not None:
+        estado["lectura"] = estado_pool(engine_lectura.pool)
+        estado["replica"] = estado_replica.resumen()
+    if async_engine_lectura is not None:
+        estado["lectura_async"] = estado_pool(async_engine_lectura.sync_engine.pool)
+    return estado
+
+@router.get("/hash", summary="Métricas del pool de bcrypt")
+def obtener_metricas_hash():
+    """
+    Métricas del pool de procesos de bcrypt de este worker: hashes en curso,
+    rechazados por saturación (503) y tiempo en cola contra tiempo de hash.
+    """
+    return ejecutor_hash.metricas()
+
+@router.get("/ventas", summary="Métricas del commit agrupado de ventas")
+def obtener_metricas_escritor():
+    """
+    Escritor de ventas de este worker (`VENTAS_GRUPO=true`): grupos guardados,
+    ventas por grupo en promedio, grupos que fallaron y se reintentaron venta
+    por venta y ventas esperando en la cola.
+    """
+    return (escritor_ventas_async if DB_MODO == "async" else escritor_ventas).metricas()
+
+@router.get("/admision", summary="Control de admisión y límite por cliente")
+def obtener_metricas_admision():
+    """
+    Control de admisión de este worker: peticiones en curso contra el límite,
+    y por prioridad (alta: ventas; media: menú, productos y el resto; baja:
+    historial, búsqueda, export y reportes) su cupo, cola, admitidas,
+    rechazadas con 503 y tiempo de espera. Incluye las respuestas 429 del
+    límite por cliente.
+    """
+    return {
+        "activo": ADMISION_ACTIVA,
+        **control_admision.metricas(),
+        "limite_clientes": limitador_clientes.metricas(),
+    }
+
+@router.get("/sql", summary="Sentencias SQL por ruta")
+def obtener_estadisticas_sql():
+    """
+    Sentencias y tiempo de base de datos por ruta en este worker (promedio y
+    máximo por petición) y cuántas peticiones repitieron una misma forma de
+    sentencia `SQL_N_MAS_1_UMBRAL` veces o más (probable N+1), con las formas.
+    Solo se llena con `SQL_INSTRUMENTAR=true`.
+    """
+    return {
+        "activa": SQL_INSTRUMENTAR,
+        "lenta_ms": SQL_LENTA_MS,
+        "umbral_n_mas_1": SQL_N_MAS_1_UMBRAL,
+        "rutas": estadisticas_sql.resumen(),
+    }
+
+@router.delete("/sql", summary="Reiniciar las estadísticas de SQL")
+def reiniciar_estadisticas_sql():
+    """
+    Borra lo acumulado en este worker, p. ej. para medir un escenario aislado.
+    """
+    estadisticas_sql.reiniciar()
+    return {"mensaje": "Estadísticas de SQL reiniciadas"}
@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Header, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from app.data.sources.database import get_db
+from app.presentation.dependencias import DB, DB_LECTURA
 from app.services.producto_service import ProductoService
 from app.domain.schemas.producto_schemas import ProductoResponse, ProductoCreate, ProductoUpdate
+from app.presentation.cache_http import respuesta_json_cacheable
 
 router = APIRouter(
     prefix="/productos",
@@ -12,15 +13,21 @@ router = APIRouter(
 )
 
 @router.get("/", response_model=List[ProductoResponse], summary="Listar todos los productos")
-def listar_productos(db: Session = Depends(get_db)):
+def listar_productos(
+    if_none_match: Optional[str] = Header(None),
+    db: Session = DB_LECTURA
+):
     """
     Obtiene el listado completo de productos (pizzas) disponibles.
+    
+    Responde con `ETag`; si el cliente envía ese valor en `If-None-Match` y el
+    catálogo no ha cambiado, recibe `304` sin consultar la base de datos.
     """
-    productos = ProductoService.listar_productos(db)
-    return productos
+    etag, cuerpo = ProductoService.obtener_catalogo(db)
+    return respuesta_json_cacheable(etag, cuerpo, if_none_match)
 
 @router.get("/{producto_id}", response_model=ProductoResponse, summary="Obtener un producto por ID")
-def obtener_producto(producto_id: int, db: Session = Depends(get_db)):
+def obtener_producto(producto_id: int, db: Session = DB_LECTURA):
     """
     Obtiene la información de un producto específico por su ID.
     """
@@ -28,7 +35,7 @@ def obtener_producto(producto_id: int, db: Session = Depends(get_db)):
     return producto
 
 @router.post("/", response_model=ProductoResponse, status_code=status.HTTP_201_CREATED, summary="Crear un nuevo producto")
-def crear_producto(datos: ProductoCreate, db: Session = Depends(get_db)):
+def crear_producto(datos: ProductoCreate, db: Session = DB):
     """
     Crea un nuevo producto (pizza) en el sistema.
     
@@ -39,7 +46,7 @@ def crear_producto(datos: ProductoCreate, db: Session = Depends(get_db)):
     return producto
 
 @router.put("/{producto_id}", response_model=ProductoResponse, summary="Actualizar un producto")
-def actualizar_producto(producto_id: int, datos: ProductoUpdate, db: Session = Depends(get_db)):
+def actualizar_producto(producto_id: int, datos: ProductoUpdate, db: Session = DB):
     """
     Actualiza la información de un producto existente.
     
@@ -50,7 +57,7 @@ def actualizar_producto(producto_id: int, datos: ProductoUpdate, db: Session = D
     return producto
 
 @router.delete("/{producto_id}", status_code=status.HTTP_200_OK, summary="Eliminar un producto")
-def eliminar_producto(producto_id: int, db: Session = Depends(get_db)):
+def eliminar_producto(producto_id: int, db: Session = DB):
     """
     Elimina un producto del sistema.
     """
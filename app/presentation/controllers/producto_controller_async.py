@@ -0,0 +1,59 @@
+from fastapi import APIRouter, Header, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from app.presentation.dependencias import ASYNC_DB, ASYNC_DB_LECTURA
+from app.services.producto_service_async import ProductoServiceAsync
+from app.domain.schemas.producto_schemas import ProductoResponse, ProductoCreate, ProductoUpdate
+from app.presentation.cache_http import respuesta_json_cacheable
+
+# Versión async de producto_controller (DB_MODO=async)
+router = APIRouter(
+    prefix="/productos",
+    tags=["Productos"]
+)
+
+@router.get("/", response_model=List[ProductoResponse], summary="Listar todos los productos")
+async def listar_productos(
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = ASYNC_DB_LECTURA
+):
+    """
+    Obtiene el listado completo de productos (pizzas) disponibles (con ETag / 304).
+    """
+    etag, cuerpo = await ProductoServiceAsync.obtener_catalogo(db)
+    return respuesta_json_cacheable(etag, cuerpo, if_none_match)
+
+@router.get("/{producto_id}", response_model=ProductoResponse, summary="Obtener un producto por ID")
+async def obtener_producto(producto_id: int, db: AsyncSession = ASYNC_DB_LECTURA):
+    """
+    Obtiene la información de un producto específico por su ID.
+    """
+    return await ProductoServiceAsync.obtener_producto(db, producto_id)
+
+@router.post("/", response_model=ProductoResponse, status_code=status.HTTP_201_CREATED, summary="Crear un nuevo producto")
+async def crear_producto(datos: ProductoCreate, db: AsyncSession = ASYNC_DB):
+    """
+    Crea un nuevo producto (pizza) en el sistema.
+    
+    - **nombre**: Nombre del producto (debe ser único)
+    - **precio**: Precio del producto (debe ser mayor a 0)
+    """
+    return await ProductoServiceAsync.crear_producto(db, datos)
+
+@router.put("/{producto_id}", response_model=ProductoResponse, summary="Actualizar un producto")
+async def actualizar_producto(producto_id: int, datos: ProductoUpdate, db: AsyncSession = ASYNC_DB):
+    """
+    Actualiza la información de un producto existente.
+    
+    - **nombre**: Nuevo nombre del producto (opcional)
+    - **precio**: Nuevo precio del producto (opcional)
+    """
+    return await ProductoServiceAsync.actualizar_producto(db, producto_id, datos)
+
+@router.delete("/{producto_id}", status_code=status.HTTP_200_OK, summary="Eliminar un producto")
+async def eliminar_producto(producto_id: int, db: AsyncSession = ASYNC_DB):
+    """
+    Elimina un producto del sistema.
+    """
+    return await ProductoServiceAsync.eliminar_producto(db, producto_id)
@@ -0,0 +1,38 @@
+from datetime import date
+from fastapi import APIRouter, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.presentation.dependencias import DB_LECTURA
+from app.domain.schemas.reporte_schemas import VentaDiariaResponse, VentaProductoResponse, VentaHoraResponse
+from app.services.reporte_service import ReporteService
+
+router = APIRouter(
+    prefix="/reportes",
+    tags=["Reportes"]
+)
+
+# Por defecto los reportes cubren los últimos 30 días (hasta hoy)
+DESDE = Query(None, description="Primer día del reporte (YYYY-MM-DD)")
+HASTA = Query(None, description="Último día del reporte, incluido (YYYY-MM-DD)")
+
+@router.get("/ventas-diarias", response_model=List[VentaDiariaResponse], summary="Ventas por día")
+def ventas_diarias(desde: Optional[date] = DESDE, hasta: Optional[date] = HASTA, db: Session = DB_LECTURA):
+    """
+    Número de órdenes y total vendido por cada día del rango.
+    """
+    return ReporteService.ventas_diarias(db, desde, hasta)
+
+@router.get("/productos", response_model=List[VentaProductoResponse], summary="Ventas por producto")
+def ventas_por_producto(desde: Optional[date] = DESDE, hasta: Optional[date] = HASTA, db: Session = DB_LECTURA):
+    """
+    Unidades vendidas e ingreso de cada producto en el rango, ordenados por ingreso.
+    """
+    return ReporteService.ventas_por_producto(db, desde, hasta)
+
+@router.get("/ventas-por-hora", response_model=List[VentaHoraResponse], summary="Ventas por hora")
+def ventas_por_hora(desde: Optional[date] = DESDE, hasta: Optional[date] = HASTA, db: Session = DB_LECTURA):
+    """
+    Número de órdenes y total vendido por cada hora de los días del rango.
+    """
+    return ReporteService.ventas_por_hora(db, desde, hasta)
+
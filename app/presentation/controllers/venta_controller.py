@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, status
+from datetime import date
+from fastapi import APIRouter, Header, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
-from app.data.sources.database import get_db
-from app.domain.schemas.schemas import VentaCreate, VentaResponse
-from app.domain.schemas.venta_schemas import OrdenResponse
+from typing import Optional
+from app.domain.schemas.schemas import VentaCreate, VentaResponse, VentaLoteCreate, VentaLoteResponse
+from app.domain.schemas.venta_schemas import OrdenResponse, HistorialResponse
+from app.presentation.dependencias import DB, DB_LECTURA, leer_de_primaria, recordar_escritura
+from app.presentation.respuesta_json import respuesta_json
 from app.services.venta_service import VentaService
 
 router = APIRouter(
@@ -12,31 +15,116 @@ router = APIRouter(
 )
 
 @router.post("/vender", response_model=VentaResponse, summary="Registrar una nueva venta")
-def crear_venta(venta: VentaCreate, db: Session = Depends(get_db)):
+def crear_venta(
+    venta: VentaCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(
+        None,
+        max_length=255,
+        description="Clave única de la venta; los reintentos con la misma clave devuelven el ticket original"
+    ),
+    db: Session = DB
+):
     """
     Registra una nueva venta en el sistema.
+    
+    Con el header `Idempotency-Key` reintentar la petición es seguro: una
+    clave repetida devuelve el ticket de la primera venta (con el header
+    `Idempotent-Replayed: true`) en lugar de registrar otra. Un reintento que
+    llega mientras la primera sigue en proceso espera a que termine.
+
+    Con réplica de lectura, las lecturas de este cliente van a la primaria
+    durante unos segundos (cookie `leer_primaria`) para que vea su orden.
     """
     servicio = VentaService(db)
-    return servicio.registrar_venta(venta)
+    ticket, repetida = servicio.registrar_venta(venta, idempotency_key)
+    if repetida:
+        response.headers["Idempotent-Replayed"] = "true"
+    recordar_escritura(response)
+    return ticket
 
-@router.get("/historial", response_model=List[OrdenResponse], summary="Obtener historial de órdenes")
-def obtener_historial(db: Session = Depends(get_db)):
+@router.post("/vender/lote", response_model=VentaLoteResponse, summary="Registrar un lote de ventas")
+def crear_ventas_lote(lote: VentaLoteCreate, response: Response, db: Session = DB):
     """
-    Obtiene el historial completo de todas las órdenes registradas.
+    Registra de una vez las ventas que una caja acumuló sin conexión.
+    
+    Precios, clientes, órdenes y detalles se resuelven con unas cuantas
+    sentencias por conjunto y un solo commit. La respuesta trae un resultado
+    por venta, en el mismo orden: una venta inválida (producto inexistente,
+    pago insuficiente) se reporta con su error y no detiene a las demás.
     """
     servicio = VentaService(db)
-    return servicio.obtener_historial()
+    resultado = servicio.registrar_lote(lote)
+    recordar_escritura(response)
+    return resultado
+
+@router.get("/historial", response_model=HistorialResponse, summary="Obtener historial de órdenes")
+def obtener_historial(
+    limit: int = Query(50, ge=1, le=500, description="Órdenes por página"),
+    after: Optional[int] = Query(None, description="Cursor devuelto en `siguiente_cursor` por la página anterior"),
+    db: Session = DB_LECTURA
+):
+    """
+    Obtiene el historial de órdenes paginado, de la más reciente a la más antigua.
+    
+    Para pedir la siguiente página envía el `siguiente_cursor` de la respuesta
+    como `after`. Cuando `siguiente_cursor` es `null` ya no hay más órdenes.
+    """
+    servicio = VentaService(db)
+    return respuesta_json(servicio.obtener_historial(limit, after))
+
+@router.get("/buscar", response_model=HistorialResponse, summary="Buscar órdenes por fecha, estatus, cliente o producto")
+def buscar_ordenes(
+    desde: Optional[date] = Query(None, description="Primer día (YYYY-MM-DD)"),
+    hasta: Optional[date] = Query(None, description="Último día, incluido (YYYY-MM-DD)"),
+    estatus: Optional[str] = Query(None, max_length=20, description="PAGADA o CANCELADA"),
+    cliente_id: Optional[int] = Query(None),
+    telefono: Optional[str] = Query(None, max_length=30, description="Teléfono del cliente"),
+    producto_id: Optional[int] = Query(None),
+    limit: int = Query(50, ge=1, le=500, description="Órdenes por página"),
+    after: Optional[int] = Query(None, description="Cursor devuelto en `siguiente_cursor` por la página anterior"),
+    db: Session = DB_LECTURA
+):
+    """
+    Busca órdenes combinando filtros (todos opcionales, se aplican juntos),
+    de la más reciente a la más antigua y paginadas igual que `/historial`.
+
+    - `desde` / `hasta`: días (YYYY-MM-DD), `hasta` incluido. Para "hoy" envía los dos con la fecha de hoy.
+    - `estatus`: `PAGADA` o `CANCELADA`.
+    - `cliente_id` o `telefono` (en cualquier formato: se normaliza igual que al vender).
+    - `producto_id`: órdenes que llevan ese producto.
+    """
+    servicio = VentaService(db)
+    return respuesta_json(servicio.buscar_ordenes(limit, after, desde, hasta, estatus, cliente_id, telefono, producto_id))
+
+@router.get("/exportar", summary="Exportar el historial completo (NDJSON o CSV)")
+def exportar_historial(
+    request: Request,
+    formato: str = Query("ndjson", pattern="^(ndjson|csv)$", description="`ndjson` (una orden por línea) o `csv` (una fila por detalle)")
+):
+    """
+    Descarga todas las órdenes con sus detalles en streaming.
+    
+    Las filas se leen con un cursor del servidor en lotes fijos, así que el
+    consumo de memoria es constante sin importar el tamaño del historial.
+    """
+    media_type = "text/csv" if formato == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        VentaService.exportar_historial(formato, primaria=leer_de_primaria(request)),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="historial.{formato}"'}
+    )
 
 @router.get("/{orden_id}", response_model=OrdenResponse, summary="Obtener una orden específica")
-def obtener_orden(orden_id: int, db: Session = Depends(get_db)):
+def obtener_orden(orden_id: int, db: Session = DB_LECTURA):
     """
     Obtiene los detalles de una orden específica por su ID.
     """
     servicio = VentaService(db)
-    return servicio.obtener_orden_por_id(orden_id)
+    return respuesta_json(servicio.obtener_orden_por_id(orden_id))
 
 @router.delete("/{orden_id}", status_code=status.HTTP_200_OK, summary="Eliminar una orden")
-def eliminar_orden(orden_id: int, db: Session = Depends(get_db)):
+def eliminar_orden(orden_id: int, db: Session = DB):
     """
     Elimina una orden del historial.
     """
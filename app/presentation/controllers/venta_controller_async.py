@@ -0,0 +1,97 @@
+from datetime import date
+from fastapi import APIRouter, Header, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from app.domain.schemas.schemas import VentaCreate, VentaResponse, VentaLoteCreate, VentaLoteResponse
+from app.domain.schemas.venta_schemas import OrdenResponse, HistorialResponse
+from app.presentation.dependencias import ASYNC_DB, ASYNC_DB_LECTURA, recordar_escritura
+from app.presentation.respuesta_json import respuesta_json
+from app.services.venta_service_async import VentaServiceAsync
+
+# Versión async de venta_controller (DB_MODO=async)
+router = APIRouter(
+    prefix="/ordenes",
+    tags=["Órdenes"]
+)
+
+@router.post("/vender", response_model=VentaResponse, summary="Registrar una nueva venta")
+async def crear_venta(
+    venta: VentaCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(
+        None,
+        max_length=255,
+        description="Clave única de la venta; los reintentos con la misma clave devuelven el ticket original"
+    ),
+    db: AsyncSession = ASYNC_DB
+):
+    """
+    Registra una nueva venta en el sistema.
+    
+    Con el header `Idempotency-Key` reintentar la petición es seguro: una
+    clave repetida devuelve el ticket de la primera venta (con el header
+    `Idempotent-Replayed: true`) en lugar de registrar otra. Un reintento que
+    llega mientras la primera sigue en proceso espera a que termine.
+    """
+    servicio = VentaServiceAsync(db)
+    ticket, repetida = await servicio.registrar_venta(venta, idempotency_key)
+    if repetida:
+        response.headers["Idempotent-Replayed"] = "true"
+    recordar_escritura(response)
+    return ticket
+
+@router.post("/vender/lote", response_model=VentaLoteResponse, summary="Registrar un lote de ventas")
+async def crear_ventas_lote(lote: VentaLoteCreate, response: Response, db: AsyncSession = ASYNC_DB):
+    """
+    Registra de una vez las ventas que una caja acumuló sin conexión.
+    """
+    servicio = VentaServiceAsync(db)
+    resultado = await servicio.registrar_lote(lote)
+    recordar_escritura(response)
+    return resultado
+
+@router.get("/historial", response_model=HistorialResponse, summary="Obtener historial de órdenes")
+async def obtener_historial(
+    limit: int = Query(50, ge=1, le=500, description="Órdenes por página"),
+    after: Optional[int] = Query(None, description="Cursor devuelto en `siguiente_cursor` por la página anterior"),
+    db: AsyncSession = ASYNC_DB_LECTURA
+):
+    """
+    Obtiene el historial de órdenes paginado, de la más reciente a la más antigua.
+    """
+    servicio = VentaServiceAsync(db)
+    return respuesta_json(await servicio.obtener_historial(limit, after))
+
+@router.get("/buscar", response_model=HistorialResponse, summary="Buscar órdenes por fecha, estatus, cliente o producto")
+async def buscar_ordenes(
+    desde: Optional[date] = Query(None, description="Primer día (YYYY-MM-DD)"),
+    hasta: Optional[date] = Query(None, description="Último día, incluido (YYYY-MM-DD)"),
+    estatus: Optional[str] = Query(None, max_length=20, description="PAGADA o CANCELADA"),
+    cliente_id: Optional[int] = Query(None),
+    telefono: Optional[str] = Query(None, max_length=30, description="Teléfono del cliente"),
+    producto_id: Optional[int] = Query(None),
+    limit: int = Query(50, ge=1, le=500, description="Órdenes por página"),
+    after: Optional[int] = Query(None, description="Cursor devuelto en `siguiente_cursor` por la página anterior"),
+    db: AsyncSession = ASYNC_DB_LECTURA
+):
+    """
+    Busca órdenes combinando filtros (ver venta_controller.buscar_ordenes).
+    """
+    servicio = VentaServiceAsync(db)
+    return respuesta_json(await servicio.buscar_ordenes(limit, after, desde, hasta, estatus, cliente_id, telefono, producto_id))
+
+@router.get("/{orden_id}", response_model=OrdenResponse, summary="Obtener una orden específica")
+async def obtener_orden(orden_id: int, db: AsyncSession = ASYNC_DB_LECTURA):
+    """
+    Obtiene los detalles de una orden específica por su ID.
+    """
+    servicio = VentaServiceAsync(db)
+    return respuesta_json(await servicio.obtener_orden_por_id(orden_id))
+
+@router.delete("/{orden_id}", status_code=status.HTTP_200_OK, summary="Eliminar una orden")
+async def eliminar_orden(orden_id: int, db: AsyncSession = ASYNC_DB):
+    """
+    Elimina una orden del historial.
+    """
+    servicio = VentaServiceAsync(db)
+    return await servicio.eliminar_orden(orden_id)
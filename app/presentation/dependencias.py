@@ -0,0 +1,167 @@
+import inspect
+import os
+import time
+from typing import Optional
+from fastapi import Depends, Request, Response
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.data.sources.database import engine_lectura, get_db, get_async_db
+from app.data.sources.replica import abrir_sesion_lectura, abrir_sesion_lectura_async
+from app.domain.schemas.auth_schemas import UsuarioResponse
+from app.services.auth_service import AuthService, CREDENCIALES_INVALIDAS
+
+esquema_bearer = HTTPBearer(auto_error=False)
+
+# Lee-lo-que-escribiste: tras registrar una venta, las lecturas de ese cliente
+# van a la primaria durante estos segundos, para que vea su orden aunque la
+# réplica todavía no la tenga
+DB_REPLICA_PEGAJOSA = int(os.getenv("DB_REPLICA_PEGAJOSA", "10"))
+COOKIE_LEER_PRIMARIA = "leer_primaria"
+
+
+async def obtener_usuario_actual(
+    credenciales: Optional[HTTPAuthorizationCredentials] = Depends(esquema_bearer)
+) -> UsuarioResponse:
+    """
+    Dependencia de autenticación: exige `Authorization: Bearer <token>` y
+    devuelve el usuario dueño del token.
+
+    En el caso común (token y usuario en caché) es una búsqueda en diccionario
+    sin salir del event loop; solo si falta algo se decodifica el JWT y se
+    consulta la BD, en el thread pool.
+    """
+    if credenciales is None:
+        raise CREDENCIALES_INVALIDAS
+    
+    usuario = AuthService.usuario_en_cache(credenciales.credentials)
+    if usuario is not None:
+        return usuario
+    return await run_in_threadpool(AuthService.obtener_usuario_por_token, credenciales.credentials)
+
+
+def recordar_escritura(response: Response) -> None:
+    """
+    Marca al cliente (cookie con la hora límite) para que sus lecturas de los
+    próximos `DB_REPLICA_PEGAJOSA` segundos vayan a la primaria. Sin réplica
+    configurada no hace nada.
+    """
+    if engine_lectura is None:
+        return
+    response.set_cookie(
+        COOKIE_LEER_PRIMARIA, str(int(time.time()) + DB_REPLICA_PEGAJOSA),
+        max_age=DB_REPLICA_PEGAJOSA, httponly=True, samesite="lax"
+    )
+
+
+def leer_de_primaria(request: Request) -> bool:
+    # La hora límite se revisa también aquí por si el cliente no respeta max_age
+    valor = request.cookies.get(COOKIE_LEER_PRIMARIA)
+    if valor is None:
+        return False
+    try:
+        return int(valor) > time.time()
+    except ValueError:
+        return False
+
+
+class SesionPerezosa:
+    """
+    Sesión que se abre con el primer atributo que se le pide (`execute`,
+    `query`, `info`...). Una petición que se resuelve sin la base (catálogo
+    en caché, 304) no crea la sesión ni decide entre réplica y primaria,
+    que puede costar medir el retraso de la réplica.
+    """
+
+    __slots__ = ("_abrir", "_sesion")
+
+    def __init__(self, abrir):
+        self._abrir = abrir
+        self._sesion: Optional[Session] = None
+
+    def __getattr__(self, nombre):
+        if self._sesion is None:
+            self._sesion = self._abrir()
+        return getattr(self._sesion, nombre)
+
+    @property
+    def abierta(self) -> bool:
+        return self._sesion is not None
+
+    def close(self) -> None:
+        if self._sesion is not None:
+            self._sesion.close()
+
+
+def get_db_lectura(request: Request):
+    """
+    Sesión para los GET: en la réplica si está configurada y al día, salvo
+    que el cliente acabe de escribir (ver recordar_escritura). Se abre hasta
+    que se usa (ver SesionPerezosa).
+    """
+    primaria = leer_de_primaria(request)
+    db = SesionPerezosa(lambda: abrir_sesion_lectura(primaria=primaria))
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+class SesionPerezosaAsync:
+    """
+    Versión async de SesionPerezosa. Elegir la sesión requiere un await (el
+    retraso de la réplica se mide de forma asíncrona), así que se abre con la
+    primera llamada a un método awaitable (`execute`, `get`, `scalar`...).
+    Los atributos síncronos (`info`, `add`...) solo están disponibles una
+    vez abierta.
+    """
+
+    __slots__ = ("_abrir", "_sesion")
+
+    def __init__(self, abrir):
+        self._abrir = abrir
+        self._sesion: Optional[AsyncSession] = None
+
+    def __getattr__(self, nombre):
+        if self._sesion is not None:
+            return getattr(self._sesion, nombre)
+        if not inspect.iscoroutinefunction(getattr(AsyncSession, nombre, None)):
+            raise RuntimeError(f"La sesión de lectura se abre con la primera consulta; '{nombre}' se pidió antes")
+
+        async def diferido(*args, **kwargs):
+            if self._sesion is None:
+                self._sesion = await self._abrir()
+            return await getattr(self._sesion, nombre)(*args, **kwargs)
+        return diferido
+
+    @property
+    def abierta(self) -> bool:
+        return self._sesion is not None
+
+    async def close(self) -> None:
+        if self._sesion is not None:
+            await self._sesion.close()
+
+
+async def get_async_db_lectura(request: Request):
+    """Versión async de get_db_lectura (DB_MODO=async); también se abre hasta que se usa"""
+    primaria = leer_de_primaria(request)
+    db = SesionPerezosaAsync(lambda: abrir_sesion_lectura_async(primaria=primaria))
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+# Dependencias de sesión para las rutas. Con scope="function" la sesión se
+# cierra (y su conexión vuelve al pool) en cuanto termina la función de la
+# ruta, antes de serializar y enviar la respuesta; la sesión en sí solo toma
+# una conexión con la primera consulta. Las rutas devuelven datos ya cargados
+# (diccionarios, modelos de pydantic o bytes). Las respuestas en streaming
+# (/ordenes/exportar) abren su propia sesión dentro del generador.
+DB = Depends(get_db, scope="function")
+DB_LECTURA = Depends(get_db_lectura, scope="function")
+ASYNC_DB = Depends(get_async_db, scope="function")
+ASYNC_DB_LECTURA = Depends(get_async_db_lectura, scope="function")
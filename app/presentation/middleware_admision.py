@@ -0,0 +1,280 @@
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+import orjson
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.data.sources.database import DB_POOL_SIZE, DB_MAX_OVERFLOW
+
+# Control de admisión por worker: cuántas peticiones se atienden a la vez y en
+# qué orden entran las que esperan, para que con la base lenta se acumulen en
+# una cola con prioridad y tiempo límite en lugar de en el pool de conexiones
+ADMISION_ACTIVA = os.getenv("ADMISION_ACTIVA", "true").lower() in ("1", "true", "yes")
+# Peticiones atendidas a la vez; por defecto, las conexiones que puede abrir el pool
+ADMISION_LIMITE = int(os.getenv("ADMISION_LIMITE", "0")) or DB_POOL_SIZE + DB_MAX_OVERFLOW
+# Milisegundos que espera turno una petición de prioridad alta, media y baja
+# antes de responder 503
+ADMISION_ESPERA_MS = os.getenv("ADMISION_ESPERA_MS", "5000,1000,250")
+ADMISION_RETRY_AFTER = int(os.getenv("ADMISION_RETRY_AFTER", "1"))
+# Límite por cliente (token bucket): peticiones por segundo y ráfaga. 0 = sin límite
+ADMISION_TASA = float(os.getenv("ADMISION_TASA", "0"))
+ADMISION_RAFAGA = int(os.getenv("ADMISION_RAFAGA", "0")) or max(1, math.ceil(ADMISION_TASA * 2))
+# Cabecera que identifica al cliente (p. ej. X-Forwarded-For detrás de un
+# proxy); vacía = la IP de la conexión
+ADMISION_CLIENTE_CABECERA = os.getenv("ADMISION_CLIENTE_CABECERA", "").lower()
+
+ALTA, MEDIA, BAJA = 0, 1, 2
+NOMBRES = ("alta", "media", "baja")
+# Fracción del límite que puede ocupar cada prioridad: lo que queda por
+# encima del cupo de la baja (y de la media) se reserva para las ventas
+CUPOS = (1.0, 0.8, 0.5)
+
+# (método o None, prefijo de la ruta, prioridad); gana la primera que coincide
+# y lo que no coincide es prioridad media
+REGLAS: List[Tuple[Optional[str], str, int]] = [
+    ("POST", "/ordenes/vender", ALTA),
+    ("DELETE", "/ordenes/", ALTA),
+    ("GET", "/ordenes/historial", BAJA),
+    ("GET", "/ordenes/buscar", BAJA),
+    ("GET", "/ordenes/exportar", BAJA),
+    (None, "/reportes", BAJA),
+]
+# Sin control: no usan la base o mantienen la conexión abierta (SSE de cocina)
+EXENTAS = ("/monitoreo", "/metrics", "/cocina", "/docs", "/redoc", "/openapi.json")
+
+
+def prioridad(metodo: str, ruta: str) -> Optional[int]:
+    """Prioridad de la petición, o None si no pasa por el control"""
+    if ruta.startswith(EXENTAS):
+        return None
+    for metodo_regla, prefijo, nivel in REGLAS:
+        if (metodo_regla is None or metodo_regla == metodo) and ruta.startswith(prefijo):
+            return nivel
+    return MEDIA
+
+
+class Rechazo(Exception):
+    def __init__(self, codigo: int, detalle: str, reintentar: int):
+        self.codigo = codigo
+        self.detalle = detalle
+        self.reintentar = reintentar
+
+
+class ControlAdmision:
+    """
+    Cupos de peticiones simultáneas con tres prioridades (vive en el event
+    loop del worker, sin locks).
+
+    Cuando no hay cupo la petición espera en la cola de su prioridad; al
+    liberarse uno entra la más antigua de la prioridad más alta. Si la espera
+    pasa del límite de su prioridad se responde 503 con Retry-After. La espera
+    reciente (promedio móvil) se usa para rechazar de inmediato lo que no
+    alcanzaría a entrar: con la base lenta, historial y reportes se
+    descartan antes de ocupar la cola de las ventas.
+    """
+
+    def __init__(self, limite: int = ADMISION_LIMITE, esperas_ms: str = ADMISION_ESPERA_MS):
+        self.limite = max(1, limite)
+        self.cupos = [max(1, int(self.limite * fraccion)) for fraccion in CUPOS]
+        self.esperas = [float(ms) / 1000 for ms in esperas_ms.split(",")]
+        self.en_curso = 0
+        self._colas: List[Deque[asyncio.Future]] = [deque(), deque(), deque()]
+        self._espera_reciente = 0.0
+        self.admitidas = [0, 0, 0]
+        self.rechazadas = [0, 0, 0]
+        self.espera_total = [0.0, 0.0, 0.0]
+        self.espera_max = [0.0, 0.0, 0.0]
+
+    def _hay_antes(self, nivel: int) -> bool:
+        return any(self._colas[p] for p in range(nivel + 1))
+
+    async def entrar(self, nivel: int) -> float:
+        """Espera turno y devuelve cuánto esperó; lanza Rechazo si no lo obtiene"""
+        if self.en_curso < self.cupos[nivel] and not self._hay_antes(nivel):
+            self.en_curso += 1
+            self._registrar(nivel, 0.0)
+            return 0.0
+        if nivel != ALTA and self._espera_reciente > self.esperas[nivel]:
+            self._rechazar(nivel)
+
+        inicio = time.perf_counter()
+        futuro = asyncio.get_running_loop().create_future()
+        self._colas[nivel].append(futuro)
+        try:
+            await asyncio.wait_for(futuro, self.esperas[nivel])
+        except asyncio.TimeoutError:
+            # Desde Python 3.12 wait_for puede vencer en la misma vuelta del
+            # loop en que _despertar ya le dio el cupo: entonces se admite
+            if not (futuro.done() and not futuro.cancelled()):
+                self._quitar(nivel, futuro)
+                self._rechazar(nivel)
+        except BaseException:
+            # Cliente desconectado: si el cupo ya se le había dado, se devuelve
+            if futuro.done() and not futuro.cancelled():
+                self.salir()
+            else:
+                self._quitar(nivel, futuro)
+            raise
+        espera = time.perf_counter() - inicio
+        self._registrar(nivel, espera)
+        return espera
+
+    def salir(self) -> None:
+        self.en_curso -= 1
+        self._despertar()
+
+    def _quitar(self, nivel: int, futuro: asyncio.Future) -> None:
+        # Quien la seguía en la cola (o en una de menor prioridad) quizá ya puede entrar
+        try:
+            self._colas[nivel].remove(futuro)
+        except ValueError:
+            pass
+        self._despertar()
+
+    def _despertar(self) -> None:
+        for nivel, cola in enumerate(self._colas):
+            while cola and self.en_curso < self.cupos[nivel]:
+                futuro = cola.popleft()
+                if not futuro.done():
+                    self.en_curso += 1
+                    futuro.set_result(None)
+            if cola:
+                # Nadie de menor prioridad entra antes que esta cola
+                return
+
+    def _registrar(self, nivel: int, espera: float) -> None:
+        self.admitidas[nivel] += 1
+        self.espera_total[nivel] += espera
+        if espera > self.espera_max[nivel]:
+            self.espera_max[nivel] = espera
+        self._espera_reciente = 0.8 * self._espera_reciente + 0.2 * espera
+
+    def _rechazar(self, nivel: int) -> None:
+        self.rechazadas[nivel] += 1
+        raise Rechazo(503, "Servidor saturado, intenta de nuevo", ADMISION_RETRY_AFTER)
+
+    def metricas(self) -> dict:
+        return {
+            "limite": self.limite,
+            "en_curso": self.en_curso,
+            "espera_reciente_ms": round(self._espera_reciente * 1000, 3),
+            "prioridades": {
+                NOMBRES[nivel]: {
+                    "cupo": self.cupos[nivel],
+                    "espera_max_permitida_ms": self.esperas[nivel] * 1000,
+                    "en_cola": len(self._colas[nivel]),
+                    "admitidas": self.admitidas[nivel],
+                    "rechazadas": self.rechazadas[nivel],
+                    "espera_promedio_ms": round(self.espera_total[nivel] / self.admitidas[nivel] * 1000, 3) if self.admitidas[nivel] else 0.0,
+                    "espera_max_ms": round(self.espera_max[nivel] * 1000, 3),
+                }
+                for nivel in (ALTA, MEDIA, BAJA)
+            },
+        }
+
+
+class LimitadorClientes:
+    """
+    Token bucket por cliente: `tasa` peticiones por segundo con ráfagas de
+    hasta `rafaga`. Una tablet que reintenta en bucle recibe 429 sin quitarle
+    cupo a las demás.
+    """
+
+    # Clientes recordados antes de olvidar los que ya tienen el bucket lleno
+    MAX_CLIENTES = 10000
+
+    def __init__(self, tasa: float = ADMISION_TASA, rafaga: int = ADMISION_RAFAGA):
+        self.tasa = tasa
+        self.rafaga = rafaga
+        self._buckets: Dict[str, List[float]] = {}   # cliente -> [fichas, último]
+        self.limitadas = 0
+
+    def consumir(self, cliente: str) -> None:
+        if self.tasa <= 0:
+            return
+        ahora = time.monotonic()
+        bucket = self._buckets.get(cliente)
+        if bucket is None:
+            if len(self._buckets) >= self.MAX_CLIENTES:
+                self._olvidar(ahora)
+            bucket = self._buckets[cliente] = [float(self.rafaga), ahora]
+        fichas = min(self.rafaga, bucket[0] + (ahora - bucket[1]) * self.tasa)
+        bucket[1] = ahora
+        if fichas < 1:
+            bucket[0] = fichas
+            self.limitadas += 1
+            raise Rechazo(429, "Demasiadas peticiones, intenta más tarde", math.ceil((1 - fichas) / self.tasa))
+        bucket[0] = fichas - 1
+
+    def _olvidar(self, ahora: float) -> None:
+        llenos = [c for c, (fichas, ultimo) in self._buckets.items() if fichas + (ahora - ultimo) * self.tasa >= self.rafaga]
+        for cliente in llenos:
+            del self._buckets[cliente]
+
+    def metricas(self) -> dict:
+        return {"tasa": self.tasa, "rafaga": self.rafaga, "clientes": len(self._buckets), "limitadas": self.limitadas}
+
+
+class MiddlewareAdmision:
+    """
+    Aplica el límite por cliente y el control de admisión antes del router.
+    El cupo se libera al terminar de enviar la respuesta (los streams de
+    /ordenes/exportar lo ocupan mientras duran). ASGI puro, como el resto de
+    middlewares.
+
+    Las peticiones rechazadas no llegan a una ruta: en /metrics cuentan sin
+    ruta; el detalle por prioridad está en GET /monitoreo/admision.
+    """
+
+    def __init__(self, app: ASGIApp, control: Optional[ControlAdmision] = None, limitador: Optional[LimitadorClientes] = None):
+        self.app = app
+        self.control = control or control_admision
+        self.limitador = limitador or limitador_clientes
+
+    def _cliente(self, scope: Scope) -> str:
+        if ADMISION_CLIENTE_CABECERA:
+            for nombre, valor in scope["headers"]:
+                if nombre.decode("latin-1") == ADMISION_CLIENTE_CABECERA:
+                    return valor.decode("latin-1").split(",")[0].strip()
+        cliente = scope.get("client")
+        return cliente[0] if cliente else ""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        nivel = prioridad(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if nivel is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            self.limitador.consumir(self._cliente(scope))
+            await self.control.entrar(nivel)
+        except Rechazo as rechazo:
+            await _responder(send, rechazo)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.control.salir()
+
+
+async def _responder(send: Send, rechazo: Rechazo) -> None:
+    cuerpo = orjson.dumps({"detail": rechazo.detalle})
+    await send({
+        "type": "http.response.start",
+        "status": rechazo.codigo,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(cuerpo)).encode()),
+            (b"retry-after", str(rechazo.reintentar).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": cuerpo})
+
+
+# Instancias compartidas por el proceso
+control_admision = ControlAdmision()
+limitador_clientes = LimitadorClientes()
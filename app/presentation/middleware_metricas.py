@@ -0,0 +1,72 @@
+import time
+from fastapi.routing import APIRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Dict, Iterable, List, Tuple
+
+from app.data.sources.metricas_http import RegistroMetricas
+
+
+def plantillas_rutas(*routers) -> List[Tuple[str, str]]:
+    """(método, plantilla) de las rutas de los routers, en orden y sin repetir"""
+    vistas = {}
+    for router in routers:
+        for ruta in router.routes:
+            if isinstance(ruta, APIRoute):
+                for metodo in sorted(ruta.methods):
+                    vistas.setdefault((metodo, ruta.path), None)
+    return list(vistas)
+
+
+class MiddlewareMetricas:
+    """
+    Latencia, código de estado y peticiones en curso por ruta, más el estado
+    de los pools al terminar cada petición (ver metricas_http).
+
+    La ruta se identifica después de atenderla, con la que dejó el router en
+    el scope; su posición en el registro se calcula una sola vez por objeto de
+    ruta. ASGI puro: la latencia incluye el envío completo del cuerpo.
+    """
+
+    def __init__(self, app: ASGIApp, registro: RegistroMetricas, engines: Iterable = ()):
+        self.app = app
+        self.registro = registro
+        # [(índice en MOTORES, engine síncrono)]; el pool se lee en cada petición
+        # porque engine.dispose() lo reemplaza
+        self.engines = list(engines)
+        self._posiciones = {plantilla: registro.base_ruta(i) for i, plantilla in enumerate(registro.rutas)}
+        self._por_ruta: Dict[int, Tuple[object, Dict[str, int]]] = {}
+
+    def _base(self, ruta, metodo: str) -> int:
+        # Por id(): las rutas no siempre son hashables. Se guarda la ruta para
+        # que su id no se reutilice y se comprueba que sea el mismo objeto.
+        entrada = self._por_ruta.get(id(ruta))
+        if entrada is None or entrada[0] is not ruta:
+            entrada = self._por_ruta[id(ruta)] = (ruta, {
+                m: self._posiciones.get((m, ruta.path), self.registro.base_sin_ruta)
+                for m in getattr(ruta, "methods", None) or ()
+            })
+        return entrada[1].get(metodo, self.registro.base_sin_ruta)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.perf_counter()
+        codigo = 500
+
+        async def enviar(mensaje: Message) -> None:
+            nonlocal codigo
+            if mensaje["type"] == "http.response.start":
+                codigo = mensaje["status"]
+            await send(mensaje)
+
+        self.registro.iniciar()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            ruta = scope.get("route")
+            base = self.registro.base_sin_ruta if ruta is None else self._base(ruta, scope["method"])
+            self.registro.terminar(base, codigo, time.perf_counter() - inicio)
+            for motor, engine in self.engines:
+                self.registro.actualizar_pool(motor, engine.pool)
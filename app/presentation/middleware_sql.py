@@ -0,0 +1,62 @@
+import logging
+import os
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.data.sources.instrumentacion_sql import RegistroPeticion, registro_actual, estadisticas_sql
+
+# Con SQL_CABECERAS_DEBUG=true cada respuesta lleva X-SQL-Sentencias,
+# X-SQL-Tiempo-Ms y, si hubo formas repetidas, X-SQL-N-Mas-1 (solo depuración)
+SQL_CABECERAS_DEBUG = os.getenv("SQL_CABECERAS_DEBUG", "false").lower() in ("1", "true", "yes")
+
+logger = logging.getLogger(__name__)
+
+
+class MiddlewareSQL:
+    """
+    Abre un registro de sentencias por petición (lo llenan los eventos del
+    engine, ver instrumentacion_sql), lo acumula por ruta y avisa en el log
+    cuando una misma forma de sentencia se repite como en un N+1.
+
+    ASGI puro en lugar de BaseHTTPMiddleware: no crea otra tarea por petición
+    ni altera el streaming de /ordenes/exportar.
+    """
+
+    def __init__(self, app: ASGIApp, cabeceras: bool = SQL_CABECERAS_DEBUG):
+        self.app = app
+        self.cabeceras = cabeceras
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        registro = RegistroPeticion()
+        token = registro_actual.set(registro)
+
+        async def enviar(mensaje: Message) -> None:
+            # Las cabeceras salen con lo ejecutado hasta aquí; en una respuesta en
+            # streaming, lo que consulte después solo cuenta en las estadísticas
+            if mensaje["type"] == "http.response.start" and self.cabeceras:
+                cabeceras = MutableHeaders(scope=mensaje)
+                cabeceras["X-SQL-Sentencias"] = str(registro.sentencias)
+                cabeceras["X-SQL-Tiempo-Ms"] = f"{registro.tiempo * 1000:.1f}"
+                repetidas = registro.repetidas()
+                if repetidas:
+                    cabeceras["X-SQL-N-Mas-1"] = str(max(repetidas.values()))
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            registro_actual.reset(token)
+            ruta = scope.get("route")
+            nombre = f"{scope['method']} {ruta.path}" if ruta is not None else "(sin ruta)"
+            estadisticas_sql.registrar(nombre, registro)
+            repetidas = registro.repetidas()
+            if repetidas:
+                logger.warning(
+                    "Probable N+1 en %s (%d sentencias): %s",
+                    nombre, registro.sentencias,
+                    "; ".join(f"{n}x {forma[:200]}" for forma, n in repetidas.items())
+                )
@@ -0,0 +1,13 @@
+import orjson
+from fastapi import Response
+
+
+def respuesta_json(contenido) -> Response:
+    """
+    JSON codificado con orjson y devuelto tal cual.
+
+    Al recibir un Response, FastAPI no vuelve a validar el contenido contra el
+    `response_model` de la ruta (que se conserva para la documentación), así
+    que el contenido ya debe tener exactamente esa forma.
+    """
+    return Response(content=orjson.dumps(contenido), media_type="application/json")
@@ -0,0 +1,89 @@
+import os
+from datetime import date
+from itertools import chain
+from typing import Callable, List
+from sqlalchemy import func, select, text
+from app.data.repositories.orden_repository import OrdenRepository
+from app.data.sources import particiones
+from app.data.sources.archivo_ordenes import ARCHIVO_DIR, escribir_mes
+from app.data.sources.database import SessionLocal
+from app.domain.models.models import ParticionArchivada
+from app.services.venta_service import VentaService
+
+# Meses que se quedan en la base contando el actual; los anteriores se archivan
+ARCHIVO_MESES_ACTIVOS = max(1, int(os.getenv("ARCHIVO_MESES_ACTIVOS", "12")))
+
+
+class ArchivoService:
+    """Archivado de los meses viejos de ordenes (python -m app.comandos archivar)"""
+
+    @staticmethod
+    def archivar(
+        meses_activos: int = ARCHIVO_MESES_ACTIVOS,
+        borrar: bool = False,
+        simular: bool = False,
+        directorio: str = ARCHIVO_DIR,
+        avisar: Callable[[str], None] = print
+    ) -> List[date]:
+        """
+        Archiva cada mes anterior a los `meses_activos` más recientes: escribe
+        sus órdenes en `directorio` (ver archivo_ordenes.escribir_mes), revisa
+        que el archivo tenga todas y desprende sus particiones. Con `borrar`
+        las tablas desprendidas se eliminan; si no, quedan sueltas en la base
+        (ordenes_pAAAA_MM) para revisarlas y borrarlas a mano.
+
+        Cada mes va en su propia transacción y con sus particiones bloqueadas
+        contra escrituras mientras se exporta: si algo falla el mes sigue
+        adjunto y basta volver a correrlo. Los resúmenes de ventas no se tocan.
+        Devuelve los meses archivados (o los que se archivarían, con `simular`).
+        """
+        primer_mes_activo = particiones.sumar_meses(particiones.particion(date.today()).mes, 1 - max(1, meses_activos))
+        archivados = []
+        db = SessionLocal()
+        try:
+            viejos = [p for p in particiones.listar(db.connection()) if p.fin <= primer_mes_activo]
+            db.rollback()
+            for mes in viejos:
+                if simular:
+                    avisar(f"Se archivaría {mes.ordenes}")
+                    archivados.append(mes.mes)
+                    continue
+                try:
+                    ArchivoService._archivar_mes(db, mes, borrar, directorio, avisar)
+                except Exception:
+                    db.rollback()
+                    raise
+                archivados.append(mes.mes)
+        finally:
+            db.close()
+        return archivados
+
+    @staticmethod
+    def _archivar_mes(db, mes: particiones.Particion, borrar: bool, directorio: str, avisar) -> None:
+        db.execute(text(f'LOCK TABLE "{mes.ordenes}", "{mes.detalles}" IN SHARE MODE'))
+        ordenes = db.execute(select(func.count()).select_from(text(f'"{mes.ordenes}"'))).scalar_one()
+        # Los detalles sin producto no salen en OrdenResponse ni en el archivo
+        detalles = db.execute(
+            select(func.count()).select_from(text(f'"{mes.detalles}"')).where(text("producto_id IS NOT NULL"))
+        ).scalar_one()
+
+        lotes = OrdenRepository(db).iterar_filas_historial(desde=mes.mes, hasta=mes.fin)
+        manifiesto = escribir_mes(mes.mes, VentaService.ordenes_desde_filas(chain.from_iterable(lotes)), directorio)
+        if (manifiesto["ordenes"], manifiesto["detalles"]) != (ordenes, detalles):
+            raise RuntimeError(
+                f"{manifiesto['archivo']}: se escribieron {manifiesto['ordenes']} órdenes y "
+                f"{manifiesto['detalles']} detalles, la base tiene {ordenes} y {detalles}"
+            )
+
+        particiones.desprender(db.connection(), mes, borrar)
+        db.add(ParticionArchivada(
+            mes=mes.mes,
+            archivo=manifiesto["archivo"],
+            ordenes=ordenes,
+            detalles=detalles,
+            folio_min=manifiesto["folio_min"],
+            folio_max=manifiesto["folio_max"],
+            sha256=manifiesto["sha256"]
+        ))
+        db.commit()
+        avisar(f"{mes.ordenes}: {ordenes} órdenes en {manifiesto['archivo']}" + (" (tablas eliminadas)" if borrar else ""))
@@ -1,37 +1,54 @@
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from typing import Optional
 from fastapi import HTTPException, status
 import os
+import time
 
 from app.data.repositories.usuario_repository import UsuarioRepository
-from app.domain.schemas.auth_schemas import UsuarioRegister, UsuarioLogin
+from app.data.sources.cache_lru import CacheLRU
+from app.data.sources.database import SessionLocal
+from app.domain.schemas.auth_schemas import UsuarioRegister, UsuarioLogin, UsuarioResponse
 from app.domain.models.models import Usuario
-
-# Configuración de seguridad
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.services.hash_pool import ejecutor_hash
 
 # Configuración JWT - Desde variables de entorno
 SECRET_KEY = os.getenv("SECRET_KEY", "tu_clave_secreta_muy_segura_cambiala_en_produccion")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", str(60 * 24 * 7)))  # 7 días por defecto
 
+# Caché de autenticación: token → id de usuario (vive hasta que el token expira,
+# con tope AUTH_CACHE_TOKEN_TTL) e id → usuario (AUTH_CACHE_USUARIO_TTL segundos)
+AUTH_CACHE_MAX = int(os.getenv("AUTH_CACHE_MAX", "4096"))
+AUTH_CACHE_TOKEN_TTL = float(os.getenv("AUTH_CACHE_TOKEN_TTL", "3600"))
+AUTH_CACHE_USUARIO_TTL = float(os.getenv("AUTH_CACHE_USUARIO_TTL", "60"))
+
+cache_tokens = CacheLRU(AUTH_CACHE_MAX, AUTH_CACHE_TOKEN_TTL)
+cache_usuarios = CacheLRU(AUTH_CACHE_MAX, AUTH_CACHE_USUARIO_TTL)
+
+CREDENCIALES_INVALIDAS = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Token inválido o expirado",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
 class AuthService:
     
     @staticmethod
-    def hash_password(password: str) -> str:
-        """Hashea la contraseña"""
+    def recortar_password(password: str) -> str:
         # Bcrypt tiene un límite de 72 bytes, truncamos de manera segura
-        if len(password) > 72:
-            password = password[:72]
-        return pwd_context.hash(password)
+        return password[:72] if len(password) > 72 else password
+
+    @staticmethod
+    def hash_password(password: str) -> str:
+        """Hashea la contraseña (en el pool de procesos de bcrypt)"""
+        return ejecutor_hash.hashear(AuthService.recortar_password(password))
     
     @staticmethod
     def verificar_password(password_plano: str, password_hash: str) -> bool:
-        """Verifica que la contraseña coincida con el hash"""
-        return pwd_context.verify(password_plano, password_hash)
+        """Verifica que la contraseña coincida con el hash (en el pool de procesos de bcrypt)"""
+        return ejecutor_hash.verificar(password_plano, password_hash)
     
     @staticmethod
     def crear_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -46,6 +63,44 @@ class AuthService:
         encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
         return encoded_jwt
     
+    @staticmethod
+    def usuario_en_cache(token: str) -> Optional[UsuarioResponse]:
+        """Usuario dueño del token si token y usuario están en caché (sin decodificar ni consultar)"""
+        usuario_id = cache_tokens.obtener(token)
+        if usuario_id is None:
+            return None
+        return cache_usuarios.obtener(usuario_id)
+    
+    @staticmethod
+    def obtener_usuario_por_token(token: str) -> UsuarioResponse:
+        """Valida el JWT y devuelve su usuario, usando la caché y yendo a la BD solo si hace falta"""
+        usuario_id = cache_tokens.obtener(token)
+        if usuario_id is None:
+            try:
+                payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            except JWTError:
+                raise CREDENCIALES_INVALIDAS
+            usuario_id = payload.get("id")
+            if usuario_id is None:
+                raise CREDENCIALES_INVALIDAS
+            # La entrada caduca junto con el token
+            cache_tokens.guardar(token, usuario_id, ttl=payload["exp"] - time.time())
+        
+        usuario = cache_usuarios.obtener(usuario_id)
+        if usuario is None:
+            db = SessionLocal()
+            try:
+                usuario_bd = UsuarioRepository.obtener_por_id(db, usuario_id)
+                if not usuario_bd:
+                    cache_tokens.eliminar(token)
+                    raise CREDENCIALES_INVALIDAS
+                usuario = UsuarioResponse.model_validate(usuario_bd)
+            finally:
+                db.close()
+            cache_usuarios.guardar(usuario_id, usuario)
+        
+        return usuario
+    
     @staticmethod
     def registrar_usuario(db: Session, datos: UsuarioRegister) -> Usuario:
         """Registra un nuevo usuario"""
@@ -56,6 +111,9 @@ class AuthService:
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="El email ya está registrado"
             )
+        # La conexión vuelve al pool mientras se hashea (cola + ~250 ms de
+        # bcrypt); el INSERT toma otra
+        db.rollback()
         
         # Hashear la contraseña
         password_hash = AuthService.hash_password(datos.password)
@@ -71,29 +129,37 @@ class AuthService:
         return usuario
     
     @staticmethod
-    def autenticar_usuario(db: Session, datos: UsuarioLogin) -> tuple[Usuario, str]:
+    def autenticar_usuario(db: Session, datos: UsuarioLogin) -> tuple[UsuarioResponse, str]:
         """Autentica un usuario y devuelve el usuario y el token"""
         # Buscar el usuario por email
-        usuario = UsuarioRepository.obtener_por_email(db, datos.email)
-        
-        if not usuario:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Credenciales incorrectas",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+        usuario, password_hash = AuthService.datos_login(UsuarioRepository.obtener_por_email(db, datos.email))
+        # Se sueltan transacción y conexión antes de verificar: una ráfaga de
+        # logins no debe acaparar el pool que usan las ventas
+        db.rollback()
         
         # Verificar la contraseña
-        if not AuthService.verificar_password(datos.password, usuario.password_hash):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Credenciales incorrectas",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+        if not AuthService.verificar_password(datos.password, password_hash):
+            raise AuthService.credenciales_incorrectas()
         
-        # Crear el token
-        access_token = AuthService.crear_access_token(
-            data={"sub": usuario.email, "id": usuario.id}
+        return usuario, AuthService.token_de(usuario)
+    
+    # Piezas de autenticar_usuario compartidas con la versión async
+
+    @staticmethod
+    def datos_login(usuario_bd: Optional[Usuario]) -> tuple[UsuarioResponse, str]:
+        """(usuario, hash) leídos antes de cerrar la transacción; 401 si no existe"""
+        if not usuario_bd:
+            raise AuthService.credenciales_incorrectas()
+        return UsuarioResponse.model_validate(usuario_bd), usuario_bd.password_hash
+    
+    @staticmethod
+    def credenciales_incorrectas() -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Credenciales incorrectas",
+            headers={"WWW-Authenticate": "Bearer"},
         )
-        
-        return usuario, access_token
+    
+    @staticmethod
+    def token_de(usuario: UsuarioResponse) -> str:
+        return AuthService.crear_access_token(data={"sub": usuario.email, "id": usuario.id})
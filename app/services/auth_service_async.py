@@ -0,0 +1,51 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException, status
+
+from app.data.repositories.usuario_repository_async import UsuarioRepositoryAsync
+from app.domain.schemas.auth_schemas import UsuarioRegister, UsuarioLogin, UsuarioResponse
+from app.domain.models.models import Usuario
+from app.services.auth_service import AuthService
+from app.services.hash_pool import ejecutor_hash
+
+class AuthServiceAsync:
+    """
+    Versión asíncrona de AuthService. bcrypt corre en el pool de procesos y
+    su resultado se espera desde el event loop; la sesión suelta su conexión
+    antes, para no retenerla durante el hash.
+    """
+    
+    @staticmethod
+    async def registrar_usuario(db: AsyncSession, datos: UsuarioRegister) -> Usuario:
+        """Registra un nuevo usuario"""
+        # Verificar si el email ya existe
+        usuario_existente = await UsuarioRepositoryAsync.obtener_por_email(db, datos.email)
+        if usuario_existente:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="El email ya está registrado"
+            )
+        await db.rollback()
+        
+        # Hashear la contraseña
+        password_hash = await ejecutor_hash.hashear_async(AuthService.recortar_password(datos.password))
+        
+        # Crear el usuario
+        return await UsuarioRepositoryAsync.crear_usuario(
+            db=db,
+            email=datos.email,
+            nombre=datos.name,
+            password_hash=password_hash
+        )
+    
+    @staticmethod
+    async def autenticar_usuario(db: AsyncSession, datos: UsuarioLogin) -> tuple[UsuarioResponse, str]:
+        """Autentica un usuario y devuelve el usuario y el token"""
+        # Buscar el usuario por email
+        usuario, password_hash = AuthService.datos_login(await UsuarioRepositoryAsync.obtener_por_email(db, datos.email))
+        await db.rollback()
+        
+        # Verificar la contraseña
+        if not await ejecutor_hash.verificar_async(datos.password, password_hash):
+            raise AuthService.credenciales_incorrectas()
+        
+        return usuario, AuthService.token_de(usuario)
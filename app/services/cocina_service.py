@@ -0,0 +1,144 @@
+import asyncio
+import os
+import threading
+from typing import List, Optional, Set, Tuple
+
+import orjson
+
+from app.data.repositories.orden_repository import OrdenRepository
+from app.data.sources.database import SessionLocal
+from app.data.sources.eventos_ordenes import Evento, bus_ordenes
+from app.services.venta_service import VentaService
+
+# Eventos pendientes por pantalla; una pantalla que no los consume a tiempo se
+# desconecta y, al volver con Last-Event-ID, recupera lo que le faltó
+COCINA_COLA_MAX = int(os.getenv("COCINA_COLA_MAX", "1000"))
+# Máximo de órdenes que se reenvían al reanudar desde un folio
+COCINA_REANUDAR_MAX = int(os.getenv("COCINA_REANUDAR_MAX", "500"))
+
+# (tipo, folio, texto SSE ya formateado)
+EventoSSE = Tuple[str, int, str]
+
+
+def formato_sse(tipo: str, orden_id: int, datos: dict) -> str:
+    """
+    Evento SSE. Solo las órdenes nuevas llevan `id:`, así el Last-Event-ID
+    del navegador es siempre el folio de la última orden nueva recibida.
+    """
+    id_evento = f"id: {orden_id}\n" if tipo == "nueva" else ""
+    return f"{id_evento}event: {tipo}\ndata: {orjson.dumps(datos).decode()}\n\n"
+
+
+class Suscripcion:
+    """Cola de eventos de una pantalla conectada, en el event loop que la atiende"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.cola: "asyncio.Queue[Optional[EventoSSE]]" = asyncio.Queue()
+        self.desbordada = False
+
+    def entregar(self, eventos: List[EventoSSE]) -> None:
+        # Corre en el event loop de la suscripción
+        if self.desbordada:
+            return
+        if self.cola.qsize() + len(eventos) > COCINA_COLA_MAX:
+            # None cierra el stream; la pantalla se reconecta y reanuda
+            self.desbordada = True
+            self.cola.put_nowait(None)
+            return
+        for evento in eventos:
+            self.cola.put_nowait(evento)
+
+
+class FeedCocina:
+    """
+    Órdenes nuevas y canceladas para las pantallas de cocina.
+
+    Recibe los eventos del bus de órdenes (ver eventos_ordenes), carga una
+    sola vez por worker las órdenes nuevas con sus detalles (con la misma
+    forma que GET /ordenes/{id}), arma el texto SSE y lo reparte a todas las
+    pantallas conectadas a este worker.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._suscripciones: Set[Suscripcion] = set()
+        self._ultimo_id: Optional[int] = None
+
+    def suscribir(self) -> Suscripcion:
+        """Suscripción para el event loop actual; arranca el bus con la primera"""
+        suscripcion = Suscripcion(asyncio.get_running_loop())
+        with self._lock:
+            self._suscripciones.add(suscripcion)
+        bus_ordenes.escuchar(self._difundir, self._al_conectar)
+        return suscripcion
+
+    def cancelar(self, suscripcion: Suscripcion) -> None:
+        with self._lock:
+            self._suscripciones.discard(suscripcion)
+
+    @property
+    def pantallas(self) -> int:
+        return len(self._suscripciones)
+
+    @staticmethod
+    def pendientes(desde: int, limite: int = COCINA_REANUDAR_MAX) -> List[EventoSSE]:
+        """Órdenes posteriores al folio `desde`, de la más antigua a la más reciente"""
+        db = SessionLocal()
+        try:
+            filas = OrdenRepository(db).obtener_filas_posteriores(desde, limite)
+        finally:
+            db.close()
+        return [("nueva", orden["id"], formato_sse("nueva", orden["id"], orden)) for orden in VentaService.ordenes_desde_filas(filas)]
+
+    @staticmethod
+    def _cargar(ids: List[int]) -> List[EventoSSE]:
+        db = SessionLocal()
+        try:
+            filas = OrdenRepository(db).obtener_filas_ordenes(ids)
+        finally:
+            db.close()
+        ordenes = reversed(list(VentaService.ordenes_desde_filas(filas)))
+        return [("nueva", orden["id"], formato_sse("nueva", orden["id"], orden)) for orden in ordenes]
+
+    def _difundir(self, eventos: List[Evento]) -> None:
+        # Hilo del bus: un lote de eventos confirmados, ya sin repetidos
+        nuevas = sorted({orden_id for tipo, orden_id in eventos if tipo == "nueva"})
+        if nuevas:
+            self._ultimo_id = max(self._ultimo_id or 0, nuevas[-1])
+        with self._lock:
+            suscripciones = list(self._suscripciones)
+        if not suscripciones:
+            return
+
+        salida = self._cargar(nuevas) if nuevas else []
+        salida += [
+            ("cancelada", orden_id, formato_sse("cancelada", orden_id, {"id": orden_id}))
+            for tipo, orden_id in eventos if tipo == "cancelada"
+        ]
+        for suscripcion in suscripciones:
+            try:
+                suscripcion.loop.call_soon_threadsafe(suscripcion.entregar, salida)
+            except RuntimeError:
+                # Su event loop ya terminó
+                self.cancelar(suscripcion)
+
+    def _al_conectar(self) -> None:
+        # Hilo del bus, cada vez que el LISTEN queda activo. La primera vez
+        # solo se toma el último folio como referencia; tras un corte, las
+        # órdenes posteriores pudieron perderse y se vuelven a publicar (las
+        # que sí llegaron se descartan como repetidas en el bus). Las
+        # cancelaciones del corte no se recuperan.
+        if self._ultimo_id is None:
+            db = SessionLocal()
+            try:
+                self._ultimo_id = OrdenRepository(db).obtener_ultimo_folio()
+            finally:
+                db.close()
+            return
+        ids = [orden_id for _, orden_id, _ in self.pendientes(self._ultimo_id)]
+        bus_ordenes.publicar("nueva", ids)
+
+
+# Instancia compartida por el proceso
+feed_cocina = FeedCocina()
@@ -0,0 +1,261 @@
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from functools import partial
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.data.repositories.orden_repository import OrdenRepository
+from app.data.repositories.orden_repository_async import OrdenRepositoryAsync
+from app.data.sources.database import SessionLocal, AsyncSessionLocal
+from app.domain.models.models import Cliente, Orden, DetalleOrden
+
+# Commit agrupado de POST /ordenes/vender: las ventas ya validadas y con precio
+# se encolan y un escritor por worker las guarda juntas, con un solo commit
+# (un fsync) por grupo en lugar de uno por venta.
+VENTAS_GRUPO = os.getenv("VENTAS_GRUPO", "false").lower() in ("1", "true", "yes")
+# Máximo de ventas por commit
+VENTAS_GRUPO_MAX = int(os.getenv("VENTAS_GRUPO_MAX", "64"))
+# Milisegundos que el escritor espera a que se junten más ventas antes de
+# guardar; con 0 solo se agrupan las que llegan mientras se guarda el grupo anterior
+VENTAS_GRUPO_ESPERA_MS = float(os.getenv("VENTAS_GRUPO_ESPERA_MS", "2"))
+
+logger = logging.getLogger(__name__)
+
+# (datos_cliente, orden, detalles, al_confirmar)
+Pendiente = Tuple[object, Orden, List[DetalleOrden], Optional[Callable]]
+
+
+class EscritorVentas:
+    """
+    Hilo escritor de ventas de este worker (modo sync).
+
+    Cada venta espera su propio resultado: su (cliente, orden) con folio, o la
+    excepción que la hizo fallar. El grupo se guarda con las sentencias por
+    conjunto de `guardar_ventas_lote`; si falla, se reintenta venta por venta
+    para que el error quede solo en la que lo causó.
+
+    `al_confirmar(db, cliente, orden)` corre dentro de la transacción del
+    grupo, con la sesión del escritor (p. ej. la respuesta de una clave de
+    idempotencia).
+    """
+
+    def __init__(self, tamano: int = VENTAS_GRUPO_MAX, espera_ms: float = VENTAS_GRUPO_ESPERA_MS):
+        self.tamano = tamano
+        self.espera = espera_ms / 1000
+        self._cola: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._hilo: Optional[threading.Thread] = None
+        self.grupos = 0
+        self.ventas = 0
+        self.reintentos = 0
+
+    def guardar(self, datos_cliente, orden: Orden, detalles: List[DetalleOrden], al_confirmar=None) -> Tuple[Cliente, Orden]:
+        """Encola la venta y bloquea hasta que su grupo hace commit"""
+        futuro: Future = Future()
+        self._iniciar()
+        self._cola.put(((datos_cliente, orden, detalles, al_confirmar), futuro))
+        return futuro.result()
+
+    def _iniciar(self) -> None:
+        if self._hilo is not None:
+            return
+        with self._lock:
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._escribir, name="escritor-ventas", daemon=True)
+                self._hilo.start()
+
+    def detener(self) -> None:
+        """Guarda lo que quede en la cola y termina el hilo"""
+        with self._lock:
+            if self._hilo is None:
+                return
+            self._cola.put(None)
+            self._hilo.join(timeout=30)
+            self._hilo = None
+
+    def _juntar(self, primero) -> Tuple[list, bool]:
+        grupo, terminar = [primero], False
+        limite = time.monotonic() + self.espera
+        while len(grupo) < self.tamano:
+            try:
+                restante = limite - time.monotonic()
+                elemento = self._cola.get(timeout=restante) if restante > 0 else self._cola.get_nowait()
+            except queue.Empty:
+                break
+            if elemento is None:
+                terminar = True
+                break
+            grupo.append(elemento)
+        return grupo, terminar
+
+    def _escribir(self) -> None:
+        while True:
+            primero = self._cola.get()
+            if primero is None:
+                return
+            grupo, terminar = self._juntar(primero)
+            self._guardar_grupo(grupo)
+            if terminar:
+                return
+
+    def _guardar_grupo(self, grupo: List[Tuple[Pendiente, Future]]) -> None:
+        db = SessionLocal()
+        try:
+            repo = OrdenRepository(db)
+            try:
+                guardadas = repo.guardar_ventas_lote(
+                    [(datos, orden, detalles) for (datos, orden, detalles, _), _ in grupo],
+                    [partial(al_confirmar, db) if al_confirmar else None for (_, _, _, al_confirmar), _ in grupo]
+                )
+            except SQLAlchemyError:
+                self.reintentos += 1
+                for (datos, orden, detalles, al_confirmar), futuro in grupo:
+                    try:
+                        futuro.set_result(repo.guardar_venta(datos, orden, detalles, partial(al_confirmar, db) if al_confirmar else None))
+                    except Exception as e:
+                        futuro.set_exception(e)
+            except Exception as e:
+                for _, futuro in grupo:
+                    futuro.set_exception(e)
+            else:
+                for (_, futuro), guardada in zip(grupo, guardadas):
+                    futuro.set_result(guardada)
+            self.grupos += 1
+            self.ventas += len(grupo)
+        except BaseException as e:
+            # Nadie debe quedarse esperando para siempre
+            for _, futuro in grupo:
+                if not futuro.done():
+                    futuro.set_exception(e)
+            logger.exception("Error en el escritor de ventas")
+        finally:
+            db.close()
+
+    def metricas(self) -> dict:
+        return _metricas(self, self._cola.qsize())
+
+
+class EscritorVentasAsync:
+    """
+    Versión async de EscritorVentas (DB_MODO=async): una tarea en el event
+    loop del worker en lugar de un hilo, con una sesión de asyncpg.
+    `al_confirmar(db, cliente, orden)` es una corrutina.
+    """
+
+    def __init__(self, tamano: int = VENTAS_GRUPO_MAX, espera_ms: float = VENTAS_GRUPO_ESPERA_MS):
+        self.tamano = tamano
+        self.espera = espera_ms / 1000
+        self._cola: Optional[asyncio.Queue] = None
+        self._tarea: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.grupos = 0
+        self.ventas = 0
+        self.reintentos = 0
+
+    async def guardar(
+        self, datos_cliente, orden: Orden, detalles: List[DetalleOrden],
+        al_confirmar: Optional[Callable[..., Awaitable[None]]] = None
+    ) -> Tuple[Cliente, Orden]:
+        loop = asyncio.get_running_loop()
+        if self._tarea is None or self._loop is not loop:
+            self._loop, self._cola = loop, asyncio.Queue()
+            self._tarea = loop.create_task(self._escribir(self._cola))
+        futuro = loop.create_future()
+        self._cola.put_nowait(((datos_cliente, orden, detalles, al_confirmar), futuro))
+        return await futuro
+
+    async def detener(self) -> None:
+        if self._tarea is None or self._loop is not asyncio.get_running_loop():
+            return
+        self._cola.put_nowait(None)
+        await self._tarea
+        self._tarea = None
+
+    async def _escribir(self, cola: asyncio.Queue) -> None:
+        while True:
+            primero = await cola.get()
+            if primero is None:
+                return
+            # Si el grupo no está lleno se da `espera` para que se junten más
+            if self.espera > 0 and cola.qsize() < self.tamano - 1:
+                await asyncio.sleep(self.espera)
+            grupo, terminar = [primero], False
+            while len(grupo) < self.tamano and not cola.empty():
+                elemento = cola.get_nowait()
+                if elemento is None:
+                    terminar = True
+                    break
+                grupo.append(elemento)
+            await self._guardar_grupo(grupo)
+            if terminar:
+                return
+
+    async def _guardar_grupo(self, grupo: list) -> None:
+        try:
+            async with AsyncSessionLocal() as db:
+                repo = OrdenRepositoryAsync(db)
+                try:
+                    guardadas = await repo.guardar_ventas_lote(
+                        [(datos, orden, detalles) for (datos, orden, detalles, _), _ in grupo],
+                        [partial(al_confirmar, db) if al_confirmar else None for (_, _, _, al_confirmar), _ in grupo]
+                    )
+                except SQLAlchemyError:
+                    self.reintentos += 1
+                    for (datos, orden, detalles, al_confirmar), futuro in grupo:
+                        try:
+                            guardada = await repo.guardar_venta(datos, orden, detalles, partial(al_confirmar, db) if al_confirmar else None)
+                        except Exception as e:
+                            _resolver(futuro, excepcion=e)
+                        else:
+                            _resolver(futuro, guardada)
+                except Exception as e:
+                    for _, futuro in grupo:
+                        _resolver(futuro, excepcion=e)
+                else:
+                    for (_, futuro), guardada in zip(grupo, guardadas):
+                        _resolver(futuro, guardada)
+                self.grupos += 1
+                self.ventas += len(grupo)
+        except BaseException as e:
+            for _, futuro in grupo:
+                _resolver(futuro, excepcion=e)
+            if not isinstance(e, Exception):
+                raise
+            logger.exception("Error en el escritor de ventas")
+
+    def metricas(self) -> dict:
+        return _metricas(self, self._cola.qsize() if self._cola is not None else 0)
+
+
+def _metricas(escritor, en_cola: int) -> dict:
+    return {
+        "activo": VENTAS_GRUPO,
+        "tamano_max": escritor.tamano,
+        "espera_ms": escritor.espera * 1000,
+        "grupos": escritor.grupos,
+        "ventas": escritor.ventas,
+        "ventas_por_grupo": round(escritor.ventas / escritor.grupos, 2) if escritor.grupos else 0.0,
+        "grupos_reintentados": escritor.reintentos,
+        "en_cola": en_cola,
+    }
+
+
+def _resolver(futuro: asyncio.Future, resultado=None, excepcion: Optional[BaseException] = None) -> None:
+    # La petición pudo haberse cancelado (cliente desconectado) mientras esperaba
+    if futuro.done():
+        return
+    if excepcion is not None:
+        futuro.set_exception(excepcion)
+    else:
+        futuro.set_result(resultado)
+
+
+# Instancias compartidas por el proceso
+escritor_ventas = EscritorVentas()
+escritor_ventas_async = EscritorVentasAsync()
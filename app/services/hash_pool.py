@@ -0,0 +1,146 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+# Configuración de seguridad
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# Procesos dedicados a bcrypt (0 = ejecutar en el hilo de la petición)
+AUTH_HASH_PROCESOS = int(os.getenv("AUTH_HASH_PROCESOS", "2"))
+# Máximo de hashes en curso + en cola por worker; al llenarse se responde 503
+AUTH_HASH_MAX_COLA = int(os.getenv("AUTH_HASH_MAX_COLA", "16"))
+AUTH_HASH_RETRY_AFTER = int(os.getenv("AUTH_HASH_RETRY_AFTER", "1"))
+
+
+# Funciones que corren dentro de los procesos del pool. Devuelven también
+# cuándo empezaron y cuánto tardaron para separar espera en cola y cómputo.
+def _hashear(password: str):
+    inicio = time.time()
+    resultado = pwd_context.hash(password)
+    return resultado, inicio, time.time() - inicio
+
+
+def _verificar(password_plano: str, password_hash: str):
+    inicio = time.time()
+    resultado = pwd_context.verify(password_plano, password_hash)
+    return resultado, inicio, time.time() - inicio
+
+
+class EjecutorHash:
+    """
+    Pool de procesos acotado para bcrypt. Cada hash tarda ~250 ms de CPU;
+    sacarlo de los hilos de Starlette evita que una ráfaga de logins acapare
+    el thread pool y el GIL que comparten /menu y /ordenes/vender.
+    """
+
+    def __init__(self, procesos: int = AUTH_HASH_PROCESOS, max_cola: int = AUTH_HASH_MAX_COLA):
+        self.procesos = procesos
+        self.max_cola = max_cola
+        self._lock = threading.Lock()
+        self._executor = None
+        self._en_curso = 0
+        self.completados = 0
+        self.rechazados = 0
+        self.espera_total = 0.0
+        self.espera_max = 0.0
+        self.hash_total = 0.0
+
+    def _obtener_executor(self) -> ProcessPoolExecutor:
+        # Se crea con el primer uso (importar la app no arranca procesos).
+        # "spawn" evita heredar por fork los hilos y conexiones del servidor.
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.procesos,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def hashear(self, password: str) -> str:
+        return self._ejecutar(_hashear, password)
+
+    def verificar(self, password_plano: str, password_hash: str) -> bool:
+        return self._ejecutar(_verificar, password_plano, password_hash)
+
+    async def hashear_async(self, password: str) -> str:
+        return await self._ejecutar_async(_hashear, password)
+
+    async def verificar_async(self, password_plano: str, password_hash: str) -> bool:
+        return await self._ejecutar_async(_verificar, password_plano, password_hash)
+
+    def _ejecutar(self, funcion, *args):
+        self._reservar()
+        enviado = time.time()
+        try:
+            if self.procesos <= 0:
+                resultado, inicio, duracion = funcion(*args)
+            else:
+                resultado, inicio, duracion = self._obtener_executor().submit(funcion, *args).result()
+        finally:
+            self._liberar()
+        return self._registrar(resultado, inicio, duracion, enviado)
+
+    async def _ejecutar_async(self, funcion, *args):
+        """
+        Igual que `_ejecutar` pero esperando el futuro del pool desde el event
+        loop: no ocupa un hilo del thread pool mientras bcrypt trabaja.
+        """
+        self._reservar()
+        enviado = time.time()
+        try:
+            if self.procesos <= 0:
+                resultado, inicio, duracion = await asyncio.to_thread(funcion, *args)
+            else:
+                resultado, inicio, duracion = await asyncio.wrap_future(self._obtener_executor().submit(funcion, *args))
+        finally:
+            self._liberar()
+        return self._registrar(resultado, inicio, duracion, enviado)
+
+    def _reservar(self) -> None:
+        with self._lock:
+            if self._en_curso >= self.max_cola:
+                self.rechazados += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Servicio de autenticación saturado, intenta de nuevo",
+                    headers={"Retry-After": str(AUTH_HASH_RETRY_AFTER)}
+                )
+            self._en_curso += 1
+
+    def _liberar(self) -> None:
+        with self._lock:
+            self._en_curso -= 1
+
+    def _registrar(self, resultado, inicio: float, duracion: float, enviado: float):
+        espera = max(inicio - enviado, 0.0)
+        with self._lock:
+            self.completados += 1
+            self.espera_total += espera
+            self.hash_total += duracion
+            if espera > self.espera_max:
+                self.espera_max = espera
+        return resultado
+
+    def metricas(self) -> dict:
+        """Espera en cola contra tiempo de cómputo de bcrypt en este worker"""
+        with self._lock:
+            completados = self.completados
+            return {
+                "procesos": self.procesos,
+                "max_cola": self.max_cola,
+                "en_curso": self._en_curso,
+                "completados": completados,
+                "rechazados": self.rechazados,
+                "espera_promedio_ms": round(self.espera_total / completados * 1000, 3) if completados else 0.0,
+                "espera_max_ms": round(self.espera_max * 1000, 3),
+                "hash_promedio_ms": round(self.hash_total / completados * 1000, 3) if completados else 0.0,
+            }
+
+
+# Instancia compartida por el proceso
+ejecutor_hash = EjecutorHash()
@@ -0,0 +1,204 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from app.data.repositories.idempotencia_repository import IdempotenciaRepository, COMPLETADA
+from app.data.repositories.idempotencia_repository_async import IdempotenciaRepositoryAsync
+from app.data.sources.cache_lru import CacheLRU
+from app.domain.schemas.schemas import VentaResponse
+
+# Segundos que se recuerda la respuesta de una clave ya completada
+IDEMPOTENCIA_TTL = float(os.getenv("IDEMPOTENCIA_TTL", "86400"))
+# Segundos que dura la reserva de una clave en proceso; si el worker muere a
+# media venta, pasado este tiempo otra petición con la misma clave la retoma
+IDEMPOTENCIA_BLOQUEO = float(os.getenv("IDEMPOTENCIA_BLOQUEO", "60"))
+# Segundos que un duplicado espera a que termine la primera petición antes de responder 409
+IDEMPOTENCIA_ESPERA = float(os.getenv("IDEMPOTENCIA_ESPERA", "10"))
+IDEMPOTENCIA_CACHE_MAX = int(os.getenv("IDEMPOTENCIA_CACHE_MAX", "10000"))
+
+# Cada cuánto se vuelve a mirar la BD mientras otro worker procesa la clave
+_INTERVALO_SONDEO = 0.05
+
+
+def huella_peticion(datos: BaseModel) -> str:
+    """sha256 del cuerpo validado: detecta una clave reutilizada con otra venta"""
+    return hashlib.sha256(datos.model_dump_json().encode("utf-8")).hexdigest()
+
+
+class AlmacenIdempotencia:
+    """
+    Claves de idempotencia de POST /ordenes/vender, en dos niveles:
+
+    - en memoria: las respuestas ya completadas (LRU con TTL) y un evento por
+      clave en curso, para que un duplicado en el mismo worker espere sin
+      tocar la BD;
+    - en la tabla claves_idempotencia, para que varios workers no registren
+      la misma venta. La respuesta se guarda en la misma transacción que la
+      venta, así que nunca hay venta sin respuesta que repetir ni al revés.
+
+    Si la venta falla la reserva se borra y el cliente puede reintentar.
+    """
+
+    def __init__(self):
+        self._respuestas = CacheLRU(IDEMPOTENCIA_CACHE_MAX, IDEMPOTENCIA_TTL)
+        self._lock = threading.Lock()
+        self._en_curso: Dict[str, threading.Event] = {}
+        self._en_curso_async: Dict[str, asyncio.Event] = {}
+
+    # --- sesión síncrona ---
+
+    def ejecutar(
+        self,
+        db: Session,
+        clave: str,
+        huella: str,
+        registrar: Callable[[Callable[..., None]], VentaResponse]
+    ) -> Tuple[VentaResponse, bool]:
+        """
+        Ejecuta `registrar` una sola vez por clave. `registrar` recibe la
+        función que guarda la respuesta y debe llamarla antes de su commit;
+        si la venta se guarda con otra sesión (commit agrupado, ver
+        escritor_ventas) se le pasa esa sesión como `db_venta`.
+        Devuelve (respuesta, repetida).
+        """
+        while True:
+            repetida = self._respuesta_local(clave, huella)
+            if repetida is not None:
+                return repetida, True
+            with self._lock:
+                evento = self._en_curso.get(clave)
+                propia = evento is None
+                if propia:
+                    evento = self._en_curso[clave] = threading.Event()
+            if propia:
+                break
+            if not evento.wait(IDEMPOTENCIA_ESPERA):
+                raise self._en_proceso()
+
+        try:
+            repo = IdempotenciaRepository(db)
+            limite = time.monotonic() + IDEMPOTENCIA_ESPERA
+            while not repo.reservar(clave, huella, datetime.now() + timedelta(seconds=IDEMPOTENCIA_BLOQUEO)):
+                repetida = self._respuesta_guardada(clave, huella, repo.obtener(clave), limite)
+                if repetida is not None:
+                    return repetida, True
+                time.sleep(_INTERVALO_SONDEO)
+
+            def completar(respuesta: VentaResponse, db_venta: Optional[Session] = None) -> None:
+                repo_venta = repo if db_venta is None else IdempotenciaRepository(db_venta)
+                repo_venta.completar(clave, respuesta.model_dump_json(), self._expiracion())
+
+            try:
+                respuesta = registrar(completar)
+            except Exception:
+                repo.liberar(clave)
+                raise
+            self._respuestas.guardar(clave, (huella, respuesta))
+            return respuesta, False
+        finally:
+            with self._lock:
+                del self._en_curso[clave]
+            evento.set()
+
+    # --- sesión asíncrona ---
+
+    async def ejecutar_async(
+        self,
+        db: AsyncSession,
+        clave: str,
+        huella: str,
+        registrar: Callable[[Callable[..., Awaitable[None]]], Awaitable[VentaResponse]]
+    ) -> Tuple[VentaResponse, bool]:
+        """Igual que `ejecutar`, con una sesión asíncrona (un solo event loop por worker)"""
+        while True:
+            repetida = self._respuesta_local(clave, huella)
+            if repetida is not None:
+                return repetida, True
+            evento = self._en_curso_async.get(clave)
+            if evento is None:
+                evento = self._en_curso_async[clave] = asyncio.Event()
+                break
+            try:
+                await asyncio.wait_for(evento.wait(), IDEMPOTENCIA_ESPERA)
+            except asyncio.TimeoutError:
+                raise self._en_proceso()
+
+        try:
+            repo = IdempotenciaRepositoryAsync(db)
+            limite = time.monotonic() + IDEMPOTENCIA_ESPERA
+            while not await repo.reservar(clave, huella, datetime.now() + timedelta(seconds=IDEMPOTENCIA_BLOQUEO)):
+                repetida = self._respuesta_guardada(clave, huella, await repo.obtener(clave), limite)
+                if repetida is not None:
+                    return repetida, True
+                await asyncio.sleep(_INTERVALO_SONDEO)
+
+            async def completar(respuesta: VentaResponse, db_venta: Optional[AsyncSession] = None) -> None:
+                repo_venta = repo if db_venta is None else IdempotenciaRepositoryAsync(db_venta)
+                await repo_venta.completar(clave, respuesta.model_dump_json(), self._expiracion())
+
+            try:
+                respuesta = await registrar(completar)
+            except Exception:
+                await repo.liberar(clave)
+                raise
+            self._respuestas.guardar(clave, (huella, respuesta))
+            return respuesta, False
+        finally:
+            del self._en_curso_async[clave]
+            evento.set()
+
+    # --- comunes ---
+
+    def _respuesta_local(self, clave: str, huella: str):
+        guardada = self._respuestas.obtener(clave)
+        if guardada is None:
+            return None
+        huella_guardada, respuesta = guardada
+        self._validar_huella(huella_guardada, huella)
+        return respuesta
+
+    def _respuesta_guardada(self, clave: str, huella: str, fila, limite: float):
+        """Respuesta de una clave que ya reservó otra petición; None si hay que seguir esperando"""
+        if fila is None:
+            # La reserva se liberó entre el INSERT y el SELECT: se vuelve a intentar
+            return None
+        huella_guardada, estado, respuesta = fila
+        self._validar_huella(huella_guardada, huella)
+        if estado == COMPLETADA:
+            respuesta = VentaResponse.model_validate_json(respuesta)
+            self._respuestas.guardar(clave, (huella_guardada, respuesta))
+            return respuesta
+        if time.monotonic() >= limite:
+            raise self._en_proceso()
+        return None
+
+    @staticmethod
+    def _validar_huella(huella_guardada: str, huella: str) -> None:
+        if huella_guardada != huella:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="La clave de idempotencia ya se usó con una venta diferente"
+            )
+
+    @staticmethod
+    def _en_proceso() -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Una venta con esta clave de idempotencia sigue en proceso, intenta de nuevo",
+            headers={"Retry-After": "1"}
+        )
+
+    @staticmethod
+    def _expiracion() -> datetime:
+        return datetime.now() + timedelta(seconds=IDEMPOTENCIA_TTL)
+
+
+# Instancia compartida por el proceso
+almacen_idempotencia = AlmacenIdempotencia()
@@ -3,7 +3,7 @@ from fastapi import HTTPException, status
 from app.data.repositories.producto_repository import ProductoRepository
 from app.domain.schemas.producto_schemas import ProductoCreate, ProductoUpdate
 from app.domain.models.models import Producto
-from typing import List
+from typing import List, Tuple
 
 class ProductoService:
     
@@ -12,6 +12,11 @@ class ProductoService:
         """Obtiene todos los productos"""
         return ProductoRepository.obtener_todos(db)
     
+    @staticmethod
+    def obtener_catalogo(db: Session) -> Tuple[str, bytes]:
+        """Catálogo serializado y su ETag; cambia cada vez que se escribe un producto"""
+        return ProductoRepository.obtener_catalogo(db)
+    
     @staticmethod
     def obtener_producto(db: Session, producto_id: int) -> Producto:
         """Obtiene un producto por ID"""
@@ -0,0 +1,115 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException, status
+from app.data.repositories.producto_repository_async import ProductoRepositoryAsync
+from app.domain.schemas.producto_schemas import ProductoCreate, ProductoUpdate
+from app.domain.models.models import Producto
+from typing import List, Tuple
+
+class ProductoServiceAsync:
+    """Versión asíncrona de ProductoService"""
+    
+    @staticmethod
+    async def listar_productos(db: AsyncSession) -> List[Producto]:
+        """Obtiene todos los productos"""
+        return await ProductoRepositoryAsync.obtener_todos(db)
+    
+    @staticmethod
+    async def obtener_catalogo(db: AsyncSession) -> Tuple[str, bytes]:
+        """Catálogo serializado y su ETag; cambia cada vez que se escribe un producto"""
+        return await ProductoRepositoryAsync.obtener_catalogo(db)
+    
+    @staticmethod
+    async def obtener_producto(db: AsyncSession, producto_id: int) -> Producto:
+        """Obtiene un producto por ID"""
+        producto = await ProductoRepositoryAsync.obtener_por_id(db, producto_id)
+        if not producto:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Producto con ID {producto_id} no encontrado"
+            )
+        return producto
+    
+    @staticmethod
+    async def crear_producto(db: AsyncSession, datos: ProductoCreate) -> Producto:
+        """Crea un nuevo producto"""
+        # Verificar si ya existe un producto con ese nombre
+        producto_existente = await ProductoRepositoryAsync.obtener_por_nombre(db, datos.nombre)
+        if producto_existente:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Ya existe un producto con el nombre '{datos.nombre}'"
+            )
+        
+        try:
+            return await ProductoRepositoryAsync.crear_producto(
+                db=db,
+                nombre=datos.nombre,
+                precio=datos.precio
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error al crear producto: {str(e)}"
+            )
+    
+    @staticmethod
+    async def actualizar_producto(db: AsyncSession, producto_id: int, datos: ProductoUpdate) -> Producto:
+        """Actualiza un producto existente"""
+        # Verificar que el producto existe
+        producto_existente = await ProductoRepositoryAsync.obtener_por_id(db, producto_id)
+        if not producto_existente:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Producto con ID {producto_id} no encontrado"
+            )
+        
+        # Si se está actualizando el nombre, verificar que no exista otro producto con ese nombre
+        if datos.nombre and datos.nombre != producto_existente.nombre:
+            producto_con_nombre = await ProductoRepositoryAsync.obtener_por_nombre(db, datos.nombre)
+            if producto_con_nombre:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Ya existe un producto con el nombre '{datos.nombre}'"
+                )
+        
+        try:
+            return await ProductoRepositoryAsync.actualizar_producto(
+                db=db,
+                producto_id=producto_id,
+                nombre=datos.nombre,
+                precio=datos.precio
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error al actualizar producto: {str(e)}"
+            )
+    
+    @staticmethod
+    async def eliminar_producto(db: AsyncSession, producto_id: int) -> dict:
+        """Elimina un producto"""
+        # Verificar que el producto existe
+        producto = await ProductoRepositoryAsync.obtener_por_id(db, producto_id)
+        if not producto:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Producto con ID {producto_id} no encontrado"
+            )
+        
+        nombre = producto.nombre
+        try:
+            eliminado = await ProductoRepositoryAsync.eliminar_producto(db, producto_id)
+            if eliminado:
+                return {"mensaje": f"Producto '{nombre}' eliminado exitosamente"}
+            else:
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail="Error al eliminar el producto"
+                )
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error al eliminar producto: {str(e)}"
+            )
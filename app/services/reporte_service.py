@@ -0,0 +1,48 @@
+from datetime import date, datetime, time, timedelta
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+from typing import List, Optional, Tuple
+from app.data.repositories.reporte_repository import ReporteRepository
+from app.domain.schemas.reporte_schemas import VentaDiariaResponse, VentaProductoResponse, VentaHoraResponse
+
+# Días que cubre un reporte cuando no se indica el rango
+DIAS_REPORTE_DEFECTO = 30
+
+class ReporteService:
+    """Reportes de ventas leídos de las tablas de resumen (no recorren ordenes)"""
+
+    @staticmethod
+    def _rango(desde: Optional[date], hasta: Optional[date]) -> Tuple[date, date]:
+        hasta = hasta or date.today()
+        desde = desde or hasta - timedelta(days=DIAS_REPORTE_DEFECTO - 1)
+        if desde > hasta:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="'desde' no puede ser posterior a 'hasta'"
+            )
+        return desde, hasta
+
+    @staticmethod
+    def ventas_diarias(db: Session, desde: Optional[date] = None, hasta: Optional[date] = None) -> List[VentaDiariaResponse]:
+        """Órdenes y total vendido por día (días sin ventas no aparecen)"""
+        desde, hasta = ReporteService._rango(desde, hasta)
+        return [VentaDiariaResponse.model_validate(fila) for fila in ReporteRepository(db).ventas_por_dia(desde, hasta)]
+
+    @staticmethod
+    def ventas_por_producto(db: Session, desde: Optional[date] = None, hasta: Optional[date] = None) -> List[VentaProductoResponse]:
+        """Unidades e ingreso por producto en el rango, del que más vende al que menos"""
+        desde, hasta = ReporteService._rango(desde, hasta)
+        return [
+            VentaProductoResponse(producto_id=pid, producto_nombre=nombre, unidades=unidades, ingreso=ingreso)
+            for pid, nombre, unidades, ingreso in ReporteRepository(db).ventas_por_producto(desde, hasta)
+        ]
+
+    @staticmethod
+    def ventas_por_hora(db: Session, desde: Optional[date] = None, hasta: Optional[date] = None) -> List[VentaHoraResponse]:
+        """Órdenes y total vendido por hora, para los días del rango (ambos incluidos)"""
+        desde, hasta = ReporteService._rango(desde, hasta)
+        filas = ReporteRepository(db).ventas_por_hora(
+            datetime.combine(desde, time.min),
+            datetime.combine(hasta + timedelta(days=1), time.min)
+        )
+        return [VentaHoraResponse.model_validate(fila) for fila in filas]
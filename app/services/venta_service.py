@@ -1,23 +1,129 @@
 from fastapi import HTTPException, status
-from datetime import datetime
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
-from typing import List
+from datetime import date
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import csv
+import io
+import json
 from app.data.repositories.orden_repository import OrdenRepository
-from app.domain.models.models import Orden, DetalleOrden
-from app.domain.schemas.schemas import VentaCreate, VentaResponse
-from app.domain.schemas.venta_schemas import OrdenResponse, DetalleOrdenResponse
+from app.data.sources.replica import abrir_sesion_lectura
+from app.domain.models.models import Cliente, Orden, DetalleOrden
+from app.domain.schemas.schemas import VentaCreate, VentaResponse, VentaLoteCreate, VentaLoteResponse, ResultadoVentaLote
+from app.services.escritor_ventas import VENTAS_GRUPO, escritor_ventas
+from app.services.idempotencia import almacen_idempotencia, huella_peticion
+
+# Columnas del export CSV (una fila por detalle de orden)
+COLUMNAS_EXPORTACION_CSV = [
+    "folio", "fecha", "cliente", "total_venta", "pago_cliente", "cambio", "estatus",
+    "producto_id", "producto", "cantidad", "precio_unitario", "subtotal"
+]
 
 class VentaService:
     def __init__(self, db: Session):
         self.repo = OrdenRepository(db)
 
-    def registrar_venta(self, datos: VentaCreate) -> VentaResponse:
+    def registrar_venta(self, datos: VentaCreate, clave_idempotencia: Optional[str] = None) -> Tuple[VentaResponse, bool]:
+        """
+        Registra la venta y devuelve (ticket, repetida). Con `clave_idempotencia`
+        un reintento de la misma venta devuelve el ticket original sin volver a
+        registrarla (repetida=True).
+        """
+        if clave_idempotencia is None:
+            return self._registrar_venta(datos), False
+        return almacen_idempotencia.ejecutar(
+            self.repo.db, clave_idempotencia, huella_peticion(datos),
+            lambda guardar_respuesta: self._registrar_venta(datos, guardar_respuesta)
+        )
+
+    def _registrar_venta(self, datos: VentaCreate, guardar_respuesta=None) -> VentaResponse:
+        # 1. Todos los precios de la venta en una sola consulta (o ninguna, si están en caché)
+        precios = self.repo.obtener_precios_productos(item.producto_id for item in datos.items)
+
+        # 2. Calcular total, detalles y cambio
+        nueva_orden, lista_detalles_bd = self.preparar_orden(datos, precios)
+
+        # 3. Guardar cliente, orden y detalles en una sola transacción
+        #    (y la respuesta de la clave de idempotencia, si hay). Con
+        #    VENTAS_GRUPO la transacción es la del grupo del escritor
+        al_confirmar = None
+        if VENTAS_GRUPO:
+            if guardar_respuesta is not None:
+                al_confirmar = lambda db, cliente, orden: guardar_respuesta(self.crear_ticket(cliente, orden), db)
+            cliente_bd, orden_guardada = escritor_ventas.guardar(datos.cliente, nueva_orden, lista_detalles_bd, al_confirmar)
+        else:
+            if guardar_respuesta is not None:
+                al_confirmar = lambda cliente, orden: guardar_respuesta(self.crear_ticket(cliente, orden))
+            cliente_bd, orden_guardada = self.repo.guardar_venta(datos.cliente, nueva_orden, lista_detalles_bd, al_confirmar)
+
+        # 4. Retornar el Ticket
+        return self.crear_ticket(cliente_bd, orden_guardada)
+    
+    def registrar_lote(self, lote: VentaLoteCreate) -> VentaLoteResponse:
+        """
+        Registra varias ventas con sentencias por conjunto (precios, clientes,
+        cabeceras y detalles) y un solo commit. Cada venta tiene su resultado:
+        una venta inválida no impide que se registren las demás.
+        """
+        precios = self.repo.obtener_precios_productos(
+            item.producto_id for venta in lote.ventas for item in venta.items
+        )
+        resultados: List[Optional[ResultadoVentaLote]] = [None] * len(lote.ventas)
+        validas = self.preparar_lote(lote.ventas, precios, resultados)
+        if validas:
+            try:
+                guardadas = self.repo.guardar_ventas_lote(
+                    [(datos.cliente, orden, detalles) for _, datos, orden, detalles in validas]
+                )
+            except SQLAlchemyError:
+                # Una venta rompió el INSERT conjunto (p. ej. un producto borrado
+                # a media sincronización): se guardan una por una para aislarla
+                guardadas = []
+                for indice, datos, orden, detalles in validas:
+                    try:
+                        guardadas.append(self.repo.guardar_venta(datos.cliente, orden, detalles))
+                    except SQLAlchemyError as e:
+                        guardadas.append(None)
+                        resultados[indice] = ResultadoVentaLote(
+                            indice=indice, exito=False, error=f"Error al guardar la venta: {getattr(e, 'orig', e)}"
+                        )
+            self.completar_resultados(validas, guardadas, resultados)
+        return self.respuesta_lote(resultados)
+
+    @staticmethod
+    def preparar_lote(ventas: List[VentaCreate], precios: Dict[int, float], resultados: list) -> list:
+        """(indice, datos, orden, detalles) de las ventas válidas; las inválidas quedan en `resultados`"""
+        validas = []
+        for indice, datos in enumerate(ventas):
+            try:
+                orden, detalles = VentaService.preparar_orden(datos, precios)
+            except HTTPException as e:
+                resultados[indice] = ResultadoVentaLote(indice=indice, exito=False, error=e.detail)
+                continue
+            validas.append((indice, datos, orden, detalles))
+        return validas
+
+    @staticmethod
+    def completar_resultados(validas: list, guardadas: list, resultados: list) -> None:
+        for (indice, _, _, _), guardada in zip(validas, guardadas):
+            if guardada is not None:
+                resultados[indice] = ResultadoVentaLote(indice=indice, exito=True, ticket=VentaService.crear_ticket(*guardada))
+
+    @staticmethod
+    def respuesta_lote(resultados: List[ResultadoVentaLote]) -> VentaLoteResponse:
+        exitosas = sum(1 for r in resultados if r.exito)
+        return VentaLoteResponse(exitosas=exitosas, fallidas=len(resultados) - exitosas, resultados=resultados)
+    
+    @staticmethod
+    def preparar_orden(datos: VentaCreate, precios: Dict[int, float]) -> Tuple[Orden, List[DetalleOrden]]:
+        """Calcula total, detalles y cambio de una venta validando productos y pago"""
         # 1. Calcular el Total
         total_calculado = 0.0
         lista_detalles_bd = []
 
         for item in datos.items:
-            precio_unitario = self.repo.obtener_precio_producto(item.producto_id)
+            precio_unitario = precios.get(item.producto_id, 0.0)
             
             # Validación: ¿Existe la pizza?
             if precio_unitario == 0:
@@ -38,116 +144,190 @@ class VentaService:
         if datos.pago_cliente < total_calculado:
             raise HTTPException(status_code=400, detail="Dinero insuficiente para pagar")
 
-        cambio = datos.pago_cliente - total_calculado
-
-        # 3. Gestionar Cliente (Busca o Crea)
-        cliente_bd = self.repo.obtener_o_crear_cliente(datos.cliente)
-
-        # 4. Crear Objeto Orden
+        # 3. Crear Objeto Orden
         nueva_orden = Orden(
-            cliente_id=cliente_bd.id,
             total_venta=total_calculado,
             pago_cliente=datos.pago_cliente,
-            cambio=cambio
+            cambio=datos.pago_cliente - total_calculado
         )
-
-        # 5. Guardar todo en BD
-        orden_guardada = self.repo.guardar_orden(nueva_orden, lista_detalles_bd)
-
-        # 6. Retornar el Ticket
+        return nueva_orden, lista_detalles_bd
+    
+    @staticmethod
+    def crear_ticket(cliente: Cliente, orden: Orden) -> VentaResponse:
+        """Arma el ticket de una venta ya guardada"""
         return VentaResponse(
-            folio=orden_guardada.id,
-            cliente=cliente_bd.nombre,
-            fecha=str(datetime.now()),
-            total=total_calculado,
-            pago=datos.pago_cliente,
-            cambio=cambio,
+            folio=orden.id,
+            cliente=cliente.nombre,
+            fecha=str(orden.fecha),
+            total=orden.total_venta,
+            pago=orden.pago_cliente,
+            cambio=orden.cambio,
             mensaje="¡Venta Exitosa! 🍕"
         )
     
-    def obtener_historial(self) -> List[OrdenResponse]:
-        """Obtiene el historial de todas las órdenes"""
-        ordenes = self.repo.obtener_todas_ordenes()
-        resultado = []
-        
-        for orden in ordenes:
-            detalles = [
-                DetalleOrdenResponse(
-                    producto_id=detalle.producto_id,
-                    producto_nombre=detalle.producto.nombre,
-                    cantidad=detalle.cantidad,
-                    precio_unitario=detalle.producto.precio,
-                    subtotal=detalle.subtotal
-                )
-                for detalle in orden.detalles
-            ]
-            
-            resultado.append(OrdenResponse(
-                id=orden.id,
-                cliente_nombre=orden.cliente.nombre,
-                fecha=orden.fecha.isoformat() if orden.fecha else None,
-                total_venta=orden.total_venta,
-                pago_cliente=orden.pago_cliente,
-                cambio=orden.cambio,
-                estatus=orden.estatus,
-                detalles=detalles
-            ))
-        
-        return resultado
+    def obtener_historial(self, limite: int = 50, despues_de: Optional[int] = None) -> dict:
+        """
+        Obtiene una página del historial de órdenes, ya con la forma de
+        HistorialResponse (ver `ordenes_desde_filas`)
+        """
+        # Pedimos una orden de más para saber si existe otra página
+        filas = self.repo.obtener_filas_historial(limite + 1, despues_de)
+        return self.pagina_historial(list(self.ordenes_desde_filas(filas)), limite)
     
-    def obtener_orden_por_id(self, orden_id: int) -> OrdenResponse:
-        """Obtiene una orden específica por ID"""
-        orden = self.repo.obtener_orden_por_id(orden_id)
-        
-        if not orden:
+    def buscar_ordenes(
+        self,
+        limite: int = 50,
+        despues_de: Optional[int] = None,
+        desde: Optional[date] = None,
+        hasta: Optional[date] = None,
+        estatus: Optional[str] = None,
+        cliente_id: Optional[int] = None,
+        telefono: Optional[str] = None,
+        producto_id: Optional[int] = None
+    ) -> dict:
+        """Página de las órdenes que cumplen todos los filtros dados, con la forma de HistorialResponse"""
+        condiciones = self.condiciones_busqueda(desde, hasta, estatus, cliente_id, telefono, producto_id)
+        filas = self.repo.obtener_filas_historial(limite + 1, despues_de, condiciones)
+        return self.pagina_historial(list(self.ordenes_desde_filas(filas)), limite)
+    
+    @staticmethod
+    def condiciones_busqueda(desde, hasta, estatus, cliente_id, telefono, producto_id) -> list:
+        if desde is not None and hasta is not None and desde > hasta:
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Orden con ID {orden_id} no encontrada"
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="'desde' no puede ser posterior a 'hasta'"
             )
+        return OrdenRepository.condiciones_busqueda(
+            desde, hasta, estatus.upper() if estatus else None, cliente_id, telefono, producto_id
+        )
+    
+    def obtener_orden_por_id(self, orden_id: int) -> dict:
+        """
+        Obtiene una orden específica por ID, con la forma de OrdenResponse. Si
+        no está en la base se busca en los meses archivados.
+        """
+        filas = self.repo.obtener_filas_orden(orden_id)
+        if not filas:
+            archivada = self.repo.obtener_orden_archivada(orden_id)
+            if archivada is not None:
+                return archivada
+        return self.orden_o_404(filas, orden_id)
+    
+    @staticmethod
+    def pagina_historial(ordenes: List[dict], limite: int) -> dict:
+        hay_mas = len(ordenes) > limite
+        ordenes = ordenes[:limite]
+        return {"ordenes": ordenes, "siguiente_cursor": ordenes[-1]["id"] if hay_mas else None}
+    
+    @staticmethod
+    def orden_o_404(filas: list, orden_id: int) -> dict:
+        for orden in VentaService.ordenes_desde_filas(filas):
+            return orden
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Orden con ID {orden_id} no encontrada"
+        )
+    
+    @staticmethod
+    def ordenes_desde_filas(filas: Iterable) -> Iterator[dict]:
+        """
+        Agrupa filas planas (una por detalle, con las órdenes contiguas) en
+        diccionarios con la forma exacta de OrdenResponse.
+
+        Es la ruta rápida de lectura: sin objetos ORM ni modelos de pydantic.
+        Los tipos ya vienen de las columnas, así que validar otra vez no aporta
+        nada; los controladores codifican el resultado directamente.
+        """
+        orden_actual = None
+        for (orden_id, fecha, cliente, total, pago, cambio, estatus,
+             producto_id, producto, cantidad, precio, subtotal) in filas:
+            if orden_actual is None or orden_actual["id"] != orden_id:
+                if orden_actual is not None:
+                    yield orden_actual
+                orden_actual = {
+                    "id": orden_id,
+                    "cliente_nombre": cliente,
+                    "fecha": fecha.isoformat() if fecha else None,
+                    "total_venta": total,
+                    "pago_cliente": pago,
+                    "cambio": cambio,
+                    "estatus": estatus,
+                    "detalles": []
+                }
+            if producto_id is not None:
+                orden_actual["detalles"].append({
+                    "producto_id": producto_id,
+                    "producto_nombre": producto,
+                    "cantidad": cantidad,
+                    "precio_unitario": precio,
+                    "subtotal": subtotal
+                })
+        if orden_actual is not None:
+            yield orden_actual
+    
+    @staticmethod
+    def exportar_historial(formato: str, tamano_lote: int = 1000, primaria: bool = False) -> Iterator[str]:
+        """
+        Genera el historial completo en NDJSON (una orden por línea) o CSV
+        (una fila por detalle), en trozos de `tamano_lote` filas.
+
+        Abre su propia sesión porque el generador se consume mientras la
+        respuesta se envía, después de que la dependencia `get_db` terminó;
+        en la réplica de lectura si la hay (ver replica.abrir_sesion_lectura).
+        """
+        db = abrir_sesion_lectura(primaria)
+        try:
+            lotes = OrdenRepository(db).iterar_filas_historial(tamano_lote)
+            if formato == "csv":
+                yield from VentaService._lotes_csv(lotes)
+            else:
+                yield from VentaService._lotes_ndjson(lotes)
+        finally:
+            db.close()
+    
+    @staticmethod
+    def _lotes_csv(lotes) -> Iterator[str]:
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer)
+        escritor.writerow(COLUMNAS_EXPORTACION_CSV)
+        yield buffer.getvalue()
         
-        detalles = [
-            DetalleOrdenResponse(
-                producto_id=detalle.producto_id,
-                producto_nombre=detalle.producto.nombre,
-                cantidad=detalle.cantidad,
-                precio_unitario=detalle.producto.precio,
-                subtotal=detalle.subtotal
+        for lote in lotes:
+            buffer.seek(0)
+            buffer.truncate(0)
+            escritor.writerows(
+                (fila[0], fila[1].isoformat() if fila[1] else "", *fila[2:])
+                for fila in lote
             )
-            for detalle in orden.detalles
-        ]
-        
-        return OrdenResponse(
-            id=orden.id,
-            cliente_nombre=orden.cliente.nombre,
-            fecha=orden.fecha.isoformat() if orden.fecha else None,
-            total_venta=orden.total_venta,
-            pago_cliente=orden.pago_cliente,
-            cambio=orden.cambio,
-            estatus=orden.estatus,
-            detalles=detalles
-        )
+            yield buffer.getvalue()
+    
+    @staticmethod
+    def _lotes_ndjson(lotes, ordenes_por_trozo: int = 500) -> Iterator[str]:
+        # Las filas llegan ordenadas por folio, así que una orden termina
+        # cuando aparece la siguiente aunque sus detalles crucen de lote
+        lineas = []
+        for orden in VentaService.ordenes_desde_filas(chain.from_iterable(lotes)):
+            lineas.append(json.dumps(orden, ensure_ascii=False))
+            if len(lineas) >= ordenes_por_trozo:
+                yield "\n".join(lineas) + "\n"
+                lineas = []
+        if lineas:
+            yield "\n".join(lineas) + "\n"
     
     def eliminar_orden(self, orden_id: int) -> dict:
         """Elimina una orden del sistema"""
-        orden = self.repo.obtener_orden_por_id(orden_id)
-        
-        if not orden:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Orden con ID {orden_id} no encontrada"
-            )
-        
+        # El DELETE ... RETURNING del repositorio ya dice si la orden existía
         try:
             eliminado = self.repo.eliminar_orden(orden_id)
-            if eliminado:
-                return {"mensaje": f"Orden #{orden_id} eliminada exitosamente"}
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="Error al eliminar la orden"
-                )
-        except Exception as e:
+        except SQLAlchemyError as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Error al eliminar orden: {str(e)}"
-            )
\ No newline at end of file
+            )
+        
+        if not eliminado:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Orden con ID {orden_id} no encontrada"
+            )
+        return {"mensaje": f"Orden #{orden_id} eliminada exitosamente"}
\ No newline at end of file
@@ -0,0 +1,112 @@
+from datetime import date
+from fastapi import HTTPException, status
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Tuple
+from app.data.repositories.orden_repository_async import OrdenRepositoryAsync
+from app.domain.schemas.schemas import VentaCreate, VentaResponse, VentaLoteCreate, VentaLoteResponse, ResultadoVentaLote
+from app.services.escritor_ventas import VENTAS_GRUPO, escritor_ventas_async
+from app.services.idempotencia import almacen_idempotencia, huella_peticion
+from app.services.venta_service import VentaService
+
+class VentaServiceAsync:
+    """Versión asíncrona de VentaService; comparte con ella el cálculo y el armado de respuestas"""
+
+    def __init__(self, db: AsyncSession):
+        self.repo = OrdenRepositoryAsync(db)
+
+    async def registrar_venta(self, datos: VentaCreate, clave_idempotencia: Optional[str] = None) -> Tuple[VentaResponse, bool]:
+        """Registra la venta y devuelve (ticket, repetida); ver VentaService.registrar_venta"""
+        if clave_idempotencia is None:
+            return await self._registrar_venta(datos), False
+        return await almacen_idempotencia.ejecutar_async(
+            self.repo.db, clave_idempotencia, huella_peticion(datos),
+            lambda guardar_respuesta: self._registrar_venta(datos, guardar_respuesta)
+        )
+
+    async def _registrar_venta(self, datos: VentaCreate, guardar_respuesta=None) -> VentaResponse:
+        precios = await self.repo.obtener_precios_productos(item.producto_id for item in datos.items)
+        nueva_orden, lista_detalles_bd = VentaService.preparar_orden(datos, precios)
+        al_confirmar = None
+        if VENTAS_GRUPO:
+            if guardar_respuesta is not None:
+                al_confirmar = lambda db, cliente, orden: guardar_respuesta(VentaService.crear_ticket(cliente, orden), db)
+            cliente_bd, orden_guardada = await escritor_ventas_async.guardar(datos.cliente, nueva_orden, lista_detalles_bd, al_confirmar)
+        else:
+            if guardar_respuesta is not None:
+                al_confirmar = lambda cliente, orden: guardar_respuesta(VentaService.crear_ticket(cliente, orden))
+            cliente_bd, orden_guardada = await self.repo.guardar_venta(datos.cliente, nueva_orden, lista_detalles_bd, al_confirmar)
+        return VentaService.crear_ticket(cliente_bd, orden_guardada)
+    
+    async def registrar_lote(self, lote: VentaLoteCreate) -> VentaLoteResponse:
+        """Registra varias ventas con sentencias por conjunto; ver VentaService.registrar_lote"""
+        precios = await self.repo.obtener_precios_productos(
+            item.producto_id for venta in lote.ventas for item in venta.items
+        )
+        resultados: List[Optional[ResultadoVentaLote]] = [None] * len(lote.ventas)
+        validas = VentaService.preparar_lote(lote.ventas, precios, resultados)
+        if validas:
+            try:
+                guardadas = await self.repo.guardar_ventas_lote(
+                    [(datos.cliente, orden, detalles) for _, datos, orden, detalles in validas]
+                )
+            except SQLAlchemyError:
+                guardadas = []
+                for indice, datos, orden, detalles in validas:
+                    try:
+                        guardadas.append(await self.repo.guardar_venta(datos.cliente, orden, detalles))
+                    except SQLAlchemyError as e:
+                        guardadas.append(None)
+                        resultados[indice] = ResultadoVentaLote(
+                            indice=indice, exito=False, error=f"Error al guardar la venta: {getattr(e, 'orig', e)}"
+                        )
+            VentaService.completar_resultados(validas, guardadas, resultados)
+        return VentaService.respuesta_lote(resultados)
+    
+    async def obtener_historial(self, limite: int = 50, despues_de: Optional[int] = None) -> dict:
+        """Obtiene una página del historial de órdenes (ver VentaService.obtener_historial)"""
+        filas = await self.repo.obtener_filas_historial(limite + 1, despues_de)
+        return VentaService.pagina_historial(list(VentaService.ordenes_desde_filas(filas)), limite)
+    
+    async def buscar_ordenes(
+        self,
+        limite: int = 50,
+        despues_de: Optional[int] = None,
+        desde: Optional[date] = None,
+        hasta: Optional[date] = None,
+        estatus: Optional[str] = None,
+        cliente_id: Optional[int] = None,
+        telefono: Optional[str] = None,
+        producto_id: Optional[int] = None
+    ) -> dict:
+        """Página de las órdenes que cumplen los filtros (ver VentaService.buscar_ordenes)"""
+        condiciones = VentaService.condiciones_busqueda(desde, hasta, estatus, cliente_id, telefono, producto_id)
+        filas = await self.repo.obtener_filas_historial(limite + 1, despues_de, condiciones)
+        return VentaService.pagina_historial(list(VentaService.ordenes_desde_filas(filas)), limite)
+    
+    async def obtener_orden_por_id(self, orden_id: int) -> dict:
+        """Obtiene una orden específica por ID, con la forma de OrdenResponse (o del archivo; ver VentaService)"""
+        filas = await self.repo.obtener_filas_orden(orden_id)
+        if not filas:
+            archivada = await self.repo.obtener_orden_archivada(orden_id)
+            if archivada is not None:
+                return archivada
+        return VentaService.orden_o_404(filas, orden_id)
+    
+    async def eliminar_orden(self, orden_id: int) -> dict:
+        """Elimina una orden del sistema"""
+        # El DELETE ... RETURNING del repositorio ya dice si la orden existía
+        try:
+            eliminado = await self.repo.eliminar_orden(orden_id)
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error al eliminar orden: {str(e)}"
+            )
+        
+        if not eliminado:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Orden con ID {orden_id} no encontrada"
+            )
+        return {"mensaje": f"Orden #{orden_id} eliminada exitosamente"}
@@ -0,0 +1,133 @@
+"""
+Benchmark: tiempo de arranque de un worker.
+
+Mide, en intérpretes nuevos (sin cachés del proceso):
+  - importar `main` (lo que paga cada worker y cada --reload antes de atender);
+  - que importar `main` funcione con la base de datos apagada (importar no debe
+    hacer I/O);
+  - arranque en frío de uvicorn: hasta que responde /openapi.json (escuchando)
+    y hasta el primer /menu con datos, y la latencia de ese primer /menu (con
+    el catálogo precalentado en el lifespan debería costar lo mismo que los
+    siguientes).
+
+Uso (desde la raíz del proyecto, con la base levantada y migrada):
+    python benchmarks/bench_arranque.py --repeticiones 5
+    python benchmarks/bench_arranque.py --max-importacion-ms 1500   # falla si se pasa (CI)
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MEDIR_IMPORTACION = (
+    "import time; inicio = time.perf_counter(); import main; "
+    "print(time.perf_counter() - inicio)"
+)
+
+
+def medir_importacion(env: dict) -> float:
+    salida = subprocess.run(
+        [sys.executable, "-c", MEDIR_IMPORTACION],
+        cwd=RAIZ, env=env, capture_output=True, text=True, check=True
+    )
+    return float(salida.stdout.strip().splitlines()[-1])
+
+
+def importa_sin_bd() -> bool:
+    # Puerto 1 en localhost: cualquier intento de conexión falla de inmediato
+    env = dict(os.environ, DB_HOST="127.0.0.1", DB_PORT="1")
+    try:
+        medir_importacion(env)
+        return True
+    except subprocess.CalledProcessError:
+        return False
+
+
+def esperar(url: str, limite: float) -> float:
+    while time.perf_counter() < limite:
+        try:
+            if httpx.get(url).status_code == 200:
+                return time.perf_counter()
+        except httpx.TransportError:
+            pass
+        time.sleep(0.01)
+    raise RuntimeError(f"{url} no respondió a tiempo")
+
+
+def medir_arranque(puerto: int, env: dict) -> dict:
+    inicio = time.perf_counter()
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(puerto), "--log-level", "warning"],
+        cwd=RAIZ, env=env
+    )
+    try:
+        escuchando = esperar(f"http://127.0.0.1:{puerto}/openapi.json", inicio + 60)
+        antes = time.perf_counter()
+        respuesta = httpx.get(f"http://127.0.0.1:{puerto}/menu")
+        primer_menu = time.perf_counter()
+        respuesta.raise_for_status()
+        httpx.get(f"http://127.0.0.1:{puerto}/menu")
+        segundo_menu = time.perf_counter() - primer_menu
+    finally:
+        proceso.terminate()
+        proceso.wait()
+    return {
+        "hasta_escuchar_ms": (escuchando - inicio) * 1000,
+        "hasta_primer_menu_ms": (primer_menu - inicio) * 1000,
+        "primer_menu_ms": (primer_menu - antes) * 1000,
+        "segundo_menu_ms": segundo_menu * 1000,
+    }
+
+
+def resumir(valores) -> dict:
+    return {"mediana": round(statistics.median(valores), 1), "min": round(min(valores), 1), "max": round(max(valores), 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--puerto", type=int, default=8766)
+    parser.add_argument("--modo", choices=("sync", "async"), default=os.getenv("DB_MODO", "sync"))
+    parser.add_argument("--max-importacion-ms", type=float, help="termina con error si la mediana de importación lo supera")
+    parser.add_argument("--salida", help="archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    env = dict(os.environ, DB_MODO=args.modo)
+    importacion = [medir_importacion(env) * 1000 for _ in range(args.repeticiones)]
+    arranques = [medir_arranque(args.puerto, env) for _ in range(args.repeticiones)]
+
+    resultados = {
+        "modo": args.modo,
+        "repeticiones": args.repeticiones,
+        "importa_sin_bd": importa_sin_bd(),
+        "importar_main_ms": resumir(importacion),
+        **{clave: resumir([a[clave] for a in arranques]) for clave in arranques[0]},
+    }
+
+    print(f"\nmodo={args.modo} repeticiones={args.repeticiones}\n")
+    print(f"{'medida':<24}{'mediana':>10}{'min':>10}{'max':>10}")
+    for clave, valor in resultados.items():
+        if isinstance(valor, dict):
+            print(f"{clave:<24}{valor['mediana']:>10}{valor['min']:>10}{valor['max']:>10}")
+    print(f"\nimportar sin base de datos: {'ok' if resultados['importa_sin_bd'] else 'FALLA (la importación hace I/O)'}")
+
+    if args.salida:
+        with open(args.salida, "w") as f:
+            json.dump(resultados, f, indent=2)
+
+    if not resultados["importa_sin_bd"]:
+        sys.exit(1)
+    if args.max_importacion_ms and resultados["importar_main_ms"]["mediana"] > args.max_importacion_ms:
+        print(f"La importación ({resultados['importar_main_ms']['mediana']} ms) supera {args.max_importacion_ms} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
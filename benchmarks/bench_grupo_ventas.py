@@ -0,0 +1,134 @@
+"""
+Benchmark: POST /ordenes/vender con un commit por petición contra el commit
+agrupado (VENTAS_GRUPO=true, ver app/services/escritor_ventas.py).
+
+Siembra la base igual que carga.py y levanta un uvicorn por configuración:
+una con VENTAS_GRUPO=false y una con VENTAS_GRUPO=true por cada espera de
+--espera-ms. Cada una recibe exactamente la misma secuencia de ventas
+(--semilla) a cada nivel de concurrencia. Al final imprime peticiones/s y
+latencias, la diferencia contra el commit por petición y cuántas ventas se
+juntaron por commit (de /monitoreo/ventas).
+
+El beneficio depende sobre todo de lo que cuesta un commit (fsync del WAL):
+en un disco lento o con synchronous_commit=on remoto es mayor; con fsync=off
+casi no hay diferencia.
+
+Uso (desde la raíz del proyecto):
+    pip install httpx
+    python benchmarks/bench_grupo_ventas.py --bd-embebida --concurrencia 1,16,64,128
+    python benchmarks/bench_grupo_ventas.py --espera-ms 0,2,5 --grupo-max 64 --modo async --salida grupo.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+from datetime import datetime
+
+import httpx
+
+from carga import (
+    Contexto, PostgresEmbebido, binarios_postgres, cambio, commit_actual,
+    detener_servidor, levantar_servidor, medir, sembrar
+)
+
+
+def configuraciones(args) -> list:
+    """(nombre, variables de entorno) de cada servidor a medir"""
+    salida = [("por_peticion", {"VENTAS_GRUPO": "false"})]
+    for espera in args.espera_ms.split(","):
+        salida.append((f"grupo_{espera}ms", {
+            "VENTAS_GRUPO": "true",
+            "VENTAS_GRUPO_MAX": str(args.grupo_max),
+            "VENTAS_GRUPO_ESPERA_MS": espera,
+        }))
+    return salida
+
+
+def imprimir(resultados: list) -> None:
+    base = {r["concurrencia"]: r for r in resultados if r["configuracion"] == "por_peticion"}
+    print(f"\n{'configuración':<16}{'conc':>6}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errores':>9}{'Δ req/s':>10}{'Δ p99':>9}{'ventas/commit':>15}")
+    for r in resultados:
+        anterior = base[r["concurrencia"]]
+        print(
+            f"{r['configuracion']:<16}{r['concurrencia']:>6}{r['req_s']:>10}{r['p50_ms']:>10}{r['p99_ms']:>10}{r['errores']:>9}"
+            f"{cambio(anterior['req_s'], r['req_s']):>10}{cambio(anterior['p99_ms'], r['p99_ms']):>9}{r['ventas_por_commit']:>15}"
+        )
+
+
+def ventas_por_commit(base_url: str, antes: dict) -> float:
+    # Solo del worker que contestó; con --workers 1 es el servidor completo
+    despues = httpx.get(f"{base_url}/monitoreo/ventas").json()
+    grupos = despues["grupos"] - antes["grupos"]
+    return round((despues["ventas"] - antes["ventas"]) / grupos, 2) if grupos else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bd-embebida", action="store_true", help="usar un Postgres temporal")
+    parser.add_argument("--pg-bin", help="directorio con initdb/pg_ctl para --bd-embebida")
+    parser.add_argument("--limpiar", action="store_true", help="vaciar órdenes y clientes de la base del .env antes de sembrar")
+    parser.add_argument("--productos", type=int, default=50)
+    parser.add_argument("--clientes", type=int, default=2000)
+    parser.add_argument("--ordenes", type=int, default=2000)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--concurrencia", default="1,16,64", help="niveles separados por coma")
+    parser.add_argument("--duracion", type=float, default=10.0, help="segundos medidos por configuración y nivel")
+    parser.add_argument("--calentamiento", type=float, default=2.0)
+    parser.add_argument("--grupo-max", type=int, default=64, help="VENTAS_GRUPO_MAX")
+    parser.add_argument("--espera-ms", default="0,2", help="valores de VENTAS_GRUPO_ESPERA_MS a medir, separados por coma")
+    parser.add_argument("--modo", choices=("sync", "async"), default=os.getenv("DB_MODO", "sync"))
+    parser.add_argument("--workers", type=int, default=1, help="workers de uvicorn")
+    parser.add_argument("--puerto", type=int, default=8768)
+    parser.add_argument("--salida", help="archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    niveles = [int(n) for n in args.concurrencia.split(",")]
+    base_url = f"http://127.0.0.1:{args.puerto}"
+    embebido = None
+    resultados = []
+    try:
+        env = dict(os.environ, DB_MODO=args.modo)
+        if args.bd_embebida:
+            embebido = PostgresEmbebido(binarios_postgres(args.pg_bin))
+            env.update(embebido.iniciar())
+        os.environ.update(env)
+        datos = sembrar(args)
+
+        for nombre, variables in configuraciones(args):
+            servidor = levantar_servidor(args.puerto, dict(env, **variables), args.workers)
+            try:
+                for nivel in niveles:
+                    # Un contexto nuevo por medición: misma secuencia de ventas en todas
+                    contexto = Contexto(base_url, args.semilla, args.clientes)
+                    antes = httpx.get(f"{base_url}/monitoreo/ventas").json()
+                    resultado = asyncio.run(medir(base_url, contexto, "vender", nivel, args.duracion, args.calentamiento))
+                    resultado.update(configuracion=nombre, ventas_por_commit=ventas_por_commit(base_url, antes))
+                    resultados.append(resultado)
+                    print(f"  {nombre} x{nivel}: {resultado['req_s']} req/s")
+            finally:
+                detener_servidor(servidor)
+    finally:
+        if embebido is not None:
+            embebido.detener()
+
+    imprimir(resultados)
+
+    if args.salida:
+        with open(args.salida, "w") as f:
+            json.dump({
+                "fecha": datetime.now().isoformat(timespec="seconds"),
+                "commit": commit_actual(),
+                "python": platform.python_version(),
+                "modo": args.modo,
+                "workers": args.workers,
+                "grupo_max": args.grupo_max,
+                "duracion_s": args.duracion,
+                "semilla": args.semilla,
+                "datos": datos,
+                "resultados": resultados,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
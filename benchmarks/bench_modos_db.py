@@ -0,0 +1,120 @@
+"""
+Benchmark: throughput del modo síncrono (psycopg2 + thread pool) contra el
+modo asíncrono (asyncpg + handlers `async def`).
+
+Levanta un uvicorn por modo (DB_MODO=sync y DB_MODO=async) contra la base de
+datos configurada en el .env y le manda carga con httpx a la concurrencia
+indicada. Al final imprime una tabla con peticiones/s y latencias por modo.
+
+Uso (desde la raíz del proyecto, con la base levantada):
+    pip install httpx
+    python benchmarks/bench_modos_db.py --concurrencia 64 --duracion 15
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+VENTA = {
+    "cliente": {"nombre": "Benchmark", "telefono": "0000000000", "direccion": "Local"},
+    "items": [{"producto_id": 1, "cantidad": 2}, {"producto_id": 2, "cantidad": 1}],
+    "pago_cliente": 1000.0
+}
+
+ESCENARIOS = {
+    "GET /menu": ("GET", "/menu", None),
+    "GET /ordenes/historial": ("GET", "/ordenes/historial?limit=20", None),
+    "POST /ordenes/vender": ("POST", "/ordenes/vender", VENTA),
+}
+
+
+def levantar_servidor(modo: str, puerto: int) -> subprocess.Popen:
+    env = dict(os.environ, DB_MODO=modo)
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(puerto), "--log-level", "warning"],
+        cwd=RAIZ, env=env
+    )
+    url = f"http://127.0.0.1:{puerto}/menu"
+    for _ in range(100):
+        try:
+            if httpx.get(url).status_code == 200:
+                return proceso
+        except httpx.TransportError:
+            pass
+        time.sleep(0.1)
+    proceso.terminate()
+    raise RuntimeError(f"El servidor en modo {modo} no respondió")
+
+
+async def medir(base_url: str, metodo: str, ruta: str, cuerpo, concurrencia: int, duracion: float) -> dict:
+    latencias = []
+    errores = 0
+    limite = time.perf_counter() + duracion
+
+    async def trabajador(cliente: httpx.AsyncClient):
+        nonlocal errores
+        while time.perf_counter() < limite:
+            inicio = time.perf_counter()
+            respuesta = await cliente.request(metodo, ruta, json=cuerpo)
+            latencias.append(time.perf_counter() - inicio)
+            if respuesta.status_code >= 400:
+                errores += 1
+
+    limites = httpx.Limits(max_connections=concurrencia)
+    async with httpx.AsyncClient(base_url=base_url, limits=limites, timeout=60) as cliente:
+        inicio = time.perf_counter()
+        await asyncio.gather(*(trabajador(cliente) for _ in range(concurrencia)))
+        transcurrido = time.perf_counter() - inicio
+
+    latencias.sort()
+    return {
+        "peticiones": len(latencias),
+        "errores": errores,
+        "req_s": round(len(latencias) / transcurrido, 1),
+        "p50_ms": round(statistics.median(latencias) * 1000, 2),
+        "p99_ms": round(latencias[int(len(latencias) * 0.99) - 1] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrencia", type=int, default=64)
+    parser.add_argument("--duracion", type=float, default=10.0, help="segundos por escenario")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--salida", help="archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    resultados = {}
+    for modo in ("sync", "async"):
+        servidor = levantar_servidor(modo, args.puerto)
+        try:
+            for nombre, (metodo, ruta, cuerpo) in ESCENARIOS.items():
+                resultados[(modo, nombre)] = asyncio.run(medir(
+                    f"http://127.0.0.1:{args.puerto}", metodo, ruta, cuerpo, args.concurrencia, args.duracion
+                ))
+        finally:
+            servidor.terminate()
+            servidor.wait()
+
+    print(f"\nconcurrencia={args.concurrencia} duracion={args.duracion}s por escenario\n")
+    print(f"{'escenario':<26}{'modo':<7}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'errores':>9}")
+    for nombre in ESCENARIOS:
+        for modo in ("sync", "async"):
+            r = resultados[(modo, nombre)]
+            print(f"{nombre:<26}{modo:<7}{r['req_s']:>9}{r['p50_ms']:>9}{r['p99_ms']:>9}{r['errores']:>9}")
+
+    if args.salida:
+        with open(args.salida, "w") as f:
+            json.dump([{"modo": m, "escenario": e, **r} for (m, e), r in resultados.items()], f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Benchmark: costo de leer y serializar el historial de órdenes, antes y después
+de la ruta rápida (tuplas de columnas + diccionarios + orjson).
+
+Antes: objetos ORM con select-in (4 consultas por página), OrdenResponse por
+orden, revalidación contra el response_model (lo que hacía FastAPI al recibir
+un modelo) y json.dumps de JSONResponse.
+Después: una consulta de tuplas por página, diccionarios con la forma de la
+respuesta y orjson, sin revalidar.
+
+Recorre las `--ordenes` más recientes en páginas de `--limite` y reporta, por
+cada 10k órdenes, la mediana de las repeticiones de cada etapa.
+
+Uso (desde la raíz del proyecto, con la base levantada y con órdenes):
+    python benchmarks/bench_serializacion.py --ordenes 10000 --limite 500
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import orjson
+from pydantic import TypeAdapter
+from sqlalchemy.orm import selectinload
+
+from app.data.repositories.orden_repository import OrdenRepository
+from app.data.sources.database import SessionLocal
+from app.domain.models.models import Orden, DetalleOrden
+from app.domain.schemas.venta_schemas import DetalleOrdenResponse, HistorialResponse, OrdenResponse
+from app.services.venta_service import VentaService
+
+VALIDADOR = TypeAdapter(HistorialResponse)
+
+
+def pagina_orm(db, limite, despues_de):
+    """La consulta de antes: órdenes ORM con cliente, detalles y productos precargados"""
+    consulta = db.query(Orden).options(
+        selectinload(Orden.cliente),
+        selectinload(Orden.detalles).selectinload(DetalleOrden.producto)
+    )
+    if despues_de is not None:
+        consulta = consulta.filter(Orden.id < despues_de)
+    return consulta.order_by(Orden.id.desc()).limit(limite + 1).all()
+
+
+def orden_a_respuesta(orden) -> OrdenResponse:
+    return OrdenResponse(
+        id=orden.id,
+        cliente_nombre=orden.cliente.nombre,
+        fecha=orden.fecha.isoformat() if orden.fecha else None,
+        total_venta=orden.total_venta,
+        pago_cliente=orden.pago_cliente,
+        cambio=orden.cambio,
+        estatus=orden.estatus,
+        detalles=[
+            DetalleOrdenResponse(
+                producto_id=d.producto_id,
+                producto_nombre=d.producto.nombre,
+                cantidad=d.cantidad,
+                precio_unitario=d.producto.precio,
+                subtotal=d.subtotal
+            )
+            for d in orden.detalles
+        ]
+    )
+
+
+def medir_antes(limite: int, total: int) -> dict:
+    tiempos = dict.fromkeys(("consulta", "armado", "validacion", "codificacion"), 0.0)
+    db = SessionLocal()
+    try:
+        despues_de, leidas, bytes_ = None, 0, 0
+        while leidas < total:
+            t0 = time.perf_counter()
+            ordenes = pagina_orm(db, limite, despues_de)
+            t1 = time.perf_counter()
+            hay_mas = len(ordenes) > limite
+            ordenes = ordenes[:limite]
+            respuesta = HistorialResponse(
+                ordenes=[orden_a_respuesta(o) for o in ordenes],
+                siguiente_cursor=ordenes[-1].id if hay_mas else None
+            )
+            t2 = time.perf_counter()
+            contenido = VALIDADOR.dump_python(VALIDADOR.validate_python(respuesta), mode="json")
+            t3 = time.perf_counter()
+            cuerpo = json.dumps(contenido, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+            t4 = time.perf_counter()
+            for etapa, segundos in zip(tiempos, (t1 - t0, t2 - t1, t3 - t2, t4 - t3)):
+                tiempos[etapa] += segundos
+            leidas += len(ordenes)
+            bytes_ += len(cuerpo)
+            db.expunge_all()
+            if not hay_mas:
+                break
+            despues_de = respuesta.siguiente_cursor
+    finally:
+        db.close()
+    return {"ordenes": leidas, "bytes": bytes_, **tiempos}
+
+
+def medir_despues(limite: int, total: int) -> dict:
+    tiempos = dict.fromkeys(("consulta", "armado", "validacion", "codificacion"), 0.0)
+    db = SessionLocal()
+    try:
+        repo = OrdenRepository(db)
+        despues_de, leidas, bytes_ = None, 0, 0
+        while leidas < total:
+            t0 = time.perf_counter()
+            filas = repo.obtener_filas_historial(limite + 1, despues_de)
+            t1 = time.perf_counter()
+            respuesta = VentaService.pagina_historial(list(VentaService.ordenes_desde_filas(filas)), limite)
+            t2 = time.perf_counter()
+            cuerpo = orjson.dumps(respuesta)
+            t3 = time.perf_counter()
+            for etapa, segundos in zip(("consulta", "armado", "codificacion"), (t1 - t0, t2 - t1, t3 - t2)):
+                tiempos[etapa] += segundos
+            leidas += len(respuesta["ordenes"])
+            bytes_ += len(cuerpo)
+            if respuesta["siguiente_cursor"] is None:
+                break
+            despues_de = respuesta["siguiente_cursor"]
+    finally:
+        db.close()
+    return {"ordenes": leidas, "bytes": bytes_, **tiempos}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ordenes", type=int, default=10000)
+    parser.add_argument("--limite", type=int, default=500, help="órdenes por página (máximo de la API: 500)")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--salida", help="archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    # Una vuelta de calentamiento por ruta (conexiones, cachés de compilación de SQL)
+    medir_antes(args.limite, args.limite)
+    medir_despues(args.limite, args.limite)
+
+    resultados = {}
+    for nombre, medir in (("antes", medir_antes), ("despues", medir_despues)):
+        corridas = [medir(args.limite, args.ordenes) for _ in range(args.repeticiones)]
+        ordenes = corridas[0]["ordenes"]
+        por_10k = 10000 / ordenes if ordenes else 0.0
+        resultados[nombre] = {
+            "ordenes": ordenes,
+            "bytes": corridas[0]["bytes"],
+            **{
+                f"{etapa}_ms_por_10k": round(statistics.median(c[etapa] for c in corridas) * 1000 * por_10k, 1)
+                for etapa in ("consulta", "armado", "validacion", "codificacion")
+            },
+        }
+        r = resultados[nombre]
+        r["serializacion_ms_por_10k"] = round(r["armado_ms_por_10k"] + r["validacion_ms_por_10k"] + r["codificacion_ms_por_10k"], 1)
+        r["total_ms_por_10k"] = round(r["serializacion_ms_por_10k"] + r["consulta_ms_por_10k"], 1)
+
+    etapas = ("consulta", "armado", "validacion", "codificacion", "serializacion", "total")
+    print(f"\n{resultados['antes']['ordenes']} órdenes en páginas de {args.limite}, mediana de {args.repeticiones} (ms por 10k órdenes)\n")
+    print(f"{'etapa':<16}{'antes':>10}{'después':>10}{'mejora':>9}")
+    for etapa in etapas:
+        antes = resultados["antes"][f"{etapa}_ms_por_10k"]
+        despues = resultados["despues"][f"{etapa}_ms_por_10k"]
+        mejora = f"{antes / despues:.1f}x" if despues else "-"
+        print(f"{etapa:<16}{antes:>10}{despues:>10}{mejora:>9}")
+
+    if args.salida:
+        with open(args.salida, "w") as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
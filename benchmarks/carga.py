@@ -0,0 +1,409 @@
+"""
+Prueba de carga reproducible de los endpoints principales.
+
+Siembra un conjunto de datos determinista (productos, clientes y órdenes,
+con --semilla), levanta la API con uvicorn y mide cada escenario a los
+niveles de concurrencia pedidos: peticiones/s y latencias p50/p95/p99. Los
+resultados se guardan en JSON para comparar dos corridas (--comparar).
+
+Escenarios: menu, productos, vender, historial, orden, login.
+
+Base de datos (una de tres):
+  - la del .env (por defecto): se migra y se siembra lo que falte
+    (--limpiar la vacía antes, para que la corrida sea exactamente reproducible);
+  - --bd-embebida: un Postgres temporal en un directorio propio, con los
+    binarios de `pip install pgserver` o los de --pg-bin (Postgres no arranca
+    como root);
+  - --url: un servidor ya levantado; no se siembra nada.
+
+Uso (desde la raíz del proyecto):
+    pip install httpx
+    python benchmarks/carga.py --bd-embebida --concurrencia 1,16,64 --salida base.json
+    python benchmarks/carga.py --bd-embebida --concurrencia 1,16,64 --comparar base.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ESCENARIOS = ("menu", "productos", "vender", "historial", "orden", "login")
+
+USUARIO_BENCH = {"email": "bench@example.com", "nombre": "Benchmark", "password": "bench-password"}
+
+
+# --- Base de datos embebida ---
+
+class PostgresEmbebido:
+    """Postgres desechable en un directorio temporal, escuchando en 127.0.0.1"""
+
+    def __init__(self, bin_dir: str):
+        self.bin_dir = bin_dir
+        self.directorio = tempfile.mkdtemp(prefix="pizzeria_bench_")
+        self.puerto = puerto_libre()
+
+    def _bin(self, nombre: str) -> str:
+        return os.path.join(self.bin_dir, nombre)
+
+    def iniciar(self) -> dict:
+        datos = os.path.join(self.directorio, "datos")
+        subprocess.run(
+            [self._bin("initdb"), "-D", datos, "-U", "bench", "--auth=trust", "-E", "UTF8", "--no-locale"],
+            check=True, stdout=subprocess.DEVNULL
+        )
+        subprocess.run(
+            [self._bin("pg_ctl"), "-D", datos, "-w", "-l", os.path.join(self.directorio, "postgres.log"),
+             "-o", f"-p {self.puerto} -h 127.0.0.1 -k {self.directorio} -c fsync=off", "start"],
+            check=True, stdout=subprocess.DEVNULL
+        )
+        subprocess.run(
+            [self._bin("createdb"), "-h", "127.0.0.1", "-p", str(self.puerto), "-U", "bench", "pizzeria_bench"],
+            check=True
+        )
+        return {
+            "DB_USER": "bench", "DB_PASSWORD": "bench", "DB_HOST": "127.0.0.1",
+            "DB_PORT": str(self.puerto), "DB_NAME": "pizzeria_bench",
+        }
+
+    def detener(self) -> None:
+        subprocess.run(
+            [self._bin("pg_ctl"), "-D", os.path.join(self.directorio, "datos"), "-m", "fast", "stop"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+
+def binarios_postgres(pg_bin) -> str:
+    if hasattr(os, "geteuid") and os.geteuid() == 0:
+        sys.exit("Postgres no arranca como root: corre --bd-embebida con un usuario normal")
+    if pg_bin:
+        return pg_bin
+    try:
+        from pgserver._commands import POSTGRES_BIN_PATH
+        return str(POSTGRES_BIN_PATH)
+    except ImportError:
+        pass
+    pg_config = shutil.which("pg_config")
+    if pg_config:
+        return subprocess.run([pg_config, "--bindir"], capture_output=True, text=True, check=True).stdout.strip()
+    sys.exit("No se encontraron binarios de Postgres: instala pgserver (pip install pgserver) o usa --pg-bin")
+
+
+def puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# --- Siembra ---
+
+def sembrar(args) -> dict:
+    """Migra la base del entorno y siembra el conjunto de datos (importa la app aquí: lee el entorno)"""
+    sys.path.insert(0, RAIZ)
+    from sqlalchemy import func, select, text
+    from sqlalchemy.dialects.postgresql import insert as pg_insert
+    from app.data.sources import migraciones, particiones
+    from app.data.sources.database import SessionLocal, engine
+    from app.data.repositories.orden_repository import OrdenRepository
+    from app.domain.models.models import Orden, DetalleOrden, Producto, Usuario
+    from app.domain.schemas.schemas import ClienteCreate
+    from app.services.hash_pool import pwd_context
+
+    migraciones.esperar_bd(engine, 30)
+    migraciones.migrar(engine, avisar=lambda _: None)
+    # Las órdenes sembradas caen en los últimos 90 días: sus meses deben existir
+    particiones.asegurar(engine, desde=(datetime.now() - timedelta(days=90)).date())
+    rng = random.Random(args.semilla)
+    db = SessionLocal()
+    try:
+        if args.limpiar:
+            db.execute(text(
+                "TRUNCATE detalles_orden, ordenes, clientes, ventas_diarias, ventas_producto_diarias, "
+                "ventas_por_hora, claves_idempotencia RESTART IDENTITY CASCADE"
+            ))
+            db.commit()
+
+        db.execute(pg_insert(Producto).values([
+            {"nombre": f"Bench {i:04d}", "precio": rng.choice((99.0, 139.0, 159.0, 189.0, 219.0))}
+            for i in range(args.productos)
+        ]).on_conflict_do_nothing(index_elements=["nombre"]))
+        db.execute(pg_insert(Usuario).values(
+            email=USUARIO_BENCH["email"], nombre=USUARIO_BENCH["nombre"],
+            password_hash=pwd_context.hash(USUARIO_BENCH["password"]), fecha_registro=datetime.now()
+        ).on_conflict_do_nothing(index_elements=["email"]))
+        db.commit()
+
+        producto_ids = [pid for pid, in db.execute(select(Producto.id).order_by(Producto.id))]
+        precios = dict(db.execute(select(Producto.id, Producto.precio)).all())
+        existentes = db.execute(select(func.count()).select_from(Orden)).scalar_one()
+        faltantes = max(args.ordenes - existentes, 0)
+
+        repo = OrdenRepository(db)
+        ahora = datetime.now()
+        inicio = time.perf_counter()
+        for desde in range(0, faltantes, 2000):
+            ventas = []
+            for _ in range(min(2000, faltantes - desde)):
+                n = rng.randrange(args.clientes)
+                cliente = ClienteCreate(nombre=f"Cliente {n}", telefono=f"55{n:08d}", direccion="Calle Benchmark")
+                detalles = [
+                    DetalleOrden(producto_id=pid, cantidad=cantidad, subtotal=precios[pid] * cantidad)
+                    for pid, cantidad in ((rng.choice(producto_ids), rng.randint(1, 3)) for _ in range(rng.randint(1, 4)))
+                ]
+                total = sum(d.subtotal for d in detalles)
+                orden = Orden(
+                    fecha=ahora - timedelta(seconds=rng.randrange(90 * 86400)),
+                    total_venta=total, pago_cliente=total, cambio=0.0
+                )
+                ventas.append((cliente, orden, detalles))
+            repo.guardar_ventas_lote(ventas)
+        if faltantes:
+            print(f"Sembradas {faltantes} órdenes en {time.perf_counter() - inicio:.1f} s")
+        return {"productos": len(producto_ids), "clientes": args.clientes, "ordenes": existentes + faltantes}
+    finally:
+        db.close()
+        engine.dispose()
+
+
+# --- Servidor ---
+
+def levantar_servidor(puerto: int, env: dict, workers: int) -> subprocess.Popen:
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(puerto), "--workers", str(workers), "--log-level", "warning"],
+        cwd=RAIZ, env=env, start_new_session=True
+    )
+    limite = time.monotonic() + 60
+    while time.monotonic() < limite:
+        try:
+            if httpx.get(f"http://127.0.0.1:{puerto}/menu").status_code == 200:
+                return proceso
+        except httpx.TransportError:
+            pass
+        time.sleep(0.1)
+    detener_servidor(proceso)
+    raise RuntimeError("El servidor no respondió")
+
+
+def detener_servidor(proceso: subprocess.Popen) -> None:
+    # Al grupo completo: los procesos del pool de bcrypt sobreviven a uvicorn
+    os.killpg(proceso.pid, signal.SIGTERM)
+    try:
+        proceso.wait(10)
+    except subprocess.TimeoutExpired:
+        pass
+    try:
+        os.killpg(proceso.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+# --- Escenarios ---
+
+class Contexto:
+    """Datos que necesitan los escenarios, descubiertos por HTTP (sirve también con --url)"""
+
+    def __init__(self, base_url: str, semilla: int, clientes: int):
+        self.rng = random.Random(semilla)
+        self.clientes = clientes
+        with httpx.Client(base_url=base_url, timeout=60) as cliente:
+            login = cliente.post("/auth/login", json={"email": USUARIO_BENCH["email"], "password": USUARIO_BENCH["password"]})
+            self.headers = {}
+            if login.status_code == 200:
+                self.headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+            self.producto_ids = [p["id"] for p in cliente.get("/menu", headers=self.headers).json()]
+            historial = cliente.get("/ordenes/historial?limit=500", headers=self.headers).json()
+            self.orden_ids = [o["id"] for o in historial.get("ordenes", [])]
+
+    def peticion(self, escenario: str):
+        """(método, ruta, cuerpo JSON) de una petición del escenario"""
+        rng = self.rng
+        if escenario == "menu":
+            return "GET", "/menu", None
+        if escenario == "productos":
+            return "GET", "/productos/", None
+        if escenario == "vender":
+            # 80 % clientes frecuentes del conjunto sembrado, 20 % números nuevos
+            n = rng.randrange(self.clientes) if rng.random() < 0.8 else rng.randrange(10**8, 10**9)
+            return "POST", "/ordenes/vender", {
+                "cliente": {"nombre": f"Cliente {n}", "telefono": f"55{n:08d}", "direccion": "Calle Benchmark"},
+                "items": [{"producto_id": rng.choice(self.producto_ids), "cantidad": rng.randint(1, 3)} for _ in range(rng.randint(1, 4))],
+                "pago_cliente": 10000.0,
+            }
+        if escenario == "historial":
+            ruta = "/ordenes/historial?limit=50"
+            if self.orden_ids and rng.random() < 0.5:
+                ruta += f"&after={rng.choice(self.orden_ids)}"
+            return "GET", ruta, None
+        if escenario == "orden":
+            return "GET", f"/ordenes/{rng.choice(self.orden_ids)}", None
+        if escenario == "login":
+            return "POST", "/auth/login", {"email": USUARIO_BENCH["email"], "password": USUARIO_BENCH["password"]}
+        raise ValueError(escenario)
+
+
+async def medir(base_url: str, contexto: Contexto, escenario: str, concurrencia: int, duracion: float, calentamiento: float) -> dict:
+    latencias = []
+    errores = 0
+    limites = httpx.Limits(max_connections=concurrencia, max_keepalive_connections=concurrencia)
+
+    async def trabajador(cliente: httpx.AsyncClient, hasta: float, registrar: bool):
+        nonlocal errores
+        while time.perf_counter() < hasta:
+            metodo, ruta, cuerpo = contexto.peticion(escenario)
+            inicio = time.perf_counter()
+            try:
+                respuesta = await cliente.request(metodo, ruta, json=cuerpo, headers=contexto.headers)
+                fallo = respuesta.status_code >= 400
+            except httpx.TransportError:
+                fallo = True
+            if registrar:
+                latencias.append(time.perf_counter() - inicio)
+                errores += fallo
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limites, timeout=60) as cliente:
+        if calentamiento > 0:
+            hasta = time.perf_counter() + calentamiento
+            await asyncio.gather(*(trabajador(cliente, hasta, False) for _ in range(concurrencia)))
+        inicio = time.perf_counter()
+        hasta = inicio + duracion
+        await asyncio.gather(*(trabajador(cliente, hasta, True) for _ in range(concurrencia)))
+        transcurrido = time.perf_counter() - inicio
+
+    latencias.sort()
+
+    def percentil(p: float) -> float:
+        return round(latencias[min(int(len(latencias) * p), len(latencias) - 1)] * 1000, 2) if latencias else 0.0
+
+    return {
+        "escenario": escenario,
+        "concurrencia": concurrencia,
+        "peticiones": len(latencias),
+        "errores": errores,
+        "req_s": round(len(latencias) / transcurrido, 1),
+        "p50_ms": percentil(0.50),
+        "p95_ms": percentil(0.95),
+        "p99_ms": percentil(0.99),
+    }
+
+
+# --- Reporte ---
+
+def imprimir(resultados: list, base: dict) -> None:
+    encabezado = f"{'escenario':<11}{'conc':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errores':>9}"
+    if base:
+        encabezado += f"{'Δ req/s':>10}{'Δ p99':>9}"
+    print("\n" + encabezado)
+    for r in resultados:
+        linea = f"{r['escenario']:<11}{r['concurrencia']:>6}{r['req_s']:>10}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}{r['errores']:>9}"
+        anterior = base.get((r["escenario"], r["concurrencia"]))
+        if anterior:
+            linea += f"{cambio(anterior['req_s'], r['req_s']):>10}{cambio(anterior['p99_ms'], r['p99_ms']):>9}"
+        print(linea)
+
+
+def cambio(antes: float, despues: float) -> str:
+    return f"{(despues - antes) / antes * 100:+.0f}%" if antes else "-"
+
+
+def commit_actual() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="servidor ya levantado (no se siembra ni se levanta nada)")
+    parser.add_argument("--bd-embebida", action="store_true", help="usar un Postgres temporal")
+    parser.add_argument("--pg-bin", help="directorio con initdb/pg_ctl para --bd-embebida")
+    parser.add_argument("--limpiar", action="store_true", help="vaciar órdenes y clientes de la base del .env antes de sembrar")
+    parser.add_argument("--productos", type=int, default=50)
+    parser.add_argument("--clientes", type=int, default=2000)
+    parser.add_argument("--ordenes", type=int, default=20000)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--escenarios", default=",".join(ESCENARIOS))
+    parser.add_argument("--concurrencia", default="1,16,64", help="niveles separados por coma")
+    parser.add_argument("--duracion", type=float, default=10.0, help="segundos medidos por escenario y nivel")
+    parser.add_argument("--calentamiento", type=float, default=2.0, help="segundos sin medir antes de cada medición")
+    parser.add_argument("--modo", choices=("sync", "async"), default=os.getenv("DB_MODO", "sync"))
+    parser.add_argument("--workers", type=int, default=1, help="workers de uvicorn")
+    parser.add_argument("--puerto", type=int, default=8767)
+    parser.add_argument("--salida", help="archivo JSON donde guardar los resultados")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior para mostrar la diferencia")
+    args = parser.parse_args()
+
+    escenarios = [e for e in args.escenarios.split(",") if e]
+    desconocidos = set(escenarios) - set(ESCENARIOS)
+    if desconocidos:
+        parser.error(f"escenarios desconocidos: {', '.join(sorted(desconocidos))}")
+    niveles = [int(n) for n in args.concurrencia.split(",")]
+
+    embebido = None
+    servidor = None
+    datos = None
+    try:
+        env = dict(os.environ, DB_MODO=args.modo)
+        if args.url:
+            base_url = args.url.rstrip("/")
+        else:
+            if args.bd_embebida:
+                embebido = PostgresEmbebido(binarios_postgres(args.pg_bin))
+                env.update(embebido.iniciar())
+            # La app lee la configuración de la BD del entorno al importarse
+            os.environ.update(env)
+            datos = sembrar(args)
+            servidor = levantar_servidor(args.puerto, env, args.workers)
+            base_url = f"http://127.0.0.1:{args.puerto}"
+
+        contexto = Contexto(base_url, args.semilla, args.clientes)
+        resultados = []
+        for escenario in escenarios:
+            if escenario == "orden" and not contexto.orden_ids:
+                print("Sin órdenes: se omite el escenario 'orden'")
+                continue
+            for nivel in niveles:
+                resultados.append(asyncio.run(medir(base_url, contexto, escenario, nivel, args.duracion, args.calentamiento)))
+                print(f"  {escenario} x{nivel}: {resultados[-1]['req_s']} req/s")
+    finally:
+        if servidor is not None:
+            detener_servidor(servidor)
+        if embebido is not None:
+            embebido.detener()
+
+    base = {}
+    if args.comparar:
+        with open(args.comparar) as f:
+            base = {(r["escenario"], r["concurrencia"]): r for r in json.load(f)["resultados"]}
+    imprimir(resultados, base)
+
+    if args.salida:
+        with open(args.salida, "w") as f:
+            json.dump({
+                "fecha": datetime.now().isoformat(timespec="seconds"),
+                "commit": commit_actual(),
+                "python": platform.python_version(),
+                "modo": args.modo,
+                "workers": args.workers,
+                "duracion_s": args.duracion,
+                "semilla": args.semilla,
+                "datos": datos,
+                "resultados": resultados,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
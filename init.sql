@@ -1,8 +1,13 @@
+-- Inicialización del contenedor de Postgres (docker-entrypoint-initdb.d).
+-- La fuente del esquema son las migraciones de migraciones/ (python -m app.comandos migrar),
+-- que son idempotentes sobre una base creada con este archivo.
+
 -- 1. Crear tabla de Clientes
 CREATE TABLE IF NOT EXISTS clientes (
     id SERIAL PRIMARY KEY,
     nombre VARCHAR(100) NOT NULL,
     telefono VARCHAR(20),
+    telefono_normalizado VARCHAR(20), -- Solo dígitos; identifica al cliente en cada venta
     direccion TEXT NOT NULL
 );
 
@@ -14,24 +19,127 @@ CREATE TABLE IF NOT EXISTS productos (
     precio DECIMAL(10, 2) NOT NULL
 );
 
--- 3. Crear tabla de Órdenes (Cabecera del ticket)
+-- 3. Crear tabla de Órdenes (Cabecera del ticket), particionada por mes de `fecha`.
+--    La PK incluye la fecha porque la clave de una tabla particionada debe
+--    contener la columna de partición; el folio sigue siendo `id`
 CREATE TABLE IF NOT EXISTS ordenes (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     cliente_id INT REFERENCES clientes(id) ON DELETE SET NULL, -- Si borras cliente, la venta queda (histórico)
-    fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP, -- Guarda fecha y hora automática
+    fecha TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP, -- Guarda fecha y hora automática
     total_venta DECIMAL(10, 2) NOT NULL,
     pago_cliente DECIMAL(10, 2) NOT NULL,
     cambio DECIMAL(10, 2) NOT NULL,
-    estatus VARCHAR(20) DEFAULT 'PAGADA' -- Valores: 'PAGADA', 'CANCELADA'
-);
+    estatus VARCHAR(20) DEFAULT 'PAGADA', -- Valores: 'PAGADA', 'CANCELADA'
+    PRIMARY KEY (id, fecha)
+) PARTITION BY RANGE (fecha);
 
--- 4. Crear tabla de Detalle de Orden (Qué pizzas lleva cada orden)
+-- 4. Crear tabla de Detalle de Orden (Qué pizzas lleva cada orden), particionada
+--    igual que ordenes por la fecha de su orden
 CREATE TABLE IF NOT EXISTS detalles_orden (
-    id SERIAL PRIMARY KEY,
-    orden_id INT REFERENCES ordenes(id) ON DELETE CASCADE, -- Si borras orden, se borran sus detalles
+    id SERIAL,
+    orden_id INT,
     producto_id INT REFERENCES productos(id),
     cantidad INT NOT NULL DEFAULT 1,
-    subtotal DECIMAL(10, 2) NOT NULL -- (precio * cantidad) guardado por si cambia el precio futuro
+    subtotal DECIMAL(10, 2) NOT NULL, -- (precio * cantidad) guardado por si cambia el precio futuro
+    fecha_orden TIMESTAMP NOT NULL, -- fecha de la orden (columna de partición)
+    PRIMARY KEY (id, fecha_orden),
+    FOREIGN KEY (orden_id, fecha_orden) REFERENCES ordenes(id, fecha) ON DELETE CASCADE -- Si borras orden, se borran sus detalles
+) PARTITION BY RANGE (fecha_orden);
+
+-- Un mes de ordenes y de detalles_orden (ordenes_pAAAA_MM, detalles_orden_pAAAA_MM).
+-- `python -m app.comandos migrar` crea los meses siguientes
+CREATE OR REPLACE FUNCTION crear_particion_ordenes(mes DATE) RETURNS void AS $$
+DECLARE
+    inicio DATE := date_trunc('month', mes)::date;
+    fin DATE := (date_trunc('month', mes) + interval '1 month')::date;
+    sufijo TEXT := to_char(mes, '"p"YYYY_MM');
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF ordenes FOR VALUES FROM (%L) TO (%L)',
+        'ordenes_' || sufijo, inicio, fin
+    );
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF detalles_orden FOR VALUES FROM (%L) TO (%L)',
+        'detalles_orden_' || sufijo, inicio, fin
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT crear_particion_ordenes(CURRENT_DATE);
+SELECT crear_particion_ordenes((CURRENT_DATE + interval '1 month')::date);
+
+-- 5. Tablas de resumen para reportes (las mantiene la API en cada venta;
+--    `python -m app.comandos reconstruir-reportes` las recalcula desde ordenes/detalles_orden)
+CREATE TABLE IF NOT EXISTS ventas_diarias (
+    fecha DATE PRIMARY KEY,
+    num_ordenes INT NOT NULL DEFAULT 0,
+    total_venta DECIMAL(12, 2) NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS ventas_producto_diarias (
+    fecha DATE NOT NULL,
+    producto_id INT NOT NULL,
+    unidades INT NOT NULL DEFAULT 0,
+    ingreso DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (fecha, producto_id)
+);
+
+CREATE TABLE IF NOT EXISTS ventas_por_hora (
+    hora TIMESTAMP PRIMARY KEY, -- inicio de la hora
+    num_ordenes INT NOT NULL DEFAULT 0,
+    total_venta DECIMAL(12, 2) NOT NULL DEFAULT 0
+);
+
+-- 6. Claves de idempotencia de POST /ordenes/vender (header Idempotency-Key).
+--    Una clave EN_PROCESO expira pronto (si su worker murió, otra petición la
+--    retoma); una COMPLETADA guarda el ticket para repetirlo hasta que expire
+CREATE TABLE IF NOT EXISTS claves_idempotencia (
+    clave VARCHAR(255) PRIMARY KEY,
+    huella VARCHAR(64) NOT NULL,
+    estado VARCHAR(20) NOT NULL DEFAULT 'EN_PROCESO',
+    respuesta TEXT,
+    expira TIMESTAMP NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_claves_idempotencia_expira ON claves_idempotencia (expira);
+
+-- 7. Teléfono normalizado de clientes con índice único (el upsert de cada venta
+--    usa ON CONFLICT sobre él). Idempotente, para bases creadas antes de la columna:
+--    respalda solo el cliente más antiguo de cada número; si había duplicados,
+--    los demás quedan con NULL y conservan sus órdenes.
+ALTER TABLE clientes ADD COLUMN IF NOT EXISTS telefono_normalizado VARCHAR(20);
+UPDATE clientes c SET telefono_normalizado = n.normalizado
+FROM (
+    SELECT DISTINCT ON (normalizado) id, normalizado
+    FROM (
+        SELECT id, COALESCE(NULLIF(regexp_replace(telefono, '[^0-9]', '', 'g'), ''), lower(trim(telefono))) AS normalizado
+        FROM clientes
+        WHERE telefono IS NOT NULL
+    ) t
+    ORDER BY normalizado, id
+) n
+WHERE c.id = n.id
+  AND c.telefono_normalizado IS NULL
+  AND NOT EXISTS (SELECT 1 FROM clientes o WHERE o.telefono_normalizado = n.normalizado);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_clientes_telefono_normalizado ON clientes (telefono_normalizado);
+
+-- 8. Índices de búsqueda de órdenes (GET /ordenes/buscar) y de detalles por orden.
+--    Cliente y estatus llevan el folio para paginar por índice sin ordenar
+CREATE INDEX IF NOT EXISTS ix_detalles_orden_orden_id ON detalles_orden (orden_id);
+CREATE INDEX IF NOT EXISTS ix_detalles_orden_producto_orden ON detalles_orden (producto_id, orden_id);
+CREATE INDEX IF NOT EXISTS ix_ordenes_fecha ON ordenes (fecha);
+CREATE INDEX IF NOT EXISTS ix_ordenes_cliente_id ON ordenes (cliente_id, id);
+CREATE INDEX IF NOT EXISTS ix_ordenes_estatus ON ordenes (estatus, id);
+
+-- 9. Meses de órdenes ya archivados en disco y desprendidos (python -m app.comandos archivar)
+CREATE TABLE IF NOT EXISTS particiones_archivadas (
+    mes DATE PRIMARY KEY,
+    archivo VARCHAR(255) NOT NULL,
+    ordenes INT NOT NULL,
+    detalles INT NOT NULL,
+    folio_min INT,
+    folio_max INT,
+    sha256 VARCHAR(64) NOT NULL,
+    archivada_en TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
 );
 
 -- ==========================================
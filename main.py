@@ -1,24 +1,180 @@
-from fastapi import FastAPI, Depends
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from fastapi import APIRouter, FastAPI, Depends, Header
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 # Imports de tus módulos
-from app.data.sources.database import engine, Base, get_db
-from app.domain.models.models import Producto
+from app.data.sources.database import (
+    engine, async_engine, engine_lectura, async_engine_lectura, SessionLocal, AsyncSessionLocal, DB_MODO
+)
+from app.data.sources import particiones
+from app.data.sources.eventos_ordenes import bus_ordenes
+from app.data.sources.instrumentacion_sql import SQL_INSTRUMENTAR, instrumentar
+from app.data.sources.metricas_http import RegistroMetricas
 from app.domain.schemas.schemas import ProductoResponse
-from app.presentation.controllers import venta_controller, auth_controller, producto_controller # Importamos los controladores
+from app.presentation.cache_http import respuesta_json_cacheable
+from app.presentation.dependencias import obtener_usuario_actual, DB_LECTURA, ASYNC_DB_LECTURA
+from app.presentation.middleware_admision import ADMISION_ACTIVA, MiddlewareAdmision
+from app.presentation.middleware_metricas import MiddlewareMetricas, plantillas_rutas
+from app.presentation.middleware_sql import MiddlewareSQL
+from app.services.escritor_ventas import escritor_ventas, escritor_ventas_async
+from app.services.producto_service import ProductoService
+from app.presentation.controllers import venta_controller, auth_controller, producto_controller, monitoreo_controller, reporte_controller, cocina_controller # Importamos los controladores
 
-# Crear tablas automáticamente
-Base.metadata.create_all(bind=engine)
+# Importar la app no toca la base de datos: el esquema lo crea y actualiza
+# `python -m app.comandos migrar` y las conexiones se abren al primer uso.
+# Al arrancar se precalienta la caché del catálogo, con un tiempo límite
+# para que una base lenta no impida que el worker empiece a atender, y en
+# segundo plano se crean las particiones de ordenes que falten.
+CALENTAR_AL_ARRANCAR = os.getenv("CALENTAR_AL_ARRANCAR", "true").lower() in ("1", "true", "yes")
+CALENTAR_TIMEOUT = float(os.getenv("CALENTAR_TIMEOUT", "5"))
 
-app = FastAPI(title="Pizzería API Clean Arch")
+# Métricas en formato Prometheus en /metrics (ver app/data/sources/metricas_http.py)
+METRICAS_ACTIVAS = os.getenv("METRICAS_ACTIVAS", "true").lower() in ("1", "true", "yes")
+
+logger = logging.getLogger(__name__)
+
+def _calentar_catalogo():
+    db = SessionLocal()
+    try:
+        ProductoService.obtener_catalogo(db)
+    finally:
+        db.close()
+
+async def _calentar_catalogo_async():
+    from app.services.producto_service_async import ProductoServiceAsync
+    async with AsyncSessionLocal() as db:
+        await ProductoServiceAsync.obtener_catalogo(db)
+
+async def _renovar_particiones():
+    """
+    Crea los meses de ordenes que falten al arrancar y luego cada
+    PARTICIONES_REVISION_HORAS, para que las ventas no dependan de un cron.
+    """
+    while True:
+        try:
+            creadas = await run_in_threadpool(particiones.asegurar, engine)
+            if creadas:
+                logger.info("Particiones creadas: %s", ", ".join(creadas))
+        except Exception as e:
+            # Base sin migrar o caída: se reintenta en la siguiente revisión
+            logger.warning("No se pudieron revisar las particiones de ordenes: %r", e)
+        if particiones.PARTICIONES_REVISION_HORAS <= 0:
+            return
+        await asyncio.sleep(particiones.PARTICIONES_REVISION_HORAS * 3600)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    renovar_particiones = asyncio.create_task(_renovar_particiones())
+    if CALENTAR_AL_ARRANCAR:
+        calentar = _calentar_catalogo_async() if DB_MODO == "async" else run_in_threadpool(_calentar_catalogo)
+        try:
+            await asyncio.wait_for(calentar, CALENTAR_TIMEOUT)
+        except Exception as e:
+            # La caché se llenará con la primera petición que la necesite
+            logger.warning("No se pudo precalentar el catálogo: %r", e)
+    yield
+    renovar_particiones.cancel()
+    # Las ventas que aún esperan en el escritor se guardan antes de cerrar
+    await escritor_ventas_async.detener()
+    await run_in_threadpool(escritor_ventas.detener)
+    await run_in_threadpool(bus_ordenes.detener)
+    if METRICAS_ACTIVAS:
+        registro_metricas.limpiar_gauges()
+    engine.dispose()
+    if async_engine is not None:
+        await async_engine.dispose()
+    if engine_lectura is not None:
+        engine_lectura.dispose()
+    if async_engine_lectura is not None:
+        await async_engine_lectura.dispose()
+
+app = FastAPI(title="Pizzería API Clean Arch", lifespan=lifespan)
+
+# --- INSTRUMENTACIÓN SQL (opcional) ---
+# Sin SQL_INSTRUMENTAR no se registran eventos ni middleware: cero costo
+if SQL_INSTRUMENTAR:
+    for motor in (engine, async_engine, engine_lectura, async_engine_lectura):
+        if motor is not None:
+            instrumentar(getattr(motor, "sync_engine", motor))
+    app.add_middleware(MiddlewareSQL)
+
+# --- CONTROL DE ADMISIÓN ---
+# Cupos por prioridad ligados al tamaño del pool y límite por cliente
+# (ver app/presentation/middleware_admision.py)
+if ADMISION_ACTIVA:
+    app.add_middleware(MiddlewareAdmision)
 
 # --- CONECTAR LOS ROUTERS ---
-app.include_router(venta_controller.router)
-app.include_router(auth_controller.router)
-app.include_router(producto_controller.router)
+def combinar_routers(router_sync: APIRouter, router_async: APIRouter) -> APIRouter:
+    """
+    Router con las rutas del síncrono en su mismo orden, sustituyendo por la
+    versión async las que la tienen. Las rutas sin versión async (p. ej.
+    /ordenes/exportar) siguen atendidas por el controlador síncrono.
+    """
+    rutas_async = {(ruta.path, frozenset(ruta.methods)): ruta for ruta in router_async.routes}
+    combinado = APIRouter()
+    combinado.routes.extend(
+        rutas_async.get((ruta.path, frozenset(ruta.methods)), ruta) for ruta in router_sync.routes
+    )
+    return combinado
+
+# Con AUTH_PROTEGER_RUTAS=true, /ordenes, /productos, /reportes y /cocina exigen un token JWT válido
+AUTH_PROTEGER_RUTAS = os.getenv("AUTH_PROTEGER_RUTAS", "false").lower() in ("1", "true", "yes")
+protegidas = [Depends(obtener_usuario_actual)] if AUTH_PROTEGER_RUTAS else []
+
+if DB_MODO == "async":
+    from app.presentation.controllers import venta_controller_async, auth_controller_async, producto_controller_async
+    router_ventas = combinar_routers(venta_controller.router, venta_controller_async.router)
+    router_auth = combinar_routers(auth_controller.router, auth_controller_async.router)
+    router_productos = combinar_routers(producto_controller.router, producto_controller_async.router)
+else:
+    router_ventas, router_auth, router_productos = venta_controller.router, auth_controller.router, producto_controller.router
+
+app.include_router(router_ventas, dependencies=protegidas)
+app.include_router(router_auth)
+app.include_router(router_productos, dependencies=protegidas)
+app.include_router(reporte_controller.router, dependencies=protegidas)
+app.include_router(cocina_controller.router, dependencies=protegidas)
+app.include_router(monitoreo_controller.router)
 
 # --- ENDPOINT SIMPLE DE MENÚ ---
-@app.get("/menu", response_model=List[ProductoResponse])
-def obtener_menu(db: Session = Depends(get_db)):
-    return db.query(Producto).all()
\ No newline at end of file
+# Mismo catálogo cacheado que GET /productos/ (ETag / 304)
+if DB_MODO == "async":
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from app.services.producto_service_async import ProductoServiceAsync
+
+    @app.get("/menu", response_model=List[ProductoResponse])
+    async def obtener_menu(if_none_match: Optional[str] = Header(None), db: AsyncSession = ASYNC_DB_LECTURA):
+        etag, cuerpo = await ProductoServiceAsync.obtener_catalogo(db)
+        return respuesta_json_cacheable(etag, cuerpo, if_none_match)
+else:
+    @app.get("/menu", response_model=List[ProductoResponse])
+    def obtener_menu(if_none_match: Optional[str] = Header(None), db: Session = DB_LECTURA):
+        etag, cuerpo = ProductoService.obtener_catalogo(db)
+        return respuesta_json_cacheable(etag, cuerpo, if_none_match)
+
+# --- MÉTRICAS (Prometheus) ---
+# Latencia, códigos y peticiones en curso por ruta, y estado de los pools.
+# La disposición se calcula con todas las rutas ya registradas.
+if METRICAS_ACTIVAS:
+    @app.get("/metrics", include_in_schema=False)
+    def exponer_metricas():
+        return PlainTextResponse(registro_metricas.exponer(), media_type="text/plain; version=0.0.4")
+
+    registro_metricas = RegistroMetricas(plantillas_rutas(
+        app.router, router_ventas, router_auth, router_productos, reporte_controller.router,
+        cocina_controller.router, monitoreo_controller.router
+    ))
+    motores = [
+        (i, getattr(motor, "sync_engine", motor))
+        for i, motor in enumerate((engine, async_engine, engine_lectura, async_engine_lectura))
+        if motor is not None
+    ]
+    # Se agrega al final para quedar por fuera del resto de middlewares
+    app.add_middleware(MiddlewareMetricas, registro=registro_metricas, engines=motores)
@@ -0,0 +1,51 @@
+-- Esquema base (el mismo de init.sql, más usuarios, que antes solo creaba
+-- create_all). Con IF NOT EXISTS para poder aplicarse sobre bases existentes.
+
+CREATE TABLE IF NOT EXISTS usuarios (
+    id SERIAL PRIMARY KEY,
+    email VARCHAR NOT NULL,
+    nombre VARCHAR NOT NULL,
+    password_hash VARCHAR NOT NULL,
+    fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_usuarios_email ON usuarios (email);
+
+CREATE TABLE IF NOT EXISTS clientes (
+    id SERIAL PRIMARY KEY,
+    nombre VARCHAR(100) NOT NULL,
+    telefono VARCHAR(20),
+    direccion TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS productos (
+    id SERIAL PRIMARY KEY,
+    nombre VARCHAR(50) NOT NULL UNIQUE,
+    precio DECIMAL(10, 2) NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS ordenes (
+    id SERIAL PRIMARY KEY,
+    cliente_id INT REFERENCES clientes(id) ON DELETE SET NULL,
+    fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    total_venta DECIMAL(10, 2) NOT NULL,
+    pago_cliente DECIMAL(10, 2) NOT NULL,
+    cambio DECIMAL(10, 2) NOT NULL,
+    estatus VARCHAR(20) DEFAULT 'PAGADA'
+);
+
+CREATE TABLE IF NOT EXISTS detalles_orden (
+    id SERIAL PRIMARY KEY,
+    orden_id INT REFERENCES ordenes(id) ON DELETE CASCADE,
+    producto_id INT REFERENCES productos(id),
+    cantidad INT NOT NULL DEFAULT 1,
+    subtotal DECIMAL(10, 2) NOT NULL
+);
+
+INSERT INTO productos (nombre, precio) VALUES
+    ('Pepperoni', 139.00),
+    ('Hawaiana', 159.00),
+    ('Carnes Frías', 189.00),
+    ('Mexicana', 189.00),
+    ('3 Quesos', 189.00),
+    ('Europea', 189.00)
+ON CONFLICT (nombre) DO NOTHING;
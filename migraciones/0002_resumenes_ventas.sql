@@ -0,0 +1,41 @@
+-- Tablas de resumen para /reportes. Las mantiene cada venta; aquí se llenan
+-- con el historial que ya exista (sin pisar resúmenes que ya tuvieran datos).
+
+CREATE TABLE IF NOT EXISTS ventas_diarias (
+    fecha DATE PRIMARY KEY,
+    num_ordenes INT NOT NULL DEFAULT 0,
+    total_venta DECIMAL(12, 2) NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS ventas_producto_diarias (
+    fecha DATE NOT NULL,
+    producto_id INT NOT NULL,
+    unidades INT NOT NULL DEFAULT 0,
+    ingreso DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (fecha, producto_id)
+);
+
+CREATE TABLE IF NOT EXISTS ventas_por_hora (
+    hora TIMESTAMP PRIMARY KEY,
+    num_ordenes INT NOT NULL DEFAULT 0,
+    total_venta DECIMAL(12, 2) NOT NULL DEFAULT 0
+);
+
+INSERT INTO ventas_diarias (fecha, num_ordenes, total_venta)
+SELECT CAST(fecha AS DATE), count(*), sum(total_venta)
+FROM ordenes WHERE fecha IS NOT NULL
+GROUP BY CAST(fecha AS DATE)
+ON CONFLICT DO NOTHING;
+
+INSERT INTO ventas_por_hora (hora, num_ordenes, total_venta)
+SELECT date_trunc('hour', fecha), count(*), sum(total_venta)
+FROM ordenes WHERE fecha IS NOT NULL
+GROUP BY date_trunc('hour', fecha)
+ON CONFLICT DO NOTHING;
+
+INSERT INTO ventas_producto_diarias (fecha, producto_id, unidades, ingreso)
+SELECT CAST(o.fecha AS DATE), d.producto_id, sum(d.cantidad), sum(d.subtotal)
+FROM detalles_orden d JOIN ordenes o ON o.id = d.orden_id
+WHERE o.fecha IS NOT NULL AND d.producto_id IS NOT NULL
+GROUP BY CAST(o.fecha AS DATE), d.producto_id
+ON CONFLICT DO NOTHING;
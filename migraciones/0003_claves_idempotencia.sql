@@ -0,0 +1,10 @@
+-- Claves del header Idempotency-Key de POST /ordenes/vender
+
+CREATE TABLE IF NOT EXISTS claves_idempotencia (
+    clave VARCHAR(255) PRIMARY KEY,
+    huella VARCHAR(64) NOT NULL,
+    estado VARCHAR(20) NOT NULL DEFAULT 'EN_PROCESO',
+    respuesta TEXT,
+    expira TIMESTAMP NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_claves_idempotencia_expira ON claves_idempotencia (expira);
@@ -0,0 +1,20 @@
+-- Teléfono normalizado (solo dígitos) con índice único: el upsert de clientes
+-- de cada venta usa ON CONFLICT sobre él. Se respalda solo el cliente más
+-- antiguo de cada número; si había duplicados, los demás quedan con NULL y
+-- conservan sus órdenes.
+
+ALTER TABLE clientes ADD COLUMN IF NOT EXISTS telefono_normalizado VARCHAR(20);
+UPDATE clientes c SET telefono_normalizado = n.normalizado
+FROM (
+    SELECT DISTINCT ON (normalizado) id, normalizado
+    FROM (
+        SELECT id, COALESCE(NULLIF(regexp_replace(telefono, '[^0-9]', '', 'g'), ''), lower(trim(telefono))) AS normalizado
+        FROM clientes
+        WHERE telefono IS NOT NULL
+    ) t
+    ORDER BY normalizado, id
+) n
+WHERE c.id = n.id
+  AND c.telefono_normalizado IS NULL
+  AND NOT EXISTS (SELECT 1 FROM clientes o WHERE o.telefono_normalizado = n.normalizado);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_clientes_telefono_normalizado ON clientes (telefono_normalizado);
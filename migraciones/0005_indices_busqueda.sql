@@ -0,0 +1,10 @@
+-- Índices de GET /ordenes/buscar y de la carga de detalles por orden.
+-- Los de cliente y estatus llevan el folio para que la página (ORDER BY id
+-- DESC LIMIT n) salga del índice sin ordenar; el de producto sirve al
+-- EXISTS del filtro por producto.
+
+CREATE INDEX IF NOT EXISTS ix_detalles_orden_orden_id ON detalles_orden (orden_id);
+CREATE INDEX IF NOT EXISTS ix_detalles_orden_producto_orden ON detalles_orden (producto_id, orden_id);
+CREATE INDEX IF NOT EXISTS ix_ordenes_fecha ON ordenes (fecha);
+CREATE INDEX IF NOT EXISTS ix_ordenes_cliente_id ON ordenes (cliente_id, id);
+CREATE INDEX IF NOT EXISTS ix_ordenes_estatus ON ordenes (estatus, id);
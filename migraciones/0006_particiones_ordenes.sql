@@ -0,0 +1,120 @@
+-- Particiones mensuales de ordenes (por fecha) y detalles_orden (por la fecha
+-- de su orden, columna nueva fecha_orden): las consultas por rango de fechas
+-- solo tocan los meses que piden y los meses viejos se pueden archivar y
+-- desprender (python -m app.comandos archivar) sin DELETE masivos.
+--
+-- La clave de una tabla particionada debe incluir la columna de partición:
+-- la PK pasa a ser (id, fecha) y la FK de los detalles (orden_id, fecha_orden).
+-- Los folios siguen saliendo de la misma secuencia.
+--
+-- Los meses se crean con crear_particion_ordenes(mes); `migrar` crea además
+-- los siguientes PARTICIONES_MESES_ADELANTE meses (ver app/data/sources/particiones.py).
+
+CREATE TABLE IF NOT EXISTS particiones_archivadas (
+    mes DATE PRIMARY KEY,
+    archivo VARCHAR(255) NOT NULL,
+    ordenes INT NOT NULL,
+    detalles INT NOT NULL,
+    folio_min INT,
+    folio_max INT,
+    sha256 VARCHAR(64) NOT NULL,
+    archivada_en TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE OR REPLACE FUNCTION crear_particion_ordenes(mes DATE) RETURNS void AS $$
+DECLARE
+    inicio DATE := date_trunc('month', mes)::date;
+    fin DATE := (date_trunc('month', mes) + interval '1 month')::date;
+    sufijo TEXT := to_char(mes, '"p"YYYY_MM');
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF ordenes FOR VALUES FROM (%L) TO (%L)',
+        'ordenes_' || sufijo, inicio, fin
+    );
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF detalles_orden FOR VALUES FROM (%L) TO (%L)',
+        'detalles_orden_' || sufijo, inicio, fin
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    restriccion RECORD;
+    indice RECORD;
+    mes DATE;
+BEGIN
+    -- init.sql ya las crea particionadas
+    IF (SELECT relkind FROM pg_class WHERE oid = 'ordenes'::regclass) = 'p' THEN
+        RETURN;
+    END IF;
+
+    ALTER TABLE detalles_orden RENAME TO detalles_orden_sin_particion;
+    ALTER TABLE ordenes RENAME TO ordenes_sin_particion;
+    ALTER SEQUENCE ordenes_id_seq OWNED BY NONE;
+    ALTER SEQUENCE detalles_orden_id_seq OWNED BY NONE;
+
+    -- Liberar los nombres de restricciones e índices para las tablas nuevas
+    FOR restriccion IN
+        SELECT conrelid::regclass AS tabla, conname FROM pg_constraint
+        WHERE conrelid IN ('detalles_orden_sin_particion'::regclass, 'ordenes_sin_particion'::regclass)
+          AND contype IN ('f', 'p', 'u')
+        ORDER BY contype = 'f' DESC
+    LOOP
+        EXECUTE format('ALTER TABLE %s DROP CONSTRAINT %I', restriccion.tabla, restriccion.conname);
+    END LOOP;
+    FOR indice IN
+        SELECT indexrelid::regclass AS nombre FROM pg_index
+        WHERE indrelid IN ('detalles_orden_sin_particion'::regclass, 'ordenes_sin_particion'::regclass)
+    LOOP
+        EXECUTE format('DROP INDEX %s', indice.nombre);
+    END LOOP;
+
+    CREATE TABLE ordenes (LIKE ordenes_sin_particion INCLUDING DEFAULTS) PARTITION BY RANGE (fecha);
+    ALTER TABLE ordenes ALTER COLUMN fecha SET NOT NULL;
+    ALTER TABLE ordenes ADD PRIMARY KEY (id, fecha);
+    ALTER TABLE ordenes ADD FOREIGN KEY (cliente_id) REFERENCES clientes(id) ON DELETE SET NULL;
+
+    CREATE TABLE detalles_orden (
+        LIKE detalles_orden_sin_particion INCLUDING DEFAULTS,
+        fecha_orden TIMESTAMP NOT NULL
+    ) PARTITION BY RANGE (fecha_orden);
+    ALTER TABLE detalles_orden ADD PRIMARY KEY (id, fecha_orden);
+    ALTER TABLE detalles_orden ADD FOREIGN KEY (orden_id, fecha_orden) REFERENCES ordenes(id, fecha) ON DELETE CASCADE;
+    ALTER TABLE detalles_orden ADD FOREIGN KEY (producto_id) REFERENCES productos(id);
+
+    ALTER SEQUENCE ordenes_id_seq OWNED BY ordenes.id;
+    ALTER SEQUENCE detalles_orden_id_seq OWNED BY detalles_orden.id;
+
+    -- Un mes por cada uno con órdenes, hasta el siguiente al actual. Las
+    -- órdenes sin fecha (no debería haber) quedan con la de la migración
+    UPDATE ordenes_sin_particion SET fecha = CURRENT_TIMESTAMP WHERE fecha IS NULL;
+    FOR mes IN
+        SELECT generate_series(
+            date_trunc('month', LEAST(COALESCE(MIN(fecha), CURRENT_DATE), CURRENT_DATE)),
+            date_trunc('month', CURRENT_DATE) + interval '1 month',
+            interval '1 month'
+        )::date
+        FROM ordenes_sin_particion
+    LOOP
+        PERFORM crear_particion_ordenes(mes);
+    END LOOP;
+
+    INSERT INTO ordenes (id, cliente_id, fecha, total_venta, pago_cliente, cambio, estatus)
+    SELECT id, cliente_id, fecha, total_venta, pago_cliente, cambio, estatus FROM ordenes_sin_particion;
+    -- Los detalles sin orden (orden_id nulo) no tienen mes y se descartan
+    INSERT INTO detalles_orden (id, orden_id, producto_id, cantidad, subtotal, fecha_orden)
+    SELECT d.id, d.orden_id, d.producto_id, d.cantidad, d.subtotal, o.fecha
+    FROM detalles_orden_sin_particion d JOIN ordenes_sin_particion o ON o.id = d.orden_id;
+
+    DROP TABLE detalles_orden_sin_particion;
+    DROP TABLE ordenes_sin_particion;
+
+    -- Los de 0005, ahora sobre las tablas particionadas (se propagan a cada mes)
+    CREATE INDEX ix_detalles_orden_orden_id ON detalles_orden (orden_id);
+    CREATE INDEX ix_detalles_orden_producto_orden ON detalles_orden (producto_id, orden_id);
+    CREATE INDEX ix_ordenes_fecha ON ordenes (fecha);
+    CREATE INDEX ix_ordenes_cliente_id ON ordenes (cliente_id, id);
+    CREATE INDEX ix_ordenes_estatus ON ordenes (estatus, id);
+END;
+$$;
@@ -0,0 +1,60 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from app.presentation import middleware_admision
+from app.presentation.middleware_admision import ALTA, MEDIA, ControlAdmision, Rechazo
+
+
+class TestControlAdmision(unittest.IsolatedAsyncioTestCase):
+
+    async def test_cupo_entregado_al_vencer_la_espera(self):
+        # Reproduce wait_for de Python 3.12+: _despertar le da el cupo a la
+        # petición en la misma vuelta en que vence su espera y aun así se
+        # lanza TimeoutError
+        control = ControlAdmision(limite=1, esperas_ms="50,50,50")
+        await control.entrar(ALTA)
+
+        async def wait_for_312(futuro, timeout):
+            control.salir()
+            self.assertTrue(futuro.done())
+            raise asyncio.TimeoutError
+
+        with mock.patch.object(middleware_admision.asyncio, "wait_for", wait_for_312):
+            await control.entrar(ALTA)
+
+        # La petición quedó admitida con el cupo que se le dio
+        self.assertEqual(control.en_curso, 1)
+        control.salir()
+        self.assertEqual(control.en_curso, 0)
+        self.assertEqual(control.rechazadas[ALTA], 0)
+
+    async def test_salir_justo_al_vencer_no_pierde_cupos(self):
+        control = ControlAdmision(limite=1, esperas_ms="50,50,50")
+        for _ in range(20):
+            await control.entrar(ALTA)
+            asyncio.get_running_loop().call_later(0.05, control.salir)
+            try:
+                await control.entrar(ALTA)
+            except Rechazo:
+                pass
+            else:
+                control.salir()
+            # Admitida o rechazada, no queda ningún cupo ocupado sin dueño
+            await asyncio.sleep(0.06)
+            self.assertEqual(control.en_curso, 0)
+        await control.entrar(MEDIA)
+        self.assertEqual(control.en_curso, 1)
+
+    async def test_espera_vencida_sin_cupo_rechaza(self):
+        control = ControlAdmision(limite=1, esperas_ms="20,20,20")
+        await control.entrar(ALTA)
+        with self.assertRaises(Rechazo) as rechazo:
+            await control.entrar(ALTA)
+        self.assertEqual(rechazo.exception.codigo, 503)
+        self.assertEqual(control.en_curso, 1)
+        self.assertEqual(control.rechazadas[ALTA], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()